@@ -0,0 +1,51 @@
+"""add percentile sketches and unique baseline key
+
+Revision ID: 0004_add_percentile_sketches
+Revises: 0003_add_watchlist_table
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004_add_percentile_sketches"
+down_revision = "0003_add_watchlist_table"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "percentile_sketches",
+        sa.Column("metric", sa.String(length=64), primary_key=True),
+        sa.Column("bucket_key", sa.String(length=128), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("source", sa.String(length=64), primary_key=True),
+        sa.Column("n", sa.BigInteger(), nullable=False),
+        sa.Column("sketch", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_percentile_sketches_day", "percentile_sketches", ["day"])
+    # the baseline upsert conflicts on (metric, bucket_key); keep the newest row of any duplicates
+    op.execute(
+        """
+        DELETE FROM percentile_baselines a
+        USING percentile_baselines b
+        WHERE a.metric = b.metric AND a.bucket_key = b.bucket_key AND a.id < b.id
+        """
+    )
+    op.create_unique_constraint(
+        "uq_percentile_baselines_metric_bucket", "percentile_baselines", ["metric", "bucket_key"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        "uq_percentile_baselines_metric_bucket", "percentile_baselines", type_="unique"
+    )
+    op.drop_index("ix_percentile_sketches_day", table_name="percentile_sketches")
+    op.drop_table("percentile_sketches")
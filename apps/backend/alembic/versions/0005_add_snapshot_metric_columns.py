@@ -0,0 +1,110 @@
+"""typed baseline metric columns on snapshots
+
+Revision ID: 0005_add_snapshot_metric_columns
+Revises: 0004_add_percentile_sketches
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0005_add_snapshot_metric_columns"
+down_revision = "0004_add_percentile_sketches"
+branch_labels = None
+depends_on = None
+
+METRIC_COLUMNS = {
+    "spread_pct": "options->>'spread_pct'",
+    "flicker_per_sec": "options->>'flicker_per_sec'",
+    "ivr": "options->>'ivr'",
+    "vo_vol": "options->>'vo_vol'",
+    "micro_chop": "market_micro->>'microChop'",
+    "minute_thrust": "market_micro->>'minuteThrust'",
+    "divergence_z": "market_micro->>'divergenceZ'",
+    "sec_variance": "market_micro->>'secVariance'",
+}
+
+# option_bucket()/contract_metadata() as of the snapshot's own day, for rows in [start, end)
+BUCKET_SQL = r"""
+WITH parsed AS (
+    SELECT id, ticker, ts, options, contract,
+           substring(contract from '^[A-Z]+(\d{6})[CP]\d{8}') AS expiry_token,
+           substring(contract from '^[A-Z]+\d{6}([CP])\d{8}') AS type_token,
+           round(greatest(0, CAST(options->>'delta_target' AS numeric) - 0.05), 2) AS delta_floor
+    FROM (
+        SELECT id, ticker, ts, options,
+               replace(options->'contracts'->>'primary', 'O:', '') AS contract
+        FROM snapshots
+        WHERE ts >= :start AND ts < :end
+          AND jsonb_typeof(options) = 'object' AND options <> '{}'
+    ) raw
+),
+dated AS (
+    SELECT *, greatest(
+               to_date(expiry_token, 'YYMMDD') - CAST(timezone('utc', ts) AS date), 0
+           ) AS dte
+    FROM parsed
+),
+buckets AS (
+    SELECT id,
+           (CASE ticker WHEN 'SPY' THEN 'SPX' WHEN 'QQQ' THEN 'NDX' ELSE ticker END) || ':' ||
+           CASE
+               WHEN type_token = 'C' THEN 'CALL'
+               WHEN type_token = 'P' THEN 'PUT'
+               WHEN strpos(contract, 'C') > 0 THEN 'CALL'
+               WHEN strpos(contract, 'P') > 0 THEN 'PUT'
+               ELSE 'UNKNOWN'
+           END || ':' ||
+           CASE
+               WHEN delta_floor IS NULL THEN 'Delta[unknown]'
+               ELSE 'Delta[' || to_char(delta_floor, 'FM0.00') || '-'
+                   || to_char(round(least(1, delta_floor + 0.1), 2), 'FM0.00') || ']'
+           END || ':' ||
+           CASE
+               WHEN dte IS NULL THEN 'DTE[unknown]'
+               WHEN dte <= 3 THEN 'DTE[0-3]'
+               WHEN dte <= 7 THEN 'DTE[3-7]'
+               WHEN dte <= 14 THEN 'DTE[7-14]'
+               ELSE 'DTE[14+]'
+           END AS bucket_key
+    FROM dated
+)
+UPDATE snapshots s SET bucket_key = b.bucket_key FROM buckets b WHERE s.id = b.id
+"""
+
+METRICS_SQL = "UPDATE snapshots SET {} WHERE ts >= :start AND ts < :end".format(
+    ", ".join(
+        f"{column} = CAST({source} AS double precision)"
+        for column, source in METRIC_COLUMNS.items()
+    )
+)
+
+
+def upgrade() -> None:
+    op.add_column("snapshots", sa.Column("bucket_key", sa.String(length=128), nullable=True))
+    for column in METRIC_COLUMNS:
+        op.add_column("snapshots", sa.Column(column, sa.Float(), nullable=True))
+
+    # backfill a day at a time so no single statement rewrites the whole table
+    bind = op.get_bind()
+    start, end = bind.execute(sa.text("SELECT min(ts), max(ts) FROM snapshots")).one()
+    while start is not None and start <= end:
+        window = {"start": start, "end": start + timedelta(days=1)}
+        bind.execute(sa.text(METRICS_SQL), window)
+        bind.execute(sa.text(BUCKET_SQL), window)
+        start = window["end"]
+
+    op.create_index("ix_snapshots_bucket_key_ts", "snapshots", ["bucket_key", "ts"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_snapshots_bucket_key_ts", table_name="snapshots")
+    for column in reversed(list(METRIC_COLUMNS)):
+        op.drop_column("snapshots", column)
+    op.drop_column("snapshots", "bucket_key")
@@ -0,0 +1,36 @@
+"""add 1m/5m score rollups
+
+Revision ID: 0006_add_score_rollups
+Revises: 0005_add_snapshot_metric_columns
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0006_add_score_rollups"
+down_revision = "0005_add_snapshot_metric_columns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "score_rollups",
+        sa.Column("ticker", sa.String(length=16), primary_key=True),
+        sa.Column("interval", sa.String(length=4), primary_key=True),
+        sa.Column("ts", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("score_min", sa.Float(), nullable=False),
+        sa.Column("score_max", sa.Float(), nullable=False),
+        sa.Column("score_last", sa.Float(), nullable=False),
+        sa.Column("band", sa.String(length=16), nullable=False),
+        sa.Column("n", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("score_rollups")
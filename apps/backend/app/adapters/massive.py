@@ -134,6 +134,7 @@ class MassiveClient:
         # pagination disabled to avoid iterating massive payloads when we only need latest window
         self._client = RESTClient(
             api_key=settings.massive_api_key,
+            base=settings.massive_rest_url,
             pagination=False,
             num_pools=50,
             read_timeout=15.0,
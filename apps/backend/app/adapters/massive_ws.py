@@ -3,7 +3,9 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import time
 from contextlib import suppress
+from dataclasses import asdict, dataclass
 from typing import Awaitable, Callable
 
 import websockets
@@ -14,6 +16,23 @@ from app.core.settings import settings
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class WSMetrics:
+    name: str
+    connects: int = 0
+    reconnects: int = 0
+    frames: int = 0
+    events: int = 0
+    subscription_messages: int = 0
+    backoff: float = 0.0
+    connected: bool = False
+    last_error: str | None = None
+    last_frame_at: float | None = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
 def _nbbo_state(bp: float | None, ap: float | None) -> str:
     if bp is None or ap is None:
         return "unknown"
@@ -36,23 +55,29 @@ def _normalize_ts(value: int | float | str | None) -> int | None:
         return None
 
 
-async def _subscription_sender(ws, queue: asyncio.Queue[str]) -> None:
+async def _subscription_sender(
+    ws, queue: asyncio.Queue[tuple[str, str]], metrics: WSMetrics | None = None
+) -> None:
     while True:
-        params = await queue.get()
-        payload = json.dumps({"action": "subscribe", "params": params})
+        action, params = await queue.get()
+        payload = json.dumps({"action": action, "params": params})
         try:
             await ws.send(payload)
         except ConnectionClosed:
             # push back so reconnect can re-send
-            queue.put_nowait(params)
+            queue.put_nowait((action, params))
             break
+        if metrics:
+            metrics.subscription_messages += 1
 
 
 async def run_massive_ws(
     on_event: Callable[[dict], Awaitable[None]],
-    subscription_queue: asyncio.Queue[str] | None,
+    subscription_queue: asyncio.Queue[tuple[str, str]] | None,
     snapshot_subscriptions: Callable[[], list[str]] | None,
     url: str | None = None,
+    on_raw: Callable[[str | bytes], None] | None = None,
+    metrics: WSMetrics | None = None,
 ) -> None:
     """Connect to Massive WS, dispatch normalized events, and handle reconnects."""
 
@@ -61,13 +86,14 @@ async def run_massive_ws(
         raise RuntimeError("MASSIVE_API_KEY required for Massive WS streaming")
 
     stream_url = url or settings.massive_options_ws_url
+    metrics = metrics or WSMetrics(name=stream_url)
     backoff = 1
 
     while True:
         sender_task: asyncio.Task | None = None
         try:
             async with websockets.connect(stream_url, ping_interval=None) as ws:
-                logger.info("massive-ws-connected", extra={"url": stream_url})
+                logger.info("massive-ws-connected", extra={"url": stream_url, "stream": metrics.name})
                 await _wait_for_status(ws, accepted={"connected"})
                 await ws.send(json.dumps({"action": "auth", "params": api_key}))
                 await _wait_for_status(ws, accepted={"auth_success", "success", "ok"}, log_event="massive-ws-authenticated")
@@ -75,10 +101,20 @@ async def run_massive_ws(
                 if snapshot_subscriptions:
                     for params in snapshot_subscriptions():
                         await ws.send(json.dumps({"action": "subscribe", "params": params}))
+                        metrics.subscription_messages += 1
                 if subscription_queue:
-                    sender_task = asyncio.create_task(_subscription_sender(ws, subscription_queue))
+                    sender_task = asyncio.create_task(
+                        _subscription_sender(ws, subscription_queue, metrics)
+                    )
                 backoff = 1
+                metrics.connects += 1
+                metrics.connected = True
+                metrics.backoff = 0.0
                 async for raw in ws:
+                    metrics.frames += 1
+                    metrics.last_frame_at = time.time()
+                    if on_raw:
+                        on_raw(raw)
                     try:
                         payload = json.loads(raw)
                     except json.JSONDecodeError:
@@ -88,14 +124,21 @@ async def run_massive_ws(
                     for msg in batch:
                         event = _normalize_event(msg)
                         if event:
+                            metrics.events += 1
                             await on_event(event)
         except Exception as exc:  # pragma: no cover - network failure path
+            metrics.connected = False
+            metrics.reconnects += 1
+            metrics.backoff = backoff
+            metrics.last_error = str(exc)
             logger.warning(
-                "massive-ws-reconnect", extra={"error": str(exc), "backoff": backoff, "url": stream_url}
+                "massive-ws-reconnect",
+                extra={"error": str(exc), "backoff": backoff, "url": stream_url, "stream": metrics.name},
             )
             await asyncio.sleep(backoff)
             backoff = min(backoff * 2, 10)
         finally:
+            metrics.connected = False
             if sender_task:
                 sender_task.cancel()
                 with suppress(asyncio.CancelledError, ConnectionClosed):
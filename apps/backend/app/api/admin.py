@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
+from app.core.settings import settings
+from app.services.parquet_export import TABLES, export_jobs, require_pyarrow
 from app.services.state_machine import StateMachine
 
 router = APIRouter(prefix="/admin")
@@ -21,6 +25,13 @@ class OverridePayload(BaseModel):
     confirm: bool | None = None
 
 
+class ExportPayload(BaseModel):
+    start: datetime = Field(..., alias="from")
+    end: datetime = Field(..., alias="to")
+    tables: list[str] = Field(default_factory=lambda: list(TABLES))
+    tickers: list[str] | None = None
+
+
 @router.post("/policy")
 async def update_policy(payload: PolicyPayload) -> dict[str, str | dict[str, float | int]]:
     state_machine.set_policy(payload.mode, payload.overrides)
@@ -31,3 +42,31 @@ async def update_policy(payload: PolicyPayload) -> dict[str, str | dict[str, flo
 async def overrides(payload: OverridePayload) -> dict[str, str]:
     state_machine.apply_override(payload.symbol.upper(), payload.dict())
     return {"message": "override-accepted"}
+
+
+@router.post("/export", status_code=202)
+async def start_export(payload: ExportPayload) -> dict:
+    unknown = set(payload.tables) - set(TABLES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown tables: {sorted(unknown)}")
+    if payload.end <= payload.start:
+        raise HTTPException(status_code=400, detail="`to` must be after `from`")
+    try:
+        require_pyarrow()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from None
+    return export_jobs.start(
+        settings.export_root,
+        start=payload.start,
+        end=payload.end,
+        tables=payload.tables,
+        tickers=payload.tickers,
+    )
+
+
+@router.get("/export/{job_id}")
+async def export_status(job_id: str) -> dict:
+    job = export_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown export job")
+    return job
@@ -1,6 +1,12 @@
 from fastapi import APIRouter
 
-from app.services.realtime_engine import _current_subscriptions
+from app.services.realtime_engine import (
+    _current_subscriptions,
+    merge_stats,
+    subscription_manager,
+    ws_stats,
+)
+from app.services.sharding import shard_membership
 from app.services.state_store import state_store
 
 router = APIRouter()
@@ -13,4 +19,8 @@ async def stream_status():
         "subscriptions": _current_subscriptions(),
         "symbols": [s.symbol for s in states],
         "count": len(states),
+        "option_subscriptions": subscription_manager.stats(),
+        "merges": merge_stats(),
+        "streams": ws_stats(),
+        "pipeline_shard": shard_membership.stats(),
     }
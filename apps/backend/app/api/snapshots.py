@@ -1,24 +1,65 @@
 from __future__ import annotations
 
+import csv
+import json
 import logging
+import uuid
+from datetime import datetime, timedelta, timezone
 from io import StringIO
-from typing import Any
+from typing import Any, AsyncIterator
 
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import PlainTextResponse
-from sqlalchemy import Select, select
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy import Select, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.settings import settings
 from app.db.models import Snapshot
-from app.db.session import get_session_or_none
-from app.domain.types import TileState
+from app.db.session import async_session, get_session_or_none
+from app.domain.downsample import lttb
+from app.services.score_series import INTERVALS, score_series
+from app.services.sketches import METRIC_COLUMNS
+from app.services.snapshot_keyframes import forward_fill
 from app.services.state_store import state_store
-from app.services.tile_engine import build_tile
+from app.services.tile_engine import REFRESH_SECONDS, build_tile
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+HISTORY_PAGE_SIZE = 1000
+HISTORY_MAX_PAGE_SIZE = 10_000
+HISTORY_MAX_SYMBOLS = 100
+# rows per round trip on the server-side cursor
+STREAM_BATCH = 500
+SUMMARY_COLUMNS = (
+    "id",
+    "ticker",
+    "ts",
+    "regime",
+    "score",
+    "state",
+    "probability",
+    "bucket_key",
+    *METRIC_COLUMNS.values(),
+)
+
+
+def _snapshot_summary(record: Snapshot) -> dict[str, Any]:
+    summary = {
+        "id": str(record.id),
+        "ticker": record.ticker,
+        "ts": record.ts.isoformat() if record.ts else None,
+        "regime": record.regime,
+        "score": float(record.score),
+        "state": record.state,
+        "probability": (record.prob or {}).get("probability"),
+        "bucket_key": record.bucket_key,
+    }
+    for column in METRIC_COLUMNS.values():
+        summary[column] = getattr(record, column)
+    return summary
+
 
 def _snapshot_to_dict(record: Snapshot) -> dict[str, Any]:
     return {
@@ -43,10 +84,10 @@ def _snapshot_to_dict(record: Snapshot) -> dict[str, Any]:
 async def _fallback_snapshots(ticker: str | None) -> list[dict[str, Any]]:
     cached = await state_store.all_states()
     if cached:
-        return [tile.model_dump() for tile in cached if not ticker or tile.symbol == ticker.upper()]
+        return [tile.to_public() for tile in cached if not ticker or tile.symbol == ticker.upper()]
     symbol = ticker.upper() if ticker else (settings.watchlist[0] if settings.watchlist else "SPY")
     tile, _ = await build_tile(symbol)
-    return [tile.model_dump()]
+    return [tile.to_public()]
 
 
 @router.get("/snapshots/query")
@@ -82,3 +123,205 @@ async def query_snapshots(
         prob = row.get("prob", {}).get("probability") or row.get("probability_to_action", "")
         buffer.write(f"{row.get('ticker','')},{row.get('regime','')},{prob}\n")
     return PlainTextResponse(buffer.getvalue(), media_type="text/csv")
+
+
+def _cursor(record: Snapshot) -> str:
+    return f"{record.ts.isoformat()},{record.id}"
+
+
+def _parse_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        ts, row_id = cursor.rsplit(",", 1)
+        return _aware(datetime.fromisoformat(ts)), uuid.UUID(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+def _aware(ts: datetime) -> datetime:
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+async def _downsampled_ids(
+    session: AsyncSession, stmt: Select, points: int
+) -> list[uuid.UUID]:
+    """LTTB on score per symbol, reading only (ticker, ts, id, score) for the range."""
+
+    series: dict[str, list[tuple[float, float, uuid.UUID]]] = {}
+    key_stmt = stmt.with_only_columns(Snapshot.ticker, Snapshot.ts, Snapshot.id, Snapshot.score)
+    result = await session.stream(key_stmt.execution_options(yield_per=STREAM_BATCH * 10))
+    async for ticker, ts, row_id, score in result:
+        series.setdefault(ticker, []).append((_aware(ts).timestamp(), float(score), row_id))
+    keep: list[tuple[float, uuid.UUID]] = []
+    for rows in series.values():
+        x = np.fromiter((row[0] for row in rows), dtype=np.float64, count=len(rows))
+        y = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+        keep.extend((rows[i][0], rows[i][2]) for i in lttb(x, y, points).tolist())
+    # chunks are fetched in order, so the merged output stays (ts, id) ordered
+    return [row_id for _, row_id in sorted(keep)]
+
+
+class _HistoryRows:
+    """Snapshots in (ts, id) order off a server-side cursor. Once iteration ends,
+    ``next_cursor`` holds the cursor to resume from when ``limit`` cut the range short."""
+
+    def __init__(self, stmt: Select, limit: int | None, points: int | None) -> None:
+        self.stmt, self.limit, self.points = stmt, limit, points
+        self.next_cursor: str | None = None
+
+    async def __aiter__(self) -> AsyncIterator[Snapshot]:
+        stmt, limit = self.stmt, self.limit
+        async with async_session() as session:
+            if self.points:
+                keep = await _downsampled_ids(session, stmt, self.points)
+                stmt = select(Snapshot).order_by(Snapshot.ts, Snapshot.id)
+                for start in range(0, len(keep), STREAM_BATCH):
+                    chunk = stmt.where(Snapshot.id.in_(keep[start : start + STREAM_BATCH]))
+                    for record in (await session.execute(chunk)).scalars():
+                        yield record
+                return
+            if limit is not None:
+                stmt = stmt.limit(limit + 1)
+            result = await session.stream_scalars(stmt.execution_options(yield_per=STREAM_BATCH))
+            sent, last = 0, None
+            async for record in result:
+                if limit is not None and sent == limit:
+                    self.next_cursor = last
+                    return
+                sent += 1
+                last = _cursor(record)
+                yield record
+
+
+@router.get("/snapshots/history")
+async def snapshot_history(
+    symbols: str = Query(..., description="Comma-separated tickers"),
+    start: datetime = Query(..., alias="from"),
+    end: datetime | None = Query(default=None, alias="to"),
+    cursor: str | None = Query(default=None, description="`<ts>,<id>` of the last row seen"),
+    limit: int | None = Query(default=None, ge=1),
+    points: int | None = Query(default=None, ge=3, description="LTTB-downsample score per symbol"),
+    fields: str = Query(default="summary", pattern="^(summary|full)$"),
+    format: str = Query(default="json", pattern="^(json|ndjson|csv)$"),
+):
+    """Snapshot history for ``symbols`` in [from, to), oldest first.
+
+    ``json`` returns one page (``limit``, default 1000) plus ``next_cursor``; ``ndjson`` and ``csv``
+    stream the whole range unless ``limit`` is given, straight from a server-side cursor.
+    ``ndjson`` ends with a ``{"next_cursor": ...}`` line when ``limit`` cut it short; CSV clients
+    resume from the ``ts,id`` of their last row. ``points`` returns at most that many rows per
+    symbol, picked by LTTB on score, and ignores ``limit``.
+    """
+
+    tickers = list(dict.fromkeys(t.strip().upper() for t in symbols.split(",") if t.strip()))
+    if not tickers or len(tickers) > HISTORY_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"1-{HISTORY_MAX_SYMBOLS} symbols required")
+    start, end = _aware(start), _aware(end or datetime.now(timezone.utc))
+    if end <= start:
+        raise HTTPException(status_code=400, detail="`to` must be after `from`")
+    stmt = (
+        select(Snapshot)
+        .where(Snapshot.ticker.in_(tickers), Snapshot.ts >= start, Snapshot.ts < end)
+        .order_by(Snapshot.ts, Snapshot.id)
+    )
+    if cursor:
+        stmt = stmt.where(tuple_(Snapshot.ts, Snapshot.id) > tuple_(*_parse_cursor(cursor)))
+    if format == "json":
+        limit = min(limit or HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE)
+    to_dict = _snapshot_to_dict if fields == "full" else _snapshot_summary
+    rows = _HistoryRows(stmt, limit, points)
+
+    if format == "json":
+        page = [to_dict(row) async for row in rows]
+        return {"snapshots": page, "next_cursor": rows.next_cursor}
+
+    if format == "ndjson":
+
+        async def ndjson() -> AsyncIterator[str]:
+            async for row in rows:
+                yield json.dumps(to_dict(row), default=str) + "\n"
+            if rows.next_cursor is not None:
+                yield json.dumps({"next_cursor": rows.next_cursor}) + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    async def csv_lines() -> AsyncIterator[str]:
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(SUMMARY_COLUMNS)
+        async for row in rows:
+            summary = _snapshot_summary(row)
+            writer.writerow(["" if summary[c] is None else summary[c] for c in SUMMARY_COLUMNS])
+            if buffer.tell() >= 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return StreamingResponse(csv_lines(), media_type="text/csv")
+
+
+@router.get("/snapshots/rollups")
+async def snapshot_rollups(
+    symbols: str = Query(..., description="Comma-separated tickers"),
+    start: datetime = Query(..., alias="from"),
+    end: datetime | None = Query(default=None, alias="to"),
+    interval: str = Query(default="1m", pattern="^(1m|5m)$"),
+) -> dict[str, Any]:
+    """Precomputed score min/max/last per ``interval`` bucket starting in [from, to)."""
+
+    tickers = list(dict.fromkeys(t.strip().upper() for t in symbols.split(",") if t.strip()))
+    if not tickers or len(tickers) > HISTORY_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"1-{HISTORY_MAX_SYMBOLS} symbols required")
+    start, end = _aware(start), _aware(end or datetime.now(timezone.utc))
+    if end <= start:
+        raise HTTPException(status_code=400, detail="`to` must be after `from`")
+    series = await score_series.rollups(tickers, interval, start, end)
+    return {
+        "interval": interval,
+        "seconds": INTERVALS[interval],
+        "series": {ticker: series.get(ticker, []) for ticker in tickers},
+    }
+
+
+@router.get("/snapshots/series")
+async def snapshot_series(
+    symbol: str,
+    start: datetime = Query(..., alias="from"),
+    end: datetime | None = Query(default=None, alias="to"),
+    step: int = Query(default=REFRESH_SECONDS, ge=1, description="Grid spacing in seconds"),
+) -> dict[str, Any]:
+    """Summary series for ``symbol`` on a ``step`` grid over [from, to), rebuilt from the rows
+    written on material changes and keyframes.
+
+    Each point repeats the last row stored at or before it (its ``ts`` is kept as ``source_ts``);
+    points with no row within one keyframe interval plus a refresh are left out.
+    """
+
+    start, end = _aware(start), _aware(end or datetime.now(timezone.utc))
+    if end <= start:
+        raise HTTPException(status_code=400, detail="`to` must be after `from`")
+    if (end - start).total_seconds() / step > HISTORY_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {HISTORY_MAX_PAGE_SIZE} points")
+    ticker = symbol.upper()
+    max_gap = timedelta(seconds=settings.snapshot_keyframe_seconds + REFRESH_SECONDS)
+    head = (
+        select(Snapshot)
+        .where(Snapshot.ticker == ticker, Snapshot.ts < start, Snapshot.ts >= start - max_gap)
+        .order_by(Snapshot.ts.desc(), Snapshot.id.desc())
+        .limit(1)
+    )
+    body = (
+        select(Snapshot)
+        .where(Snapshot.ticker == ticker, Snapshot.ts >= start, Snapshot.ts < end)
+        .order_by(Snapshot.ts, Snapshot.id)
+    )
+    async with async_session() as session:
+        rows = [*(await session.execute(head)).scalars(), *(await session.execute(body)).scalars()]
+    points = []
+    filled = forward_fill(
+        rows, [_aware(row.ts) for row in rows], start, end, timedelta(seconds=step), max_gap
+    )
+    for ts, row in filled:
+        summary = _snapshot_summary(row)
+        points.append({**summary, "ts": ts.isoformat(), "source_ts": summary["ts"]})
+    return {"symbol": ticker, "step": step, "points": points}
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Body, HTTPException
+from fastapi import APIRouter, Body, HTTPException, Response
 from pydantic import BaseModel
 
 from app.domain.types import TileState
 from app.services.state_store import state_store
 from app.services.tile_engine import refresh_symbol
 from app.services.watchlist import watchlist_service
+from app.ws.projection import tile_payloads
 
 router = APIRouter()
 
@@ -30,18 +31,18 @@ async def add_ticker(payload: TickerIn = Body(...)) -> dict[str, list[str]]:
 @router.delete("/tickers/{symbol}")
 async def remove_ticker(symbol: str) -> dict[str, list[str]]:
     tickers = await watchlist_service.remove(symbol)
+    await state_store.remove_state(symbol.upper())
+    tile_payloads.discard(symbol.upper())
     return {"tickers": tickers}
 
 
-@router.get("/tickers/{symbol}/state")
-async def get_symbol_state(symbol: str) -> TileState:
+@router.get("/tickers/{symbol}/state", response_model=TileState)
+async def get_symbol_state(symbol: str) -> Response:
     symbol = symbol.upper()
-    if symbol not in await watchlist_service.list():
+    if not await watchlist_service.contains(symbol):
         raise HTTPException(status_code=404, detail="Unknown symbol")
 
-    cached = await state_store.get_state(symbol)
-    if cached:
-        return cached
-
-    tile = await refresh_symbol(symbol)
-    return tile
+    tile = await state_store.get_state(symbol) or await refresh_symbol(symbol)
+    # Same bytes the WS stream sends for this tile version; skips response_model re-validation.
+    body = tile_payloads.fragment(symbol, tile.version, tile)
+    return Response(content=body, media_type="application/json")
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+from typing import Any
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
-from app.core.settings import settings
-from app.domain.what_if import evaluate_what_if
+from app.domain.what_if import WhatIfBase, evaluate_what_if, sweep_what_if
+from app.services.state_store import state_store
+from app.services.tile_engine import refresh_symbol
+from app.services.watchlist import watchlist_service
 
 router = APIRouter()
 
@@ -14,16 +18,43 @@ class WhatIfPayload(BaseModel):
     deltas: dict[str, float | bool]
 
 
+class WhatIfGridPayload(BaseModel):
+    ticker: str = Field(..., min_length=1)
+    grid: dict[str, list[float | bool]]
+
+
+async def _live_base(ticker: str) -> WhatIfBase:
+    if not await watchlist_service.contains(ticker):
+        raise HTTPException(status_code=404, detail="Unknown symbol")
+    tile = await state_store.get_state(ticker) or await refresh_symbol(ticker)
+    return WhatIfBase.from_tile(tile)
+
+
 @router.post("/what-if")
 async def run_what_if(payload: WhatIfPayload) -> dict[str, float | str | None]:
     ticker = payload.ticker.upper()
-    if ticker not in settings.watchlist:
-        raise HTTPException(status_code=404, detail="Unknown symbol")
-
-    result = evaluate_what_if(ticker, payload.deltas)
+    result = evaluate_what_if(ticker, payload.deltas, await _live_base(ticker))
     return {
         "symbol": ticker,
         "revisedProbToAction": result.probability,
         "revisedBand": result.band.label,
         "revisedETAsec": result.eta_seconds,
     }
+
+
+@router.post("/what-if/grid")
+async def run_what_if_grid(payload: WhatIfGridPayload) -> dict[str, Any]:
+    """Probability/band surface over every combination of the grid values."""
+
+    ticker = payload.ticker.upper()
+    base = await _live_base(ticker)
+    try:
+        surface = sweep_what_if(base, payload.grid)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    current = evaluate_what_if(ticker, {}, base)
+    return {
+        "symbol": ticker,
+        "base": {"probToAction": current.probability, "band": current.band.label},
+        **surface,
+    }
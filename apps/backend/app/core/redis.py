@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from redis.asyncio import Redis
+
+from app.core.settings import settings
+
+_client: Redis | None = None
+
+
+def get_redis() -> Redis:
+    global _client
+    if _client is None:
+        _client = Redis.from_url(settings.redis_url)
+    return _client
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from functools import lru_cache
-from typing import List
+from typing import List, Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -17,12 +17,19 @@ class Settings(BaseSettings):
     massive_connect_timeout: float = Field(default=6.0, validation_alias="MASSIVE_CONNECT_TIMEOUT")
     massive_read_timeout: float = Field(default=15.0, validation_alias="MASSIVE_READ_TIMEOUT")
     massive_pool_size: int = Field(default=8, validation_alias="MASSIVE_POOL_SIZE")
+    massive_rest_url: str = Field(
+        default="https://api.massive.com", validation_alias="MASSIVE_REST_URL"
+    )
     massive_options_ws_url: str = Field(
         default="wss://socket.massive.com/options", validation_alias="MASSIVE_OPTIONS_WS_URL"
     )
     massive_index_ws_url: str = Field(
         default="wss://socket.massive.com/stocks", validation_alias="MASSIVE_INDEX_WS_URL"
     )
+    massive_subscription_batch_size: int = Field(
+        default=50, validation_alias="MASSIVE_SUBSCRIPTION_BATCH_SIZE"
+    )
+    massive_options_ws_shards: int = Field(default=1, validation_alias="MASSIVE_OPTIONS_WS_SHARDS")
     discord_webhook_url: str | None = Field(default=None, validation_alias="DISCORD_WEBHOOK_URL")
     frontend_origin: str = Field(
         default="https://kcu-ui-production.up.railway.app", validation_alias="FRONTEND_ORIGIN"
@@ -33,6 +40,27 @@ class Settings(BaseSettings):
         default="SPY,AAPL,MSFT,NVDA,QQQ,TSLA,AMZN,GOOGL", validation_alias="WATCHLIST"
     )
     options_data_enabled: bool = Field(default=True, validation_alias="OPTIONS_DATA_ENABLED")
+    realtime_merge_interval_ms: int = Field(
+        default=150, validation_alias="REALTIME_MERGE_INTERVAL_MS"
+    )
+    realtime_record_path: str | None = Field(default=None, validation_alias="REALTIME_RECORD_PATH")
+    realtime_record_raw: bool = Field(default=False, validation_alias="REALTIME_RECORD_RAW")
+    state_backend: Literal["memory", "redis"] = Field(
+        default="memory", validation_alias="STATE_BACKEND"
+    )
+    run_pipeline: bool = Field(default=True, validation_alias="RUN_PIPELINE")
+    ws_compress_min_bytes: int = Field(default=1024, validation_alias="WS_COMPRESS_MIN_BYTES")
+    ws_compress_level: int = Field(default=6, validation_alias="WS_COMPRESS_LEVEL")
+    baseline_builder: Literal["sketch", "postgres"] = Field(
+        default="sketch", validation_alias="BASELINE_BUILDER"
+    )
+    export_root: str = Field(default="exports", validation_alias="EXPORT_ROOT")
+    snapshot_keyframe_seconds: int = Field(
+        default=300, validation_alias="SNAPSHOT_KEYFRAME_SECONDS"
+    )
+    snapshot_probability_step: float = Field(
+        default=0.02, validation_alias="SNAPSHOT_PROBABILITY_STEP"
+    )
 
     class Config:
         env_file = ".env"
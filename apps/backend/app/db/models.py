@@ -3,7 +3,20 @@ from __future__ import annotations
 from datetime import date, datetime
 import uuid
 
-from sqlalchemy import BigInteger, Column, Date, DateTime, Float, ForeignKey, Numeric, String
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    Numeric,
+    String,
+    UniqueConstraint,
+)
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -74,6 +87,21 @@ class Snapshot(Base):
     state: Mapped[str] = mapped_column(String(32))
     rationale: Mapped[dict] = mapped_column(JSONB)
     market_micro: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # typed copies of the baseline inputs, filled at write time (see sketches.snapshot_columns)
+    bucket_key: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    spread_pct: Mapped[float | None] = mapped_column(Float, nullable=True)
+    flicker_per_sec: Mapped[float | None] = mapped_column(Float, nullable=True)
+    ivr: Mapped[float | None] = mapped_column(Float, nullable=True)
+    vo_vol: Mapped[float | None] = mapped_column(Float, nullable=True)
+    micro_chop: Mapped[float | None] = mapped_column(Float, nullable=True)
+    minute_thrust: Mapped[float | None] = mapped_column(Float, nullable=True)
+    divergence_z: Mapped[float | None] = mapped_column(Float, nullable=True)
+    sec_variance: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    __table_args__ = (
+        Index("ix_snapshots_bucket_key_ts", "bucket_key", "ts"),
+        Index("ix_snapshots_ticker_ts", "ticker", "ts"),
+    )
 
 
 class PercentileBaseline(Base):
@@ -87,3 +115,36 @@ class PercentileBaseline(Base):
     p90: Mapped[float] = mapped_column(Float)
     p95: Mapped[float] = mapped_column(Float)
     asof: Mapped[date] = mapped_column(Date, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("metric", "bucket_key", name="uq_percentile_baselines_metric_bucket"),
+    )
+
+
+class PercentileSketch(Base):
+    """One process's KLL sketch of a metric within a bucket for one UTC day."""
+
+    __tablename__ = "percentile_sketches"
+
+    metric: Mapped[str] = mapped_column(String(64), primary_key=True)
+    bucket_key: Mapped[str] = mapped_column(String(128), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True, index=True)
+    source: Mapped[str] = mapped_column(String(64), primary_key=True)
+    n: Mapped[int] = mapped_column(BigInteger)
+    sketch: Mapped[bytes] = mapped_column(LargeBinary)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+class ScoreRollup(Base):
+    """min/max/last of a symbol's score (probability x 100) over one 1m or 5m bucket."""
+
+    __tablename__ = "score_rollups"
+
+    ticker: Mapped[str] = mapped_column(String(16), primary_key=True)
+    interval: Mapped[str] = mapped_column(String(4), primary_key=True)
+    ts: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    score_min: Mapped[float] = mapped_column(Float)
+    score_max: Mapped[float] = mapped_column(Float)
+    score_last: Mapped[float] = mapped_column(Float)
+    band: Mapped[str] = mapped_column(String(16))
+    n: Mapped[int] = mapped_column(Integer)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import math
+import random
+import struct
+from typing import Iterable, Sequence
+
+import numpy as np
+
+_HEADER = struct.Struct("<BHQB")  # format version, k, n, levels
+_FORMAT = 1
+
+
+class KLLSketch:
+    """Mergeable streaming quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Keeps O(k) values no matter how many are added; rank error is roughly 1.7/k of n (about
+    1% at the default k=200). Sketches built on different days or processes merge into one
+    that answers for the union of their inputs.
+    """
+
+    def __init__(self, k: int = 200, seed: int | None = None) -> None:
+        self.k = k
+        self.n = 0
+        self._levels: list[list[float]] = [[]]
+        self._size = 0
+        self._max_size = self._capacity(0)
+        self._rng = random.Random(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _grow(self) -> None:
+        self._levels.append([])
+        self._max_size = sum(self._capacity(level) for level in range(len(self._levels)))
+
+    def update(self, value: float) -> None:
+        self._levels[0].append(float(value))
+        self.n += 1
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.update(value)
+
+    def merge(self, other: "KLLSketch") -> None:
+        while len(self._levels) < len(other._levels):
+            self._grow()
+        for level, items in enumerate(other._levels):
+            self._levels[level].extend(items)
+        self.n += other.n
+        self._size = sum(len(items) for items in self._levels)
+        while self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self) -> None:
+        for level in range(len(self._levels)):
+            items = self._levels[level]
+            if len(items) < self._capacity(level):
+                continue
+            if level + 1 == len(self._levels):
+                self._grow()
+            items.sort()
+            # promote every other value (random parity); an odd one out stays behind
+            leftover = [items.pop()] if len(items) % 2 else []
+            self._levels[level + 1].extend(items[self._rng.randint(0, 1) :: 2])
+            self._levels[level] = leftover
+            self._size = sum(len(items) for items in self._levels)
+            return
+
+    def quantiles(self, qs: Sequence[float]) -> list[float]:
+        if self.n == 0:
+            return [math.nan] * len(qs)
+        values = np.concatenate([np.asarray(items, dtype=np.float64) for items in self._levels])
+        weights = np.concatenate(
+            [
+                np.full(len(items), 2**level, dtype=np.float64)
+                for level, items in enumerate(self._levels)
+            ]
+        )
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        targets = np.asarray(qs, dtype=np.float64) * cumulative[-1]
+        index = np.minimum(np.searchsorted(cumulative, targets, side="left"), len(order) - 1)
+        return values[order][index].tolist()
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+    def to_bytes(self) -> bytes:
+        sizes = [len(items) for items in self._levels]
+        header = _HEADER.pack(_FORMAT, self.k, self.n, len(sizes))
+        body = np.concatenate([np.asarray(items, dtype="<f8") for items in self._levels])
+        return header + np.asarray(sizes, dtype="<u4").tobytes() + body.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "KLLSketch":
+        version, k, n, count = _HEADER.unpack_from(data)
+        if version != _FORMAT:
+            raise ValueError(f"unsupported sketch format {version}")
+        offset = _HEADER.size
+        sizes = np.frombuffer(data, dtype="<u4", count=count, offset=offset).tolist()
+        values = np.frombuffer(data, dtype="<f8", offset=offset + 4 * count).tolist()
+        sketch = cls(k=k)
+        sketch._levels = []
+        for size in sizes:
+            sketch._levels.append(values[:size])
+            values = values[size:]
+        sketch.n = n
+        sketch._size = sum(sizes)
+        sketch._max_size = sum(sketch._capacity(level) for level in range(len(sketch._levels)))
+        return sketch
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Mapping
 
+import numpy as np
 from sklearn.isotonic import IsotonicRegression
 
 from app.domain.types import ProbabilityBand
@@ -16,12 +18,29 @@ DEFAULT_WEIGHTS = {
 }
 
 
-def _calibrate(value: float) -> float:
+@lru_cache(maxsize=1)
+def _calibration_curve() -> tuple[np.ndarray, np.ndarray]:
     grid = [0, 0.3, 0.5, 0.7, 1]
     targets = [0.05, 0.25, 0.5, 0.75, 0.95]
     reg = IsotonicRegression(y_min=0.05, y_max=0.99, increasing=True)
     reg.fit(grid, targets)
-    return float(reg.predict([value])[0])
+    return reg.X_thresholds_, reg.y_thresholds_
+
+
+def _calibrate(value: float) -> float:
+    # the fit never changes: interpolate its thresholds like IsotonicRegression.predict
+    # (NaN outside the grid, its default out_of_bounds) instead of refitting per call
+    x, y = _calibration_curve()
+    if not x[0] <= value <= x[-1]:
+        return float("nan")
+    return float(np.interp(value, x, y))
+
+
+def calibrate_many(values: np.ndarray) -> np.ndarray:
+    x, y = _calibration_curve()
+    values = np.asarray(values, dtype=np.float64)
+    out = np.interp(values, x, y)
+    return np.where((values < x[0]) | (values > x[-1]), np.nan, out)
 
 
 def aggregate_probability(contributions: Dict[str, float], penalties: Dict[str, float], bonuses: Dict[str, float]) -> tuple[float, ProbabilityBand]:
@@ -37,3 +56,27 @@ def aggregate_probability(contributions: Dict[str, float], penalties: Dict[str,
     band = ProbabilityBand.from_score(adj)
     probability = round(adj / 100, 2)
     return probability, band
+
+
+def aggregate_probability_many(
+    contributions: Mapping[str, float | np.ndarray], adjustment: float | np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """``aggregate_probability`` over arrays: each contribution is a scalar or one value per
+    row, ``adjustment`` is that row's bonuses + penalties. Returns (probability, score)."""
+
+    total_weight = sum(DEFAULT_WEIGHTS.values())
+    weighted = sum(
+        np.asarray(score, dtype=np.float64) * DEFAULT_WEIGHTS.get(bucket, 5)
+        for bucket, score in contributions.items()
+    )
+    score = np.clip(calibrate_many(weighted / total_weight) * 100 + adjustment, 0, 99)
+    return np.round(score / 100, 2), score
+
+
+BAND_LABELS = np.array(["Loading", "Armed", "EntryReady"])
+
+
+def band_labels(scores: np.ndarray) -> np.ndarray:
+    # ProbabilityBand.from_score thresholds: >= 70 Armed, >= 80 EntryReady
+    scores = np.asarray(scores)
+    return BAND_LABELS[(scores >= 70).astype(np.int64) + (scores >= 80)]
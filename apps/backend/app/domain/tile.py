@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import copy
+import math
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from app.domain.types import ProbabilityBand, TileState
+
+BAR_COLUMNS = ("o", "h", "l", "c", "v")
+TOP_CONTRACT_FIELDS = (
+    "contract",
+    "ticker",
+    "expiry",
+    "strike",
+    "type",
+    "bid",
+    "ask",
+    "mid",
+    "delta",
+    "oi",
+    "spread_quality",
+)
+
+
+def _empty_series() -> np.ndarray:
+    return np.empty(0, dtype=np.float64)
+
+
+def _empty_bars() -> np.ndarray:
+    return np.empty((0, len(BAR_COLUMNS)), dtype=np.float64)
+
+
+def _floats(values: dict[str, Any]) -> dict[str, float]:
+    return {key: float(value) for key, value in values.items()}
+
+
+def _float_or_none(value: Any) -> float | None:
+    if value is None:
+        return None
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+@dataclass(slots=True)
+class Tile:
+    """Internal tile: plain containers plus float64 arrays for bars and indicators.
+
+    ``to_public`` builds exactly what ``TileState.model_dump()`` would, so HTTP/WS payloads are
+    unchanged while the hot paths skip Pydantic validation. Stored tiles are treated as immutable;
+    use ``copy()`` and reassign fields to update one.
+    """
+
+    symbol: str
+    regime: str
+    probability_to_action: float
+    band: ProbabilityBand
+    confidence: dict[str, float]
+    breakdown: list[dict[str, Any]]
+    options: dict[str, Any]
+    rationale: dict[str, list[str]]
+    admin: dict[str, Any]
+    timestamps: dict[str, str]
+    penalties: dict[str, float]
+    bonuses: dict[str, float]
+    history: list[dict[str, Any]]
+    eta_seconds: int | None = None
+    grade: str = "C"
+    confidence_score: int = 0
+    delta_to_entry: dict[str, Any] | None = None
+    key_level_label: str | None = None
+    bars: np.ndarray = field(default_factory=_empty_bars)  # rows of o, h, l, c, v; NaN = missing
+    bar_times: list[str | None] = field(default_factory=list)
+    ema8: np.ndarray = field(default_factory=_empty_series)
+    ema21: np.ndarray = field(default_factory=_empty_series)
+    vwap: np.ndarray = field(default_factory=_empty_series)
+    key_levels: list[dict[str, Any]] = field(default_factory=list)
+    patience_candle: bool = False
+    options_top3: list[dict[str, Any]] = field(default_factory=list)
+    version: int = 0  # assigned by the state store on write; not part of the public payload
+
+    def copy(self) -> "Tile":
+        return copy.copy(self)
+
+    def public_bars(self) -> list[dict[str, Any]]:
+        rows = self.bars.tolist()
+        return [
+            {
+                "o": None if o != o else o,
+                "h": None if h != h else h,
+                "l": None if l != l else l,
+                "c": None if c != c else c,
+                "v": None if v != v else v,
+                "t": t,
+            }
+            for (o, h, l, c, v), t in zip(rows, self.bar_times)
+        ]
+
+    def to_public(self) -> dict[str, Any]:
+        """Public ``TileState`` shape; nested containers are shared, so do not mutate the result."""
+
+        band = self.band
+        return {
+            "symbol": self.symbol,
+            "regime": self.regime,
+            "probability_to_action": float(self.probability_to_action),
+            "band": {
+                "label": band.label,
+                "min_score": float(band.min_score),
+                "max_score": float(band.max_score),
+            },
+            "confidence": _floats(self.confidence),
+            "breakdown": self.breakdown,
+            "options": self.options,
+            "rationale": self.rationale,
+            "admin": self.admin,
+            "timestamps": self.timestamps,
+            "eta_seconds": self.eta_seconds,
+            "penalties": _floats(self.penalties),
+            "bonuses": _floats(self.bonuses),
+            "history": self.history,
+            "grade": self.grade,
+            "confidence_score": self.confidence_score,
+            "delta_to_entry": None if self.delta_to_entry is None else dict(self.delta_to_entry),
+            "key_level_label": self.key_level_label,
+            "bars": self.public_bars(),
+            "ema8": self.ema8.tolist(),
+            "ema21": self.ema21.tolist(),
+            "vwap": self.vwap.tolist(),
+            "key_levels": [
+                {"label": lvl["label"], "price": float(lvl["price"])} for lvl in self.key_levels
+            ],
+            "patience_candle": self.patience_candle,
+            "options_top3": [dict(contract) for contract in self.options_top3],
+        }
+
+    @classmethod
+    def from_public(cls, data: dict[str, Any]) -> "Tile":
+        """Rebuild from a ``to_public``/``model_dump`` dict (e.g. a tile read back from Redis)."""
+
+        bars = data.get("bars") or []
+        band = data["band"]
+        return cls(
+            symbol=data["symbol"],
+            regime=data["regime"],
+            probability_to_action=data["probability_to_action"],
+            band=band if isinstance(band, ProbabilityBand) else ProbabilityBand(**band),
+            confidence=data["confidence"],
+            breakdown=data["breakdown"],
+            options=data["options"],
+            rationale=data["rationale"],
+            admin=data["admin"],
+            timestamps=data["timestamps"],
+            penalties=data["penalties"],
+            bonuses=data["bonuses"],
+            history=data["history"],
+            eta_seconds=data.get("eta_seconds"),
+            grade=data.get("grade", "C"),
+            confidence_score=data.get("confidence_score", 0),
+            delta_to_entry=data.get("delta_to_entry"),
+            key_level_label=data.get("key_level_label"),
+            bars=bars_array(bars),
+            bar_times=[bar.get("t") for bar in bars],
+            ema8=np.asarray(data.get("ema8") or [], dtype=np.float64),
+            ema21=np.asarray(data.get("ema21") or [], dtype=np.float64),
+            vwap=np.asarray(data.get("vwap") or [], dtype=np.float64),
+            key_levels=list(data.get("key_levels") or []),
+            patience_candle=data.get("patience_candle", False),
+            options_top3=list(data.get("options_top3") or []),
+        )
+
+    @classmethod
+    def from_state(cls, state: TileState) -> "Tile":
+        return cls.from_public(state.model_dump())
+
+    def to_state(self) -> TileState:
+        return TileState.model_validate(self.to_public())
+
+
+def bars_array(bars: list[dict[str, Any]]) -> np.ndarray:
+    if not bars:
+        return _empty_bars()
+    return np.array(
+        [[_nan_if_none(bar.get(column)) for column in BAR_COLUMNS] for bar in bars],
+        dtype=np.float64,
+    )
+
+
+def _nan_if_none(value: Any) -> float:
+    return math.nan if value is None else float(value)
+
+
+def top_contract(**values: Any) -> dict[str, Any]:
+    """An ``OptionTopContract``-shaped dict with the schema's key order and numeric types."""
+
+    contract = {name: values.get(name) for name in TOP_CONTRACT_FIELDS}
+    for name in ("strike", "bid", "ask", "mid", "delta"):
+        contract[name] = _float_or_none(contract[name])
+    return contract
+
+
+def as_tile(state: Tile | TileState) -> Tile:
+    return state if isinstance(state, Tile) else Tile.from_state(state)
@@ -1,30 +1,137 @@
 from __future__ import annotations
 
-from app.domain.scoring.probability import aggregate_probability
+from dataclasses import dataclass, field
+from math import prod
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+from app.domain.scoring.probability import aggregate_probability_many, band_labels
 from app.domain.templates import get_template
 from app.domain.types import ProbabilityBand, WhatIfResult
 
+# sweepable inputs, in surface axis order
+GRID_DIMENSIONS = ("spreadShrinksTo", "orbRetestConfirms", "ivChange", "microChop", "divergenceZ")
+MAX_GRID_POINTS = 100_000
+# _merge_realtime: rank-discount for the blended micro signals, and the bonuses it decays
+MICRO_ALPHA = 0.55
+DECAYING_BONUSES = ("king_queen", "orb_retest")
+
+
+@dataclass
+class WhatIfBase:
+    """The scoring state a scenario starts from; ``from_tile`` takes a symbol's live tile."""
+
+    contributions: dict[str, float] = field(
+        default_factory=lambda: {
+            "TrendStack": 0.75,
+            "Levels": 0.65,
+            "Patience": 0.6,
+            "ORB": 0.55,
+            "Market": 0.7,
+            "Options": 0.5,
+        }
+    )
+    penalties: dict[str, float] = field(default_factory=lambda: {"chop": -7})
+    bonuses: dict[str, float] = field(default_factory=lambda: {"king_queen": 8})
+    market_micro: dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_tile(cls, tile: Any) -> WhatIfBase:
+        return cls(
+            contributions={item["name"]: float(item["score"]) for item in tile.breakdown},
+            penalties=dict(tile.penalties or {}),
+            bonuses=dict(tile.bonuses or {}),
+            market_micro=dict((tile.admin or {}).get("marketMicro") or {}),
+        )
+
+
+def _score(base: WhatIfBase, values: Mapping[str, np.ndarray], size: int):
+    """Score ``size`` scenarios at once. A swept input replaces the penalty/bonus it drives;
+    the live rules are those of _calculate_penalties/_calculate_bonuses (spread) and of the
+    next _merge_realtime carrying the swept micro values (Market blend, chop/divergence)."""
 
-def evaluate_what_if(ticker: str, deltas: dict[str, float | bool]) -> WhatIfResult:
-    contributions = {
-        "TrendStack": 0.75,
-        "Levels": 0.65,
-        "Patience": 0.6,
-        "ORB": 0.55,
-        "Market": 0.7,
-        "Options": 0.5,
+    contributions: dict[str, Any] = dict(base.contributions)
+    penalties, bonuses = dict(base.penalties), dict(base.bonuses)
+    adjustment = np.zeros(size)
+    if "spreadShrinksTo" in values:
+        spread = values["spreadShrinksTo"]
+        penalties.pop("spread", None)
+        bonuses.pop("liquidity", None)
+        adjustment -= np.where(spread > 8, np.minimum(spread, 15), 0)
+        adjustment += np.where((spread > 0) & (spread < 4), 4, 0)
+    if "ivChange" in values:
+        bonuses.pop("iv_relief", None)
+        adjustment += np.where(values["ivChange"] < 0, 2, 0)
+    decaying = {name: np.full(size, float(bonuses.pop(name, 0))) for name in DECAYING_BONUSES}
+    if "orbRetestConfirms" in values:
+        decaying["orb_retest"] = np.where(values["orbRetestConfirms"] > 0, 5.0, 0.0)
+
+    if "microChop" in values or "divergenceZ" in values:
+        micro = base.market_micro
+        thrust = float(micro.get("minuteThrust") or 0)
+        chop = values.get("microChop", np.full(size, float(micro.get("microChop") or 0)))
+        divergence = np.abs(
+            values.get("divergenceZ", np.full(size, float(micro.get("divergenceZ") or 0)))
+        )
+        signals = [np.full(size, max(0.0, thrust)), np.maximum(0, 1 - chop)]
+        signals.append(np.maximum(0, 1 - np.minimum(1, divergence / 1.5)))
+        ranked = -np.sort(-np.vstack(signals), axis=0)
+        weights = 1 / (1 + MICRO_ALPHA * np.arange(len(signals)))
+        target = (ranked * weights[:, None]).sum(axis=0) / len(signals)
+        market = contributions.get("Market", 0.5)
+        contributions["Market"] = np.clip(0.6 * market + 0.4 * target, 0, 1)
+        penalties.pop("chop", None)
+        penalties.pop("divergence", None)
+        adjustment += np.where(chop >= 0.6, -8, 0) + np.where(divergence >= 1.5, -6, 0)
+        intact = (thrust > 0) & (divergence <= 0.7)
+        for name, bonus in decaying.items():
+            decaying[name] = np.where(intact, bonus, np.floor(bonus * 0.6))
+
+    adjustment += sum(penalties.values()) + sum(bonuses.values()) + sum(decaying.values())
+    return aggregate_probability_many(contributions, adjustment)
+
+
+def sweep_what_if(base: WhatIfBase, grid: Mapping[str, Sequence[float | bool]]) -> dict[str, Any]:
+    """Score every combination of ``grid`` values in one vectorized pass.
+
+    ``probability`` and ``band`` are flattened row-major over ``shape`` (axes in
+    ``dimensions`` order); the first combination is ``probability[0]``.
+    """
+
+    unknown = sorted(set(grid) - set(GRID_DIMENSIONS))
+    if unknown:
+        raise ValueError(f"Unknown what-if inputs: {', '.join(unknown)}")
+    dimensions = [name for name in GRID_DIMENSIONS if name in grid]
+    shape = [len(grid[name]) for name in dimensions]
+    size = prod(shape)
+    if not size or size > MAX_GRID_POINTS:
+        raise ValueError(f"Grid must have 1..{MAX_GRID_POINTS} combinations, got {size}")
+    axes = [np.asarray(grid[name], dtype=np.float64) for name in dimensions]
+    mesh = np.meshgrid(*axes, indexing="ij") if axes else []
+    values = {name: points.ravel() for name, points in zip(dimensions, mesh)}
+    probability, score = _score(base, values, size)
+    return {
+        "dimensions": dimensions,
+        "axes": {name: list(grid[name]) for name in dimensions},
+        "shape": shape,
+        "probability": probability.tolist(),
+        "band": band_labels(score).tolist(),
     }
-    penalties = {"chop": -7}
-    bonuses = {"king_queen": 8}
 
-    if deltas.get("spreadShrinksTo"):
-        bonuses["liquidity"] = 3
-    if deltas.get("orbRetestConfirms"):
-        bonuses["orb_retest"] = 5
-    if isinstance(deltas.get("ivChange"), (int, float)) and deltas["ivChange"] < 0:
-        bonuses["iv_relief"] = 2
 
-    probability, band = aggregate_probability(contributions, penalties, bonuses)
+def evaluate_what_if(
+    ticker: str, deltas: dict[str, float | bool], base: WhatIfBase | None = None
+) -> WhatIfResult:
+    values = {
+        name: np.array([float(value)]) for name, value in deltas.items() if name in GRID_DIMENSIONS
+    }
+    probability, score = _score(base or WhatIfBase(), values, 1)
     template = get_template("Normal")
     eta = int(sum(template["debounce"]) / 2)
-    return WhatIfResult(ticker=ticker, probability=probability, band=band, eta_seconds=eta)
+    return WhatIfResult(
+        ticker=ticker,
+        probability=float(probability[0]),
+        band=ProbabilityBand.from_score(float(score[0])),
+        eta_seconds=eta,
+    )
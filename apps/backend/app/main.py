@@ -11,13 +11,18 @@ from sqlalchemy import text
 from app.api import api_router
 from app.core.errors import register_exception_handlers
 from app.core.logging import configure_logging
+from app.core.redis import get_redis
 from app.core.settings import settings
 from app.db.session import engine
+from app.services.baselines import baseline_service
 from app.services.realtime_engine import start_realtime
+from app.services.score_series import score_series
+from app.services.sketches import sketch_store
 from app.services.state_store import state_store
 from app.services.tile_engine import run_tile_pipeline
 from app.services.watchlist import watchlist_service
-from app.ws.manager import ConnectionManager
+from app.ws.manager import ALL_SYMBOLS, ConnectionManager, RedisConnectionManager
+from app.ws.projection import tile_payloads
 
 configure_logging()
 app = FastAPI(title="KCU LTP", version="0.1.0")
@@ -30,7 +35,11 @@ app.add_middleware(
 app.include_router(api_router)
 register_exception_handlers(app)
 
-manager = ConnectionManager()
+manager = (
+    RedisConnectionManager(get_redis(), projections=tile_payloads)
+    if settings.state_backend == "redis"
+    else ConnectionManager(tile_payloads)
+)
 logger = logging.getLogger("uvicorn")
 
 
@@ -44,18 +53,35 @@ async def startup_event() -> None:
         logger.exception("DB connection FAILED")
     await watchlist_service.seed_if_empty()
     asyncio.create_task(manager.heartbeat())
-    asyncio.create_task(run_tile_pipeline(manager))
-    asyncio.create_task(start_realtime(manager))
+    if isinstance(manager, RedisConnectionManager):
+        asyncio.create_task(manager.relay())
+        asyncio.create_task(watchlist_service.listen(get_redis()))
+    if settings.run_pipeline:
+        asyncio.create_task(baseline_service.run())
+        asyncio.create_task(sketch_store.run())
+        asyncio.create_task(score_series.run())
+        asyncio.create_task(run_tile_pipeline(manager))
+        asyncio.create_task(start_realtime(manager))
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    await manager.close()
+    await sketch_store.flush()
+    await score_series.flush()
 
 
 @app.websocket("/ws/stream")
 async def websocket_endpoint(websocket: WebSocket) -> None:
     await manager.connect(websocket)
-    current = await state_store.all_states()
-    for tile in current:
-        await websocket.send_json({"type": "tile", "data": tile.model_dump()})
+    await manager.send_snapshot(websocket, await state_store.all_states())
     try:
         while True:
-            await websocket.receive_text()
+            symbols = await manager.handle_message(websocket, await websocket.receive_text())
+            if ALL_SYMBOLS in symbols:
+                await manager.send_snapshot(websocket, await state_store.all_states())
+            elif symbols:
+                tiles = [await state_store.get_state(symbol) for symbol in symbols]
+                await manager.send_snapshot(websocket, [tile for tile in tiles if tile])
     except WebSocketDisconnect:
         await manager.disconnect(websocket)
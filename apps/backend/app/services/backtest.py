@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.settings import settings
+from app.db.models import Candle, Levels, OptionSnapshot
+from app.domain.scoring import aggregate_probability
+from app.services.tile_engine import (
+    DB_TIMEFRAME,
+    _calculate_bonuses,
+    _calculate_penalties,
+    _candle_row,
+    _compute_contributions,
+    _level_premarket,
+    _level_prev,
+    _option_row,
+)
+
+logger = logging.getLogger(__name__)
+
+HORIZONS = (5, 15, 30)  # forward-return horizons, minutes
+# the live cached payload scores the latest 200 1m candles and 80 option rows
+CANDLE_WINDOW = 200
+OPTION_WINDOW = 80
+# calendar days of candles loaded before the session so the first minutes see a full window
+WARMUP_DAYS = 4
+
+
+@dataclass
+class DayData:
+    ticker: str
+    day: date
+    candles: list[dict[str, Any]]  # _candle_row dicts, ts ascending, warm-up days included
+    level: Any | None
+    options: list[tuple[datetime, dict[str, Any]]]  # (ts, _option_row), ascending
+
+
+@dataclass
+class BacktestResult:
+    minutes: list[dict[str, Any]] = field(default_factory=list)
+    transitions: list[dict[str, Any]] = field(default_factory=list)
+    days: int = 0
+    seconds: float = 0.0
+
+    def summary(self, horizons: Sequence[int] = HORIZONS) -> dict[str, Any]:
+        """Forward-return outcomes per band: count, mean return and share of positive returns."""
+
+        bands: dict[str, Any] = {}
+        for label in sorted({row["band"] for row in self.minutes}):
+            rows = [row for row in self.minutes if row["band"] == label]
+            stats: dict[str, Any] = {"minutes": len(rows)}
+            for horizon in horizons:
+                returns = np.array(
+                    [row[f"ret_{horizon}m"] for row in rows if row[f"ret_{horizon}m"] is not None]
+                )
+                stats[f"ret_{horizon}m"] = {
+                    "n": int(returns.size),
+                    "mean": float(returns.mean()) if returns.size else None,
+                    "hit_rate": float((returns > 0).mean()) if returns.size else None,
+                }
+            bands[label] = stats
+        return {
+            "days": self.days,
+            "minutes": len(self.minutes),
+            "transitions": len(self.transitions),
+            "seconds": round(self.seconds, 3),
+            "bands": bands,
+        }
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, dt_time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def score_day(data: DayData, horizons: Sequence[int] = HORIZONS) -> BacktestResult:
+    """Replay one (ticker, day) minute by minute through the live scoring functions.
+
+    Each minute sees the payload ``_load_cached_payload`` would have built then: the last 200
+    1m candles, the 80 newest option rows and that day's levels. There is no historical NBBO
+    quote, so quote-derived inputs take the defaults the live path uses without one.
+    """
+
+    start, end = _day_bounds(data.day)
+    times = [_utc(datetime.fromisoformat(candle["t"])) for candle in data.candles]
+    first = bisect_right(times, start - timedelta(microseconds=1))
+    last = bisect_right(times, end - timedelta(microseconds=1))
+    option_times = [ts for ts, _ in data.options]
+    levels = {}
+    if data.level is not None:
+        levels = {"prev_close": _level_prev(data.level), "premarket": _level_premarket(data.level)}
+
+    session = data.candles[first:last]
+    closes = np.array([candle["c"] or np.nan for candle in session], dtype=np.float64)
+    stamps = np.array([ts.timestamp() for ts in times[first:last]], dtype=np.float64)
+    forward = {}
+    for horizon in horizons:
+        target = np.searchsorted(stamps, stamps + horizon * 60, side="left")
+        valid = target < len(stamps)
+        ratio = np.full(len(stamps), np.nan)
+        ratio[valid] = closes[target[valid]] / closes[valid] - 1
+        forward[horizon] = ratio
+
+    result = BacktestResult(days=1)
+    previous_band = None
+    for offset, index in enumerate(range(first, last)):
+        ts = times[index]
+        newest = bisect_right(option_times, ts)
+        payload = {
+            "candles": data.candles[max(0, index + 1 - CANDLE_WINDOW) : index + 1],
+            "options_chain": [
+                row for _, row in reversed(data.options[max(0, newest - OPTION_WINDOW) : newest])
+            ],
+            **levels,
+        }
+        contributions, _ = _compute_contributions(data.ticker, payload)
+        penalties = _calculate_penalties(payload, contributions)
+        bonuses = _calculate_bonuses(contributions, payload)
+        probability, band = aggregate_probability(contributions, penalties, bonuses)
+        row = {
+            "ticker": data.ticker,
+            "ts": ts.isoformat(),
+            "probability": probability,
+            "band": band.label,
+            **{name: round(score, 4) for name, score in contributions.items()},
+            "penalties": round(sum(penalties.values()), 2),
+            "bonuses": round(sum(bonuses.values()), 2),
+        }
+        for horizon in horizons:
+            value = forward[horizon][offset]
+            row[f"ret_{horizon}m"] = None if np.isnan(value) else round(float(value), 6)
+        result.minutes.append(row)
+        if previous_band is not None and band.label != previous_band:
+            result.transitions.append(
+                {
+                    "ticker": data.ticker,
+                    "ts": ts.isoformat(),
+                    "from": previous_band,
+                    "to": band.label,
+                    "probability": probability,
+                }
+            )
+        previous_band = band.label
+    return result
+
+
+def _rows(records: Iterable[dict[str, Any]]) -> list[SimpleNamespace]:
+    return [SimpleNamespace(**record) for record in records]
+
+
+def load_day_parquet(root: str, ticker: str, day: date) -> DayData:
+    from app.services.parquet_export import load_parquet
+
+    start, end = _day_bounds(day)
+    warmup = start - timedelta(days=WARMUP_DAYS)
+    candles = load_parquet(root, "candles", tickers=[ticker], start=warmup, end=end).to_pylist()
+    candles = sorted(
+        (row for row in candles if row["timeframe"] == DB_TIMEFRAME), key=lambda row: row["ts"]
+    )
+    options = load_parquet(root, "option_snapshots", tickers=[ticker], start=start, end=end)
+    options = sorted(options.to_pylist(), key=lambda row: (row["ts"], row["id"]))
+    levels = load_parquet(root, "levels", tickers=[ticker], start=warmup, end=end).to_pylist()
+    levels = [row for row in levels if row["day"] <= day]
+    return DayData(
+        ticker=ticker,
+        day=day,
+        candles=[_candle_row(row) for row in _rows(candles)],
+        level=_rows([max(levels, key=lambda row: row["day"])])[0] if levels else None,
+        options=[(_utc(row.ts), _option_row(row)) for row in _rows(options)],
+    )
+
+
+async def load_day_db(sessions, ticker: str, day: date) -> DayData:
+    start, end = _day_bounds(day)
+    async with sessions() as session:
+        candle_rows = (
+            await session.execute(
+                select(Candle)
+                .where(
+                    Candle.ticker == ticker,
+                    Candle.timeframe == DB_TIMEFRAME,
+                    Candle.ts >= start - timedelta(days=WARMUP_DAYS),
+                    Candle.ts < end,
+                )
+                .order_by(Candle.ts)
+            )
+        ).scalars()
+        candles = [_candle_row(row) for row in candle_rows]
+        level = (
+            await session.execute(
+                select(Levels)
+                .where(Levels.ticker == ticker, Levels.day <= day)
+                .order_by(Levels.day.desc())
+                .limit(1)
+            )
+        ).scalar_one_or_none()
+        option_rows = (
+            await session.execute(
+                select(OptionSnapshot)
+                .where(
+                    OptionSnapshot.ticker == ticker,
+                    OptionSnapshot.ts >= start,
+                    OptionSnapshot.ts < end,
+                )
+                .order_by(OptionSnapshot.ts, OptionSnapshot.id)
+            )
+        ).scalars()
+        options = [(_utc(row.ts), _option_row(row)) for row in option_rows]
+    return DayData(ticker=ticker, day=day, candles=candles, level=level, options=options)
+
+
+_worker: dict[str, Any] = {}
+
+
+def _init_worker(parquet_root: str | None, database_url: str | None) -> None:
+    _worker["parquet_root"] = parquet_root
+    if not parquet_root:
+        # a fresh engine per process; pooled connections must not cross a fork
+        engine = create_async_engine(
+            database_url or settings.database_url_async, poolclass=NullPool
+        )
+        _worker["sessions"] = async_sessionmaker(
+            engine, expire_on_commit=False, class_=AsyncSession
+        )
+
+
+def _run_job(job: tuple[str, date, tuple[int, ...]]) -> BacktestResult:
+    ticker, day, horizons = job
+    if _worker["parquet_root"]:
+        data = load_day_parquet(_worker["parquet_root"], ticker, day)
+    else:
+        data = asyncio.run(load_day_db(_worker["sessions"], ticker, day))
+    return score_day(data, horizons)
+
+
+def _days(start: date, end: date) -> list[date]:
+    """Weekdays in [start, end]; days without candles simply score nothing."""
+
+    return [
+        start + timedelta(days=offset)
+        for offset in range((end - start).days + 1)
+        if (start + timedelta(days=offset)).weekday() < 5
+    ]
+
+
+def run_backtest(
+    tickers: Sequence[str],
+    start: date,
+    end: date,
+    parquet_root: str | None = None,
+    workers: int | None = None,
+    horizons: Sequence[int] = HORIZONS,
+    database_url: str | None = None,
+) -> BacktestResult:
+    """Score every (ticker, day) in [start, end], sharded across a process pool.
+
+    Reads a ``parquet_export`` tree when ``parquet_root`` is set, otherwise the database.
+    ``workers=1`` runs in this process.
+    """
+
+    began = time.perf_counter()
+    jobs = [
+        (ticker.upper(), day, tuple(horizons)) for day in _days(start, end) for ticker in tickers
+    ]
+    workers = workers or os.cpu_count() or 1
+    total = BacktestResult()
+    if workers == 1 or len(jobs) == 1:
+        _init_worker(parquet_root, database_url)
+        outputs = [_run_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(jobs)),
+            initializer=_init_worker,
+            initargs=(parquet_root, database_url),
+        ) as pool:
+            outputs = list(pool.map(_run_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    for output in outputs:
+        if output.minutes:
+            total.days += 1
+        total.minutes.extend(output.minutes)
+        total.transitions.extend(output.transitions)
+    total.seconds = time.perf_counter() - began
+    logger.info(
+        "backtest-complete",
+        extra={"jobs": len(jobs), "minutes": len(total.minutes), "seconds": total.seconds},
+    )
+    return total
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay stored sessions through the scorer")
+    parser.add_argument("--tickers", required=True, help="comma-separated")
+    parser.add_argument("--from", dest="start", required=True, type=date.fromisoformat)
+    parser.add_argument("--to", dest="end", required=True, type=date.fromisoformat)
+    parser.add_argument("--parquet", default=None, help="parquet_export root instead of the DB")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=None, help="per-minute rows to .csv or .parquet")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    tickers = [ticker for ticker in args.tickers.split(",") if ticker]
+    result = run_backtest(tickers, args.start, args.end, args.parquet, args.workers)
+    if args.out:
+        import pandas as pd
+
+        frame = pd.DataFrame(result.minutes)
+        if args.out.endswith(".parquet"):
+            frame.to_parquet(args.out, index=False)
+        else:
+            frame.to_csv(args.out, index=False)
+    print(json.dumps(result.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
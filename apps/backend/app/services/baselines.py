@@ -2,15 +2,25 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
 from dataclasses import dataclass
 from datetime import date
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Sequence
 
+import numpy as np
 from sqlalchemy import select
 
 from app.db.models import PercentileBaseline
 from app.db.session import async_session
 
+PERCENTILES = (0.5, 0.75, 0.9, 0.95)
+REFRESH_SECONDS = 300.0
+# Incremental refreshes only see rows whose asof moved; a periodic full load drops deleted ones.
+FULL_RELOAD_SECONDS = 6 * 3600.0
+_NO_ASOF = -1
+# Below this many values numpy's per-call overhead costs more than the plain loop saves
+VECTORIZE_MIN = 32
+
 
 @dataclass
 class PercentileSnapshot:
@@ -22,37 +32,120 @@ class PercentileSnapshot:
 
 
 class BaselineService:
-    def __init__(self) -> None:
-        self._cache: Dict[tuple[str, str], PercentileSnapshot] = {}
+    """Percentile baselines as a dense ``metric id x bucket id x [p50, p75, p90, p95]`` array.
+
+    Metric and bucket keys are interned to integer ids as rows arrive; missing cells are NaN.
+    ``refresh`` reads only rows with ``asof`` on or after the newest one already loaded.
+    """
+
+    def __init__(self, session_factory=None) -> None:
+        self._session = session_factory or async_session
+        self._metric_ids: Dict[str, int] = {}
+        self._bucket_ids: Dict[str, int] = {}
+        self._values = np.full((0, 0, len(PERCENTILES)), np.nan)
+        self._asof = np.full((0, 0), _NO_ASOF, dtype=np.int64)  # date ordinals
+        self._latest: date | None = None
+        self._full_at = 0.0
         self._lock = asyncio.Lock()
         self._loaded = False
         self._logger = logging.getLogger(__name__)
+        self.rows_loaded = 0
 
-    async def refresh(self) -> None:
+    async def refresh(self, full: bool = False) -> None:
         async with self._lock:
+            stale = time.monotonic() - self._full_at > FULL_RELOAD_SECONDS
+            full = full or not self._loaded or stale
+            stmt = select(PercentileBaseline)
+            if not full and self._latest is not None:
+                stmt = stmt.where(PercentileBaseline.asof >= self._latest)
             try:
-                async with async_session() as session:
-                    result = await session.execute(select(PercentileBaseline))
-                    rows = result.scalars().all()
-                self._cache = {
-                    (row.metric, row.bucket_key): PercentileSnapshot(
-                        p50=row.p50,
-                        p75=row.p75,
-                        p90=row.p90,
-                        p95=row.p95,
-                        asof=row.asof,
-                    )
-                    for row in rows
-                }
+                async with self._session() as session:
+                    rows = (await session.execute(stmt)).scalars().all()
             except Exception as exc:  # pragma: no cover - optional DB path
                 self._logger.warning("baseline-refresh-failed", extra={"error": str(exc)})
-                self._cache = {}
+                self._loaded = True
+                return
+            if full:
+                self._metric_ids, self._bucket_ids = {}, {}
+                self._values = np.full((0, 0, len(PERCENTILES)), np.nan)
+                self._asof = np.full((0, 0), _NO_ASOF, dtype=np.int64)
+                self._latest = None
+                self._full_at = time.monotonic()
+            self._apply(rows)
+            self.rows_loaded += len(rows)
             self._loaded = True
 
+    def _apply(self, rows: Sequence[PercentileBaseline]) -> None:
+        if not rows:
+            return
+        metric_idx = np.array(
+            [self._intern(self._metric_ids, row.metric) for row in rows], dtype=np.intp
+        )
+        bucket_idx = np.array(
+            [self._intern(self._bucket_ids, row.bucket_key) for row in rows], dtype=np.intp
+        )
+        self._grow(len(self._metric_ids), len(self._bucket_ids))
+        self._values[metric_idx, bucket_idx] = [(r.p50, r.p75, r.p90, r.p95) for r in rows]
+        self._asof[metric_idx, bucket_idx] = [row.asof.toordinal() for row in rows]
+        newest = max(row.asof for row in rows)
+        self._latest = newest if self._latest is None else max(self._latest, newest)
+
+    @staticmethod
+    def _intern(ids: Dict[str, int], key: str) -> int:
+        return ids.setdefault(key, len(ids))
+
+    def _grow(self, metrics: int, buckets: int) -> None:
+        old_m, old_b = self._asof.shape
+        if metrics <= old_m and buckets <= old_b:
+            return
+        values = np.full((metrics, buckets, len(PERCENTILES)), np.nan)
+        asof = np.full((metrics, buckets), _NO_ASOF, dtype=np.int64)
+        values[:old_m, :old_b] = self._values
+        asof[:old_m, :old_b] = self._asof
+        self._values, self._asof = values, asof
+
+    async def run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(REFRESH_SECONDS)
+
     async def get_percentiles(self, metric: str, bucket_key: str) -> Optional[PercentileSnapshot]:
         if not self._loaded:
             await self.refresh()
-        return self._cache.get((metric, bucket_key))
+        m, b = self._metric_ids.get(metric), self._bucket_ids.get(bucket_key)
+        if m is None or b is None or self._asof[m, b] == _NO_ASOF:
+            return None
+        p50, p75, p90, p95 = self._values[m, b].tolist()
+        return PercentileSnapshot(
+            p50=p50, p75=p75, p90=p90, p95=p95, asof=date.fromordinal(int(self._asof[m, b]))
+        )
+
+    def _table(self, metrics: Sequence[str], buckets: Sequence[str | None]) -> np.ndarray:
+        """(n, 4) baseline rows for the (metric, bucket) pairs; NaN rows where none exists."""
+
+        m = np.array([self._metric_ids.get(metric, -1) for metric in metrics], dtype=np.intp)
+        b = np.array(
+            [self._bucket_ids.get(bucket, -1) if bucket else -1 for bucket in buckets],
+            dtype=np.intp,
+        )
+        table = np.full((len(m), len(PERCENTILES)), np.nan)
+        known = (m >= 0) & (b >= 0)
+        if known.any():
+            table[known] = self._values[m[known], b[known]]
+        return table
+
+    async def ranks(
+        self,
+        metrics: Sequence[str],
+        buckets: Sequence[str | None],
+        values: Iterable[float | None],
+    ) -> list[Optional[float]]:
+        """``percentile_rank`` for many (metric, bucket, value) triples in one vectorized pass,
+        e.g. every option metric of every tile in the watchlist."""
+
+        if not self._loaded:
+            await self.refresh()
+        return percentile_ranks(values, self._table(metrics, buckets))
 
 
 baseline_service = BaselineService()
@@ -61,12 +154,11 @@ baseline_service = BaselineService()
 def percentile_rank(value: float | None, baseline: PercentileSnapshot | None) -> Optional[float]:
     if value is None or baseline is None:
         return None
-    points = [
-        (baseline.p50, 0.5),
-        (baseline.p75, 0.75),
-        (baseline.p90, 0.9),
-        (baseline.p95, 0.95),
-    ]
+    return _rank(value, (baseline.p50, baseline.p75, baseline.p90, baseline.p95))
+
+
+def _rank(value: float, percentiles: Sequence[float]) -> float:
+    points = list(zip(percentiles, PERCENTILES))
     if value <= points[0][0]:
         return 0.5
     for (low_val, low_pct), (high_val, high_pct) in zip(points, points[1:]):
@@ -77,6 +169,40 @@ def percentile_rank(value: float | None, baseline: PercentileSnapshot | None) ->
     return 0.99
 
 
+def percentile_ranks(values: Iterable[float | None], table: np.ndarray) -> list[Optional[float]]:
+    """Vectorized ``percentile_rank``: ``table`` holds one [p50, p75, p90, p95] row per value
+    (NaN row = no baseline). Same results, including the 0.5 floor and 0.99 cap."""
+
+    values = list(values)
+    if len(values) < VECTORIZE_MIN:
+        return [
+            None if value is None or any(p != p for p in row) else _rank(value, row)
+            for value, row in zip(values, table.tolist())
+        ]
+    raw = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    pcts = np.array(PERCENTILES)
+    missing = np.isnan(raw) | np.isnan(table).any(axis=1)
+    x = np.where(missing, 0.0, raw)
+    points = np.nan_to_num(table)
+    below = x <= points[:, 0]
+    within = x[:, None] <= points[:, 1:]
+    segment = np.where(within.any(axis=1), within.argmax(axis=1) + 1, len(PERCENTILES))
+    high_idx = np.minimum(segment, len(PERCENTILES) - 1)
+    rows = np.arange(len(x))
+    low, high = points[rows, high_idx - 1], points[rows, high_idx]
+    span = high - low
+    span = np.where(span == 0, 1e-6, span)
+    fraction = (x - low) / span
+    interpolated = pcts[high_idx - 1] + (pcts[high_idx] - pcts[high_idx - 1]) * fraction
+    result = np.where(below, 0.5, np.where(segment == len(PERCENTILES), 0.99, interpolated))
+    return [
+        None if miss else (rank if edge else round(rank, 4))
+        for rank, miss, edge in zip(
+            result.tolist(), missing.tolist(), (below | (segment == len(PERCENTILES))).tolist()
+        )
+    ]
+
+
 def percentile_to_label(rank: Optional[float]) -> str:
     if rank is None:
         return "p--"
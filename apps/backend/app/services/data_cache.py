@@ -1,21 +1,18 @@
 from __future__ import annotations
 
-import asyncio
-from typing import Any, Dict
+from typing import Dict
 
 
 class QuoteCache:
+    # Single-key get/set never awaits, so on the event loop they are already atomic; no lock needed.
     def __init__(self) -> None:
         self._quotes: Dict[str, dict] = {}
-        self._lock = asyncio.Lock()
 
     async def set_quote(self, symbol: str, payload: dict) -> None:
-        async with self._lock:
-            self._quotes[symbol.upper()] = payload
+        self._quotes[symbol.upper()] = payload
 
     async def get_quote(self, symbol: str) -> dict | None:
-        async with self._lock:
-            return self._quotes.get(symbol.upper())
+        return self._quotes.get(symbol.upper())
 
 
 quote_cache = QuoteCache()
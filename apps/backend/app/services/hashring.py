@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+from typing import Generic, Iterable, TypeVar
+
+T = TypeVar("T")
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing(Generic[T]):
+    """Consistent hash ring; adding or removing a node only moves ~1/N of the keys."""
+
+    def __init__(self, nodes: Iterable[T], replicas: int = 64) -> None:
+        self._replicas = replicas
+        self._nodes: list[T] = []
+        self._points: list[int] = []
+        self._owners: list[T] = []
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> list[T]:
+        return list(self._nodes)
+
+    def add(self, node: T) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.append(node)
+        for replica in range(self._replicas):
+            point = _hash(f"{node}#{replica}")
+            idx = bisect.bisect(self._points, point)
+            self._points.insert(idx, point)
+            self._owners.insert(idx, node)
+
+    def remove(self, node: T) -> None:
+        if node not in self._nodes:
+            return
+        self._nodes.remove(node)
+        kept = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def node_for(self, key: str) -> T:
+        if not self._points:
+            raise ValueError("hash ring has no nodes")
+        idx = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[idx]
+
+    def assign(self, keys: Iterable[str]) -> dict[T, set[str]]:
+        assignment: dict[T, set[str]] = {node: set() for node in self._nodes}
+        for key in keys:
+            assignment[self.node_for(key)].add(key)
+        return assignment
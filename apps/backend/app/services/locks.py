@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Dict
+
+
+class KeyedLocks:
+    """One ``asyncio.Lock`` per key so unrelated symbols never wait on each other."""
+
+    def __init__(self) -> None:
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def __call__(self, key: str) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def discard(self, key: str) -> None:
+        """Drop an idle lock. A waiter woken by ``release()`` stays in ``_waiters`` until it has
+        acquired, so a lock someone is about to take is never replaced by a second one."""
+
+        lock = self._locks.get(key)
+        if lock is not None and not lock.locked() and not lock._waiters:
+            del self._locks[key]
+
+    def __len__(self) -> int:
+        return len(self._locks)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict
+
+logger = logging.getLogger(__name__)
+
+FlushCallback = Callable[[str, dict[str, Any]], Awaitable[None]]
+
+
+@dataclass
+class MergeStats:
+    events_in: int = 0
+    merges_out: int = 0
+    last_merge_ms: float | None = None
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=512))
+
+    def to_dict(self) -> dict[str, Any]:
+        ratio = self.events_in / self.merges_out if self.merges_out else None
+        return {
+            "events_in": self.events_in,
+            "merges_out": self.merges_out,
+            "coalesce_ratio": round(ratio, 2) if ratio is not None else None,
+            "last_merge_ms": self.last_merge_ms,
+        }
+
+
+def coalesce_deltas(current: dict[str, Any], incoming: dict[str, Any]) -> dict[str, Any]:
+    """Fold ``incoming`` into ``current``; nested dicts are merged key-by-key, newest wins."""
+
+    for key, value in incoming.items():
+        existing = current.get(key)
+        if isinstance(existing, dict) and isinstance(value, dict):
+            current[key] = {**existing, **value}
+        else:
+            current[key] = dict(value) if isinstance(value, dict) else value
+    return current
+
+
+class MergeScheduler:
+    """Accumulates realtime deltas per symbol and flushes each symbol at most once per tick."""
+
+    def __init__(self, flush: FlushCallback | None = None, interval: float = 0.15) -> None:
+        self._flush = flush
+        self._interval = interval
+        self._pending: Dict[str, dict[str, Any]] = {}
+        self._first_seen: Dict[str, float] = {}
+        self._stats: Dict[str, MergeStats] = {}
+        self._wakeup = asyncio.Event()
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def configure(self, flush: FlushCallback, interval: float | None = None) -> None:
+        self._flush = flush
+        if interval is not None:
+            self._interval = max(interval, 0.0)
+
+    def submit(self, symbol: str, deltas: dict[str, Any]) -> None:
+        if not deltas:
+            return
+        pending = self._pending.get(symbol)
+        if pending is None:
+            self._pending[symbol] = coalesce_deltas({}, deltas)
+            self._first_seen[symbol] = time.monotonic()
+        else:
+            coalesce_deltas(pending, deltas)
+        self._stats.setdefault(symbol, MergeStats()).events_in += 1
+        self._wakeup.set()
+
+    def pending_symbols(self) -> list[str]:
+        return list(self._pending)
+
+    async def flush_pending(self) -> int:
+        if not self._pending or self._flush is None:
+            return 0
+        batch, self._pending = self._pending, {}
+        first_seen, self._first_seen = self._first_seen, {}
+        for symbol, deltas in batch.items():
+            started = first_seen.get(symbol, time.monotonic())
+            try:
+                await self._flush(symbol, deltas)
+            except Exception as exc:  # pragma: no cover - defensive, keep the loop alive
+                logger.warning("merge-flush-failed", extra={"symbol": symbol, "error": str(exc)})
+                continue
+            stats = self._stats.setdefault(symbol, MergeStats())
+            stats.merges_out += 1
+            latency = round((time.monotonic() - started) * 1000, 3)
+            stats.last_merge_ms = latency
+            stats.latencies_ms.append(latency)
+        return len(batch)
+
+    async def run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await asyncio.sleep(self._interval)
+            await self.flush_pending()
+
+    def latencies(self) -> list[float]:
+        values: list[float] = []
+        for stats in self._stats.values():
+            values.extend(stats.latencies_ms)
+        return values
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {symbol: stats.to_dict() for symbol, stats in sorted(self._stats.items())}
+
+    def reset_stats(self) -> None:
+        self._stats.clear()
+
+
+merge_scheduler = MergeScheduler()
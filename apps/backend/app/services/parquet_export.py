@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from sqlalchemy import JSON, Date, DateTime, Float, Integer, Numeric, Uuid, select
+
+from app.db.models import Candle, Levels, OptionSnapshot, Snapshot
+from app.db.session import async_session
+
+logger = logging.getLogger(__name__)
+
+TABLES = {
+    "snapshots": Snapshot,
+    "candles": Candle,
+    "option_snapshots": OptionSnapshot,
+    "levels": Levels,
+}
+# partition columns live in the path, not in the files
+PARTITION_COLUMNS = ("ticker", "day")
+# rows per Arrow record batch; also the server-side cursor fetch size
+BATCH_ROWS = 50_000
+PARTITION_FILE = "part-0.parquet"
+
+
+def require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:  # pragma: no cover - optional dependency
+        raise RuntimeError("Parquet export needs pyarrow: pip install 'kcu-backend[parquet]'")
+    return pa, pq
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _column_spec(pa, column) -> tuple[Any, Callable[[Any], Any] | None]:
+    """Arrow type for a mapped column plus a per-value converter (None = as is)."""
+
+    kind = column.type
+    if isinstance(kind, JSON):
+        return pa.string(), lambda value: json.dumps(value, default=str)
+    if isinstance(kind, DateTime):
+        return pa.timestamp("us", tz="UTC"), None
+    if isinstance(kind, Date):
+        return pa.date32(), None
+    if isinstance(kind, Integer):
+        return pa.int64(), None
+    if isinstance(kind, Float):
+        return pa.float64(), None
+    if isinstance(kind, Numeric):
+        return pa.float64(), float
+    if isinstance(kind, Uuid):
+        return pa.string(), str
+    return pa.string(), None
+
+
+def _partition_path(root: Path, table: str, ticker: str, day: date) -> Path:
+    return root / table / f"ticker={ticker}" / f"day={day.isoformat()}" / PARTITION_FILE
+
+
+async def export_table(
+    table: str,
+    start: datetime,
+    end: datetime,
+    root: str | os.PathLike,
+    tickers: Sequence[str] | None = None,
+    batch_rows: int = BATCH_ROWS,
+    session_factory=None,
+) -> dict[str, int]:
+    """Write ``table`` rows with ``ts`` in [start, end) to ``root/<table>/ticker=X/day=D/``.
+
+    Rows come off a server-side cursor ordered by (ticker, ts), so exactly one partition file
+    is open at a time and at most ``batch_rows`` rows are buffered whatever the range. Ticker
+    and day live in the path, not the files. Re-exporting a partition replaces it. ``levels``
+    has no ``ts``; its rows are selected and partitioned by their own ``day``.
+    """
+
+    pa, pq = require_pyarrow()
+    model = TABLES[table]
+    columns = [c for c in model.__table__.columns if c.name not in PARTITION_COLUMNS]
+    specs = [_column_spec(pa, column) for column in columns]
+    schema = pa.schema([(column.name, spec[0]) for column, spec in zip(columns, specs)])
+    converters = [spec[1] for spec in specs]
+    if "ts" in model.__table__.columns:
+        time_column, day_of = model.ts, lambda ts: _utc(ts).date()
+        in_range = (model.ts >= start, model.ts < end)
+    else:
+        time_column, day_of = model.day, lambda day: day
+        last_day = (_utc(end) - timedelta(microseconds=1)).date()
+        in_range = (model.day >= _utc(start).date(), model.day <= last_day)
+    stmt = (
+        select(model.ticker, time_column, *columns)
+        .where(*in_range)
+        .order_by(model.ticker, time_column)
+    )
+    if tickers:
+        stmt = stmt.where(model.ticker.in_([ticker.upper() for ticker in tickers]))
+
+    root = Path(root)
+    buffers: list[list[Any]] = [[] for _ in columns]
+    writer, partition, path = None, None, None
+    stats = {"files": 0, "rows": 0}
+
+    def write_batch() -> None:
+        arrays = [pa.array(values, type=field.type) for values, field in zip(buffers, schema)]
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+        for values in buffers:
+            values.clear()
+
+    def close() -> None:
+        if buffers[0]:
+            write_batch()
+        writer.close()
+        os.replace(path.with_suffix(".tmp"), path)
+
+    async with (session_factory or async_session)() as session:
+        result = await session.stream(stmt.execution_options(yield_per=batch_rows))
+        async for ticker, moment, *values in result:
+            key = (ticker, day_of(moment))
+            if key != partition:
+                if writer is not None:
+                    await asyncio.to_thread(close)
+                partition, path = key, _partition_path(root, table, *key)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                writer = pq.ParquetWriter(path.with_suffix(".tmp"), schema, compression="zstd")
+                stats["files"] += 1
+            for buffer, convert, value in zip(buffers, converters, values):
+                buffer.append(value if convert is None or value is None else convert(value))
+            stats["rows"] += 1
+            if len(buffers[0]) >= batch_rows:
+                await asyncio.to_thread(write_batch)
+    if writer is not None:
+        await asyncio.to_thread(close)
+    logger.info("parquet-export", extra={"table": table, **stats})
+    return stats
+
+
+async def export_range(
+    start: datetime,
+    end: datetime,
+    root: str | os.PathLike,
+    tables: Iterable[str] = tuple(TABLES),
+    tickers: Sequence[str] | None = None,
+    session_factory=None,
+) -> dict[str, dict[str, int]]:
+    return {
+        table: await export_table(
+            table, start, end, root, tickers=tickers, session_factory=session_factory
+        )
+        for table in tables
+    }
+
+
+def _dataset(root: str | os.PathLike, table: str):
+    pa, _ = require_pyarrow()
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(
+        pa.schema([("ticker", pa.string()), ("day", pa.date32())]), flavor="hive"
+    )
+    return ds.dataset(Path(root) / table, format="parquet", partitioning=partitioning)
+
+
+def _filter(
+    table: str, tickers: Sequence[str] | None, start: datetime | None, end: datetime | None
+):
+    import pyarrow.dataset as ds
+
+    timed = "ts" in TABLES[table].__table__.columns
+    clauses = []
+    if tickers:
+        clauses.append(ds.field("ticker").isin([ticker.upper() for ticker in tickers]))
+    # the day clauses prune whole partitions, the ts ones trim the edge days
+    if start is not None:
+        clauses.append(ds.field("day") >= _utc(start).date())
+        if timed:
+            clauses.append(ds.field("ts") >= _utc(start))
+    if end is not None:
+        clauses.append(ds.field("day") <= (_utc(end) - timedelta(microseconds=1)).date())
+        if timed:
+            clauses.append(ds.field("ts") < _utc(end))
+    expression = None
+    for clause in clauses:
+        expression = clause if expression is None else expression & clause
+    return expression
+
+
+def load_parquet(
+    root: str | os.PathLike,
+    table: str,
+    tickers: Sequence[str] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    columns: Sequence[str] | None = None,
+):
+    """Exported ``table`` rows as one ``pyarrow.Table`` (``ticker`` and ``day`` included);
+    partitions outside the tickers/range are never opened. ``.to_pandas()`` for a frame."""
+
+    dataset = _dataset(root, table)
+    return dataset.to_table(columns=columns, filter=_filter(table, tickers, start, end))
+
+
+def iter_parquet_batches(
+    root: str | os.PathLike,
+    table: str,
+    tickers: Sequence[str] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    columns: Sequence[str] | None = None,
+    batch_size: int = BATCH_ROWS,
+) -> Iterator[Any]:
+    """Same rows as ``load_parquet`` as bounded ``pyarrow.RecordBatch`` chunks."""
+
+    dataset = _dataset(root, table)
+    yield from dataset.to_batches(
+        columns=columns, filter=_filter(table, tickers, start, end), batch_size=batch_size
+    )
+
+
+class ExportJobs:
+    """Background exports started from the API; one record per job id."""
+
+    def __init__(self) -> None:
+        self._jobs: dict[str, dict[str, Any]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def start(self, root: str, **kwargs: Any) -> dict[str, Any]:
+        job_id = uuid.uuid4().hex[:12]
+        job = {"id": job_id, "status": "running", "root": str(root), "tables": None}
+        self._jobs[job_id] = job
+        task = asyncio.create_task(self._run(job, root, kwargs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return dict(job)
+
+    async def _run(self, job: dict[str, Any], root: str, kwargs: dict[str, Any]) -> None:
+        try:
+            job["tables"] = await export_range(root=root, **kwargs)
+            job["status"] = "done"
+        except Exception as exc:
+            logger.warning("parquet-export-failed", extra={"job": job["id"], "error": str(exc)})
+            job.update(status="failed", error=str(exc))
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+
+export_jobs = ExportJobs()
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export history to partitioned Parquet")
+    parser.add_argument("--from", dest="start", required=True, type=datetime.fromisoformat)
+    parser.add_argument("--to", dest="end", required=True, type=datetime.fromisoformat)
+    parser.add_argument("--out", required=True, help="output root directory")
+    parser.add_argument("--tables", default=",".join(TABLES))
+    parser.add_argument("--tickers", default="", help="comma-separated, default all")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    tickers = [ticker for ticker in args.tickers.split(",") if ticker] or None
+    stats = asyncio.run(
+        export_range(
+            _utc(args.start),
+            _utc(args.end),
+            args.out,
+            tables=[table for table in args.tables.split(",") if table],
+            tickers=tickers,
+        )
+    )
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
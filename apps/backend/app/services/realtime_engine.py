@@ -2,12 +2,14 @@ from __future__ import annotations
 
 import asyncio
 import logging
-import time
-from typing import Any, Dict, List, Set
+from typing import Any, Dict
 
-from app.adapters.massive_ws import run_massive_ws
+from app.adapters.massive_ws import WSMetrics, run_massive_ws
 from app.core.settings import settings
 from app.domain.features.microstructure import divergence_z, micro_chop, minute_thrust
+from app.domain.tile import Tile
+from app.services.merge_scheduler import merge_scheduler
+from app.services.recorder import EventRecorder
 from app.services.rings import (
     last_index_1m,
     last_index_1s,
@@ -16,35 +18,38 @@ from app.services.rings import (
     push_index_value,
     push_opt_quote,
 )
+from app.services.sharding import shard_membership
 from app.services.state_store import state_store
+from app.services.subscriptions import OptionSubscriptionManager, batch_params
 from app.services.tile_engine import merge_realtime_into_tile
 from app.ws.manager import ConnectionManager
 
 logger = logging.getLogger(__name__)
 
-_subscription_queue: asyncio.Queue[str] = asyncio.Queue()
-_known_subscriptions: set[str] = set()
-_subscription_lock = asyncio.Lock()
-_last_broadcast: Dict[str, float] = {}
-_contract_symbol_map: Dict[str, Set[str]] = {}
-
 ETF_INDEX = {"SPY": "SPX", "QQQ": "NDX"}
 INDEX_SYMBOLS = sorted(set(ETF_INDEX.values()))
-BROADCAST_INTERVAL = 0.2  # seconds (≈5 Hz)
-
+OPTION_RESYNC_SECONDS = 30
 
-async def _ensure_subscription(params: str) -> None:
-    if not params:
-        return
-    async with _subscription_lock:
-        if params in _known_subscriptions:
-            return
-        _known_subscriptions.add(params)
-    await _subscription_queue.put(params)
+subscription_manager = OptionSubscriptionManager(
+    settings.massive_subscription_batch_size, shards=settings.massive_options_ws_shards
+)
+stream_metrics: Dict[str, WSMetrics] = {}
 
 
 def _current_subscriptions() -> list[str]:
-    return list(_known_subscriptions)
+    return subscription_manager.snapshot_params()
+
+
+def _shard_subscriptions(shard: int):
+    return lambda: subscription_manager.snapshot_params(shard)
+
+
+def _stream_metrics(name: str) -> WSMetrics:
+    return stream_metrics.setdefault(name, WSMetrics(name=name))
+
+
+def ws_stats() -> dict[str, dict[str, Any]]:
+    return {name: metrics.to_dict() for name, metrics in sorted(stream_metrics.items())}
 
 
 def _index_snapshot_subscriptions() -> list[str]:
@@ -53,40 +58,15 @@ def _index_snapshot_subscriptions() -> list[str]:
         subs.append(f"AM.I:{idx}")
         subs.append(f"V.I:{idx}")
         subs.append(f"AS.I:{idx}")
-    return subs
-
-
-async def _sync_option_contracts() -> None:
-    while True:
-        states = await state_store.all_states()
-        contracts: set[str] = set()
-        mapping: Dict[str, Set[str]] = {}
-        for tile in states:
-            opts = tile.options or {}
-            bundle = opts.get("contracts") or {}
-            primary = bundle.get("primary")
-            backups: List[str] = bundle.get("backups") or []
-            for contract in [primary, *backups]:
-                if contract and contract.startswith("O:"):
-                    contracts.add(contract)
-                    mapping.setdefault(contract, set()).add(tile.symbol)
-        for contract in contracts:
-            await _ensure_subscription(f"Q.{contract}")
-        global _contract_symbol_map
-        _contract_symbol_map = mapping
-        await asyncio.sleep(30)
-
-
-async def _broadcast(symbol: str, tile_data: dict, manager: ConnectionManager) -> None:
-    now = time.monotonic()
-    last = _last_broadcast.get(symbol, 0.0)
-    if now - last < BROADCAST_INTERVAL:
-        return
-    _last_broadcast[symbol] = now
-    await manager.broadcast({"type": "tile", "data": tile_data})
+    return batch_params(subs, settings.massive_subscription_batch_size)
+
 
+async def _broadcast(tile: Tile, manager: ConnectionManager) -> None:
+    # No server-wide throttle: each client conflates to its own tier (app.ws.delivery).
+    await manager.broadcast_tile(tile)
 
-async def _handle_index_event(symbol: str, manager: ConnectionManager) -> None:
+
+async def _handle_index_event(symbol: str) -> None:
     idx_bars = [bar for _, bar in last_index_1m(symbol, 40)]
     idx_closes = [bar.get("c") for bar in idx_bars if bar.get("c") is not None]
     if len(idx_closes) < 6:
@@ -94,12 +74,12 @@ async def _handle_index_event(symbol: str, manager: ConnectionManager) -> None:
         returns = [(b - a) / a for a, b in zip(prices_1s, prices_1s[1:]) if a] if len(prices_1s) > 2 else []
         chop = micro_chop(returns)
         for etf, idx in ETF_INDEX.items():
-            if idx != symbol:
+            if idx != symbol or not shard_membership.owns(etf):
                 continue
             etf_state = await state_store.get_state(etf)
             etf_series = (etf_state.admin or {}).get("last_1m_closes") if etf_state else []
             divz = divergence_z(etf_series or idx_closes or [0.0], idx_closes or [0.0])
-            tile = await merge_realtime_into_tile(
+            merge_scheduler.submit(
                 etf,
                 {
                     "marketMicro": {
@@ -110,7 +90,6 @@ async def _handle_index_event(symbol: str, manager: ConnectionManager) -> None:
                     }
                 },
             )
-            await _broadcast(etf, tile.model_dump(), manager)
         return
 
     prices_1s = [price for _, price in last_index_1s(symbol, 120)]
@@ -123,12 +102,12 @@ async def _handle_index_event(symbol: str, manager: ConnectionManager) -> None:
     thrust = minute_thrust(idx_closes, 5)
 
     for etf, idx in ETF_INDEX.items():
-        if idx != symbol:
+        if idx != symbol or not shard_membership.owns(etf):
             continue
         etf_state = await state_store.get_state(etf)
         etf_series = (etf_state.admin or {}).get("last_1m_closes") if etf_state else []
         divz = divergence_z(etf_series or idx_closes, idx_closes)
-        tile = await merge_realtime_into_tile(
+        merge_scheduler.submit(
             etf,
             {
                 "marketMicro": {
@@ -139,14 +118,15 @@ async def _handle_index_event(symbol: str, manager: ConnectionManager) -> None:
                 }
             },
         )
-        await _broadcast(etf, tile.model_dump(), manager)
 
 
 def _quote_stats(contract: str) -> dict[str, Any] | None:
-    now_ms = int(time.time() * 1000)
-    window = [entry for entry in last_opt_quotes(contract, 600) if now_ms - entry[0] <= 60000]
-    if not window:
+    quotes = last_opt_quotes(contract, 600)
+    if not quotes:
         return None
+    # the window ends at the newest quote's own timestamp, so replays of old sessions match live
+    now_ms = quotes[-1][0]
+    window = [entry for entry in quotes if now_ms - entry[0] <= 60000]
     last_ts, last_doc = window[-1]
     nbbo_changes = 0
     for (_, prev), (_, curr) in zip(window, window[1:]):
@@ -167,41 +147,109 @@ async def _on_event(event: dict, manager: ConnectionManager) -> None:
     kind = event.get("kind")
     if kind == "index_value":
         push_index_value(event["symbol"], event.get("t"), event.get("c"))
-        await _handle_index_event(event["symbol"], manager)
+        await _handle_index_event(event["symbol"])
     elif kind == "index_1m":
         push_index_1m(event["symbol"], event.get("e"), {"o": event.get("o"), "h": event.get("h"), "l": event.get("l"), "c": event.get("c")})
-        await _handle_index_event(event["symbol"], manager)
+        await _handle_index_event(event["symbol"])
     elif kind == "opt_quote":
+        if not subscription_manager.is_live(event.get("contract")):
+            return
         push_opt_quote(event["contract"], event.get("t"), event)
-        await _handle_option_quote(event, manager)
+        await _handle_option_quote(event)
+
+
+async def _flush_merged(symbol: str, deltas: dict, manager: ConnectionManager) -> None:
+    tile = await merge_realtime_into_tile(symbol, deltas)
+    await _broadcast(tile, manager)
+
+
+async def _owned_states() -> list:
+    return [tile for tile in await state_store.all_states() if shard_membership.owns(tile.symbol)]
+
+
+def _observe_owned(symbol: str, tile) -> None:
+    subscription_manager.observe(symbol, tile if shard_membership.owns(symbol) else None)
+
+
+async def rebalance_subscriptions() -> None:
+    """Re-derive option subscriptions after the symbol shards move between pipeline workers."""
+
+    subscription_manager.replace_all(await _owned_states())
+
+
+def merge_stats() -> dict[str, dict[str, Any]]:
+    return merge_scheduler.stats()
 
 
 async def start_realtime(manager: ConnectionManager) -> None:
-    asyncio.create_task(_sync_option_contracts())
-    option_task = asyncio.create_task(
-        run_massive_ws(
-            lambda event: _on_event(event, manager),
-            _subscription_queue,
-            _current_subscriptions,
-            settings.massive_options_ws_url,
-        )
+    merge_scheduler.configure(
+        lambda symbol, deltas: _flush_merged(symbol, deltas, manager),
+        settings.realtime_merge_interval_ms / 1000,
     )
+    asyncio.create_task(merge_scheduler.run())
+    state_store.add_listener(_observe_owned)
+    subscription_manager.replace_all(await _owned_states())
+    asyncio.create_task(subscription_manager.run(_owned_states, OPTION_RESYNC_SECONDS))
+    recorder = _build_recorder()
+    on_event = _recording_handler(recorder, manager)
+    on_raw = recorder.record_raw if recorder and settings.realtime_record_raw else None
+    option_tasks = [
+        asyncio.create_task(
+            run_massive_ws(
+                on_event,
+                subscription_manager.queue_for(shard),
+                _shard_subscriptions(shard),
+                settings.massive_options_ws_url,
+                on_raw,
+                _stream_metrics(f"options-{shard}"),
+            )
+        )
+        for shard in range(subscription_manager.shard_count)
+    ]
     index_task = asyncio.create_task(
         run_massive_ws(
-            lambda event: _on_event(event, manager),
+            on_event,
             None,
             _index_snapshot_subscriptions,
             settings.massive_index_ws_url,
+            on_raw,
+            _stream_metrics("index"),
         )
     )
-    await asyncio.gather(option_task, index_task)
+    try:
+        await asyncio.gather(*option_tasks, index_task)
+    finally:
+        if recorder:
+            recorder.close()
+
+
+def _build_recorder() -> EventRecorder | None:
+    if not settings.realtime_record_path:
+        return None
+    recorder = EventRecorder(settings.realtime_record_path)
+    logger.info(
+        "realtime-recording",
+        extra={"path": str(recorder.path), "raw": settings.realtime_record_raw},
+    )
+    return recorder
+
+
+def _recording_handler(recorder: EventRecorder | None, manager: ConnectionManager):
+    if recorder is None or settings.realtime_record_raw:
+        return lambda event: _on_event(event, manager)
+
+    async def _handler(event: dict) -> None:
+        recorder.record_event(event)
+        await _on_event(event, manager)
+
+    return _handler
 
 
-async def _handle_option_quote(event: dict, manager: ConnectionManager) -> None:
+async def _handle_option_quote(event: dict) -> None:
     contract = event.get("contract")
     if not contract:
         return
-    symbols = _contract_symbol_map.get(contract)
+    symbols = subscription_manager.symbols_for(contract)
     if not symbols:
         return
     stats = _quote_stats(contract)
@@ -209,5 +257,4 @@ async def _handle_option_quote(event: dict, manager: ConnectionManager) -> None:
         return
     stats.update({"nbbo": event.get("nbbo"), "spread_pct": event.get("spread_pct") or stats.get("spread_pct")})
     for symbol in symbols:
-        tile = await merge_realtime_into_tile(symbol, {"options": stats})
-        await _broadcast(symbol, tile.model_dump(), manager)
+        merge_scheduler.submit(symbol, {"options": stats})
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import gzip
+import logging
+import time
+from pathlib import Path
+from typing import IO, Any, Iterator
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+EVENT = "e"
+RAW = "r"
+
+
+def _open(path: Path, mode: str) -> IO[bytes]:
+    if path.suffix == ".gz":
+        return gzip.open(path, mode)  # type: ignore[return-value]
+    return open(path, mode)
+
+
+class EventRecorder:
+    """Append-only NDJSON log of Massive WS traffic: ``[offset_ms, "e"|"r", payload]`` per line."""
+
+    def __init__(self, path: str | Path, *, flush_every: int = 200) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh: IO[bytes] | None = _open(self._path, "ab")
+        self._started = time.monotonic()
+        self._flush_every = max(flush_every, 1)
+        self._pending = 0
+        self.records = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _offset_ms(self) -> int:
+        return int((time.monotonic() - self._started) * 1000)
+
+    def _write(self, kind: str, payload: Any) -> None:
+        if self._fh is None:
+            return
+        self._fh.write(orjson.dumps([self._offset_ms(), kind, payload]))
+        self._fh.write(b"\n")
+        self.records += 1
+        self._pending += 1
+        if self._pending >= self._flush_every:
+            self._fh.flush()
+            self._pending = 0
+
+    def record_event(self, event: dict) -> None:
+        self._write(EVENT, event)
+
+    def record_raw(self, frame: str | bytes) -> None:
+        if isinstance(frame, bytes):
+            frame = frame.decode("utf-8", errors="replace")
+        self._write(RAW, frame)
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.flush()
+            self._fh.close()
+            self._fh = None
+
+
+def read_recording(path: str | Path) -> Iterator[tuple[int, str, Any]]:
+    with _open(Path(path), "rb") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                offset, kind, payload = orjson.loads(line)
+            except (orjson.JSONDecodeError, ValueError):
+                logger.warning("recording-bad-line", extra={"path": str(path)})
+                continue
+            yield int(offset), kind, payload
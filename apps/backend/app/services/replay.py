@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Iterable
+
+import numpy as np
+
+from app.adapters.massive_ws import _normalize_event
+from app.core.settings import settings
+from app.domain.options.buckets import contract_metadata
+from app.services import realtime_engine
+from app.services.merge_scheduler import merge_scheduler
+from app.services.recorder import EVENT, RAW, read_recording
+from app.ws.manager import ConnectionManager
+
+
+class ReplayManager(ConnectionManager):
+    """Connection manager without sockets that only counts what would have been broadcast."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.counts: Counter[str] = Counter()
+        self.symbols: Counter[str] = Counter()
+
+    async def broadcast(self, payload: dict) -> None:
+        self.counts[payload.get("type", "unknown")] += 1
+        data = payload.get("data")
+        if isinstance(data, dict) and data.get("symbol"):
+            self.symbols[data["symbol"]] += 1
+
+    async def broadcast_tile(self, tile) -> None:
+        self.counts["tile"] += 1
+        self.symbols[tile.symbol] += 1
+
+
+@dataclass
+class ReplayReport:
+    path: str
+    speed: str
+    frames: int = 0
+    events: int = 0
+    duration_s: float = 0.0
+    events_per_sec: float = 0.0
+    merges: int = 0
+    merge_latency_ms: dict[str, float | None] = field(default_factory=dict)
+    broadcasts: dict[str, int] = field(default_factory=dict)
+    per_symbol: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _events_from(kind: str, payload: Any) -> list[dict]:
+    if kind == EVENT:
+        return [payload] if isinstance(payload, dict) else []
+    if kind != RAW:
+        return []
+    try:
+        decoded = json.loads(payload)
+    except (TypeError, json.JSONDecodeError):
+        return []
+    batch = decoded if isinstance(decoded, list) else [decoded]
+    events: list[dict] = []
+    for msg in batch:
+        if isinstance(msg, dict):
+            event = _normalize_event(msg)
+            if event:
+                events.append(event)
+    return events
+
+
+def _latency_summary(values: Iterable[float]) -> dict[str, float | None]:
+    data = np.asarray(list(values), dtype=float)
+    if data.size == 0:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    p50, p90, p99 = np.percentile(data, [50, 90, 99])
+    return {
+        "p50": round(float(p50), 3),
+        "p90": round(float(p90), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(data.max()), 3),
+    }
+
+
+async def _seed_contracts(path: str | Path) -> None:
+    """Mark every recorded option contract live, mapped to its underlying root."""
+
+    by_symbol: dict[str, list[str]] = {}
+    for _, kind, payload in read_recording(path):
+        for event in _events_from(kind, payload):
+            contract = event.get("contract")
+            if event.get("kind") != "opt_quote" or not contract:
+                continue
+            root = contract_metadata(contract).get("root") or contract
+            contracts = by_symbol.setdefault(root, [])
+            if contract not in contracts:
+                contracts.append(contract)
+    tiles = [
+        SimpleNamespace(
+            symbol=symbol, options={"contracts": {"primary": None, "backups": contracts}}
+        )
+        for symbol, contracts in by_symbol.items()
+    ]
+    manager = realtime_engine.subscription_manager
+    manager.replace_all(tiles)
+    await manager.sync()
+    for shard in range(manager.shard_count):
+        queue = manager.queue_for(shard)
+        while not queue.empty():
+            queue.get_nowait()
+
+
+async def replay(
+    path: str | Path,
+    *,
+    speed: float = 0.0,
+    manager: ReplayManager | None = None,
+    interval: float | None = None,
+) -> ReplayReport:
+    """Feed a recording through ``realtime_engine._on_event``.
+
+    ``speed=0`` replays as fast as possible.
+    """
+
+    manager = manager or ReplayManager()
+    interval = settings.realtime_merge_interval_ms / 1000 if interval is None else interval
+    interval_ms = max(interval * 1000, 1.0)
+    merge_scheduler.configure(
+        lambda symbol, deltas: realtime_engine._flush_merged(symbol, deltas, manager), interval
+    )
+    merge_scheduler.reset_stats()
+    await _seed_contracts(path)
+
+    report = ReplayReport(path=str(path), speed="max" if speed <= 0 else f"{speed:g}x")
+    scheduler_task = asyncio.create_task(merge_scheduler.run()) if speed > 0 else None
+    next_flush_ms = interval_ms
+    started = time.perf_counter()
+    try:
+        for offset, kind, payload in read_recording(path):
+            if speed > 0:
+                delay = offset / 1000 / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif offset >= next_flush_ms:
+                # Max speed: advance a virtual clock so merges still happen once per interval.
+                await merge_scheduler.flush_pending()
+                next_flush_ms = (offset // interval_ms + 1) * interval_ms
+            report.frames += 1
+            for event in _events_from(kind, payload):
+                await realtime_engine._on_event(event, manager)
+                report.events += 1
+        await merge_scheduler.flush_pending()
+    finally:
+        if scheduler_task:
+            scheduler_task.cancel()
+            try:
+                await scheduler_task
+            except asyncio.CancelledError:
+                pass
+
+    report.duration_s = round(time.perf_counter() - started, 4)
+    report.events_per_sec = (
+        round(report.events / report.duration_s, 1) if report.duration_s else 0.0
+    )
+    report.per_symbol = merge_scheduler.stats()
+    report.merges = sum(stats["merges_out"] for stats in report.per_symbol.values())
+    report.merge_latency_ms = _latency_summary(merge_scheduler.latencies())
+    report.broadcasts = dict(manager.counts)
+    return report
+
+
+def _parse_speed(value: str) -> float:
+    if value.lower() in {"max", "0"}:
+        return 0.0
+    return float(value.lower().removesuffix("x"))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded Massive WS session")
+    parser.add_argument("path", help="recording written by REALTIME_RECORD_PATH")
+    parser.add_argument("--speed", default="max", help="1x, 10x, ... or max")
+    parser.add_argument("--interval-ms", type=int, default=None, help="merge interval override")
+    args = parser.parse_args(argv)
+    interval = args.interval_ms / 1000 if args.interval_ms is not None else None
+    report = asyncio.run(replay(args.path, speed=_parse_speed(args.speed), interval=interval))
+    print(json.dumps(report.to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
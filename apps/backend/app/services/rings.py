@@ -29,6 +29,10 @@ def push_opt_quote(contract: str, ts_ms: int | None, payload: dict, cap: int = 6
     ring.append((ts_ms, payload))
 
 
+def drop_opt_quotes(contract: str) -> None:
+    _option_quotes.pop(contract, None)
+
+
 def last_index_1s(symbol: str, n: int = 120) -> List[Tuple[int, float]]:
     data = list(_index_1s.get(symbol, ()))
     return data[-n:]
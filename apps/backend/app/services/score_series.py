@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.db.models import ScoreRollup
+from app.db.session import async_session
+from app.domain.scoring.probability import BAND_LABELS
+
+logger = logging.getLogger(__name__)
+
+# one point per second covers a 6.5h session
+CAPACITY = 23_400
+RESOLUTION_SECONDS = 1.0
+INTERVALS = {"1m": 60, "5m": 300}
+# 1m points carried in tile.history for sparklines
+HISTORY_POINTS = 20
+FLUSH_SECONDS = 60.0
+
+BAND_CODES = {label: code for code, label in enumerate(BAND_LABELS.tolist())}
+RollupKey = tuple[str, str, datetime]  # (ticker, interval, bucket start)
+# insert/least/greatest per dialect; sqlite's two-argument min()/max() are its LEAST/GREATEST
+_UPSERTS = {
+    "postgresql": (postgresql.insert, func.least, func.greatest),
+    "sqlite": (sqlite.insert, func.min, func.max),
+}
+
+
+class ScoreSeries:
+    """Fixed-size ring of (ts, score, band) for one symbol's UTC day, oldest overwritten first.
+
+    Points less than ``RESOLUTION_SECONDS`` apart replace the previous one.
+    """
+
+    def __init__(self, capacity: int = CAPACITY) -> None:
+        self.ts = np.zeros(capacity, dtype=np.float64)
+        self.score = np.zeros(capacity, dtype=np.float32)
+        self.band = np.zeros(capacity, dtype=np.int8)
+        self.size = 0
+        self._next = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def last_ts(self) -> float | None:
+        return float(self.ts[self._next - 1]) if self.size else None
+
+    def append(self, ts: float, score: float, band: int) -> None:
+        if self.size and ts - self.ts[self._next - 1] < RESOLUTION_SECONDS:
+            slot = self._next - 1
+        else:
+            slot = self._next
+            self._next = (self._next + 1) % len(self.ts)
+            self.size = min(self.size + 1, len(self.ts))
+        self.ts[slot], self.score[slot], self.band[slot] = ts, score, band
+
+    def arrays(self, last: int | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Copies of the newest ``last`` points (all by default), oldest first."""
+
+        count = self.size if last is None else min(last, self.size)
+        order = (np.arange(self._next - count, self._next)) % len(self.ts)
+        return self.ts[order], self.score[order], self.band[order]
+
+    def clear(self) -> None:
+        self.size = self._next = 0
+
+
+def _bucket(ts: float, seconds: int) -> datetime:
+    return datetime.fromtimestamp(ts - ts % seconds, tz=timezone.utc)
+
+
+def _combine(newer: dict[str, Any], older: dict[str, Any]) -> None:
+    newer["min"] = min(newer["min"], older["min"])
+    newer["max"] = max(newer["max"], older["max"])
+    newer["n"] += older["n"]
+
+
+def _upsert(dialect: str, pending: Dict[RollupKey, dict[str, Any]]):
+    """Fold each bucket's points since the last flush into its stored row.
+
+    A bucket can be written by more than one process (a restart or shard handoff mid-bucket),
+    so stored min/max/n are combined rather than replaced; last/band come from this newer write.
+    """
+
+    insert, least, greatest = _UPSERTS[dialect]
+    stmt = insert(ScoreRollup).values(
+        [
+            {
+                "ticker": ticker,
+                "interval": interval,
+                "ts": ts,
+                "score_min": bucket["min"],
+                "score_max": bucket["max"],
+                "score_last": bucket["last"],
+                "band": bucket["band"],
+                "n": bucket["n"],
+            }
+            for (ticker, interval, ts), bucket in pending.items()
+        ]
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[ScoreRollup.ticker, ScoreRollup.interval, ScoreRollup.ts],
+        set_={
+            "score_min": least(ScoreRollup.score_min, stmt.excluded.score_min),
+            "score_max": greatest(ScoreRollup.score_max, stmt.excluded.score_max),
+            "score_last": stmt.excluded.score_last,
+            "band": stmt.excluded.band,
+            "n": ScoreRollup.n + stmt.excluded.n,
+        },
+    )
+
+
+class ScoreSeriesStore:
+    """Intraday score series per symbol, rolled up as points arrive into 1m/5m min/max/last
+    buckets; ``flush`` folds the points recorded since the previous flush into ``score_rollups``.
+    """
+
+    def __init__(self, session_factory=None, capacity: int = CAPACITY) -> None:
+        self._session = session_factory or async_session
+        self._capacity = capacity
+        self._series: Dict[str, ScoreSeries] = {}
+        # per-bucket aggregates of the points not yet flushed
+        self._buckets: Dict[RollupKey, dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+
+    def record(
+        self, symbol: str, probability: float, band: str, at: datetime | None = None
+    ) -> None:
+        ts = (at or datetime.now(timezone.utc)).timestamp()
+        score = round(probability * 100, 2)
+        series = self._series.get(symbol)
+        if series is None:
+            series = self._series[symbol] = ScoreSeries(self._capacity)
+        elif series.size and series.last_ts // 86_400 != ts // 86_400:
+            series.clear()
+        series.append(ts, score, BAND_CODES.get(band, 0))
+        for interval, seconds in INTERVALS.items():
+            key = (symbol, interval, _bucket(ts, seconds))
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = {
+                    "min": score,
+                    "max": score,
+                    "last": score,
+                    "band": band,
+                    "n": 1,
+                }
+            else:
+                bucket["min"] = min(bucket["min"], score)
+                bucket["max"] = max(bucket["max"], score)
+                bucket.update(last=score, band=band, n=bucket["n"] + 1)
+
+    def series(self, symbol: str) -> list[dict[str, Any]]:
+        series = self._series.get(symbol)
+        if series is None:
+            return []
+        ts, score, band = series.arrays()
+        return [
+            {
+                "ts": datetime.fromtimestamp(t, tz=timezone.utc).isoformat(),
+                "score": round(float(s), 2),
+                "band": str(BAND_LABELS[b]),
+            }
+            for t, s, b in zip(ts.tolist(), score.tolist(), band.tolist())
+        ]
+
+    def history(self, symbol: str, points: int = HISTORY_POINTS) -> list[dict[str, Any]]:
+        """The last ``points`` 1m closing scores, the tile's sparkline history."""
+
+        series = self._series.get(symbol)
+        if series is None:
+            return []
+        # at most one point per second, so this tail holds the last ``points`` minutes
+        ts, score, _ = series.arrays(points * 60)
+        minutes = ts // 60
+        closing = np.flatnonzero(np.append(minutes[1:] != minutes[:-1], True))[-points:]
+        return [
+            {
+                "ts": datetime.fromtimestamp(minutes[i] * 60, tz=timezone.utc).isoformat(),
+                "score": round(float(score[i]), 2),
+            }
+            for i in closing
+        ]
+
+    async def flush(self) -> int:
+        async with self._lock:
+            pending, self._buckets = self._buckets, {}
+            if not pending:
+                return 0
+            try:
+                async with self._session() as session:
+                    await session.execute(_upsert(session.bind.dialect.name, pending))
+                    await session.commit()
+            except Exception as exc:  # pragma: no cover - optional DB path
+                # put today's unwritten points back under anything recorded since; earlier
+                # days' buckets are closed and dropped, so an outage holds at most one day
+                today = _bucket(datetime.now(timezone.utc).timestamp(), 86_400)
+                dropped = 0
+                for key, bucket in pending.items():
+                    if key[2] < today:
+                        dropped += 1
+                    elif key in self._buckets:
+                        _combine(self._buckets[key], bucket)
+                    else:
+                        self._buckets[key] = bucket
+                logger.warning(
+                    "score-rollup-flush-failed", extra={"error": str(exc), "dropped": dropped}
+                )
+                return 0
+            return len(pending)
+
+    async def run(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(FLUSH_SECONDS)
+                await self.flush()
+        finally:
+            await self.flush()
+
+    async def rollups(
+        self, tickers: Iterable[str], interval: str, start: datetime, end: datetime
+    ) -> Dict[str, list[dict[str, Any]]]:
+        """Persisted buckets starting in [start, end) per ticker, oldest first."""
+
+        stmt = (
+            select(ScoreRollup)
+            .where(
+                ScoreRollup.ticker.in_(list(tickers)),
+                ScoreRollup.interval == interval,
+                ScoreRollup.ts >= start,
+                ScoreRollup.ts < end,
+            )
+            .order_by(ScoreRollup.ticker, ScoreRollup.ts)
+        )
+        out: Dict[str, list[dict[str, Any]]] = {}
+        async with self._session() as session:
+            for row in (await session.execute(stmt)).scalars():
+                ts = row.ts if row.ts.tzinfo else row.ts.replace(tzinfo=timezone.utc)
+                out.setdefault(row.ticker, []).append(
+                    {
+                        "ts": ts.isoformat(),
+                        "min": row.score_min,
+                        "max": row.score_max,
+                        "last": row.score_last,
+                        "band": row.band,
+                        "n": row.n,
+                    }
+                )
+        return out
+
+
+score_series = ScoreSeriesStore()
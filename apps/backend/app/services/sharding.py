@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Iterable
+
+from app.services.hashring import HashRing
+
+logger = logging.getLogger(__name__)
+
+MEMBERS_KEY = "kcu:pipeline:members"
+MEMBER_TTL_SECONDS = 15.0
+HEARTBEAT_SECONDS = 5.0
+
+
+class ShardMembership:
+    """Maps watchlist symbols onto live pipeline workers with a consistent hash ring.
+
+    Workers heartbeat into a Redis sorted set; the ring is rebuilt from the members seen within
+    ``MEMBER_TTL_SECONDS`` so a worker joining or dying only moves ~1/N of the symbols. Until
+    ``join`` is called the process owns every symbol.
+    """
+
+    def __init__(self) -> None:
+        self.worker_id: str | None = None
+        self._redis = None
+        self._key = MEMBERS_KEY
+        self._members: list[str] = []
+        self._ring: HashRing[str] | None = None
+        self.rebalances = 0
+
+    @property
+    def members(self) -> list[str]:
+        return list(self._members)
+
+    def owns(self, symbol: str) -> bool:
+        return self._ring is None or self._ring.node_for(symbol) == self.worker_id
+
+    def owned(self, symbols: Iterable[str]) -> list[str]:
+        return [symbol for symbol in symbols if self.owns(symbol)]
+
+    def _set_members(self, members: Iterable[str]) -> bool:
+        live = set(members)
+        if self.worker_id:
+            live.add(self.worker_id)
+        members = sorted(live)
+        if members == self._members:
+            return False
+        self._members = members
+        self._ring = HashRing(members)
+        self.rebalances += 1
+        logger.info(
+            "pipeline-shards-rebalanced", extra={"worker": self.worker_id, "members": members}
+        )
+        return True
+
+    async def join(self, redis, worker_id: str, key: str = MEMBERS_KEY) -> None:
+        self._redis = redis
+        self._key = key
+        self.worker_id = worker_id
+        await self.heartbeat()
+
+    async def heartbeat(self) -> bool:
+        now = time.time()
+        await self._redis.zadd(self._key, {self.worker_id: now})
+        await self._redis.zremrangebyscore(self._key, "-inf", now - MEMBER_TTL_SECONDS)
+        raw = await self._redis.zrange(self._key, 0, -1)
+        return self._set_members(m.decode() if isinstance(m, bytes) else m for m in raw)
+
+    async def run(self, on_change: Callable[[], Awaitable[None]] | None = None) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            try:
+                changed = await self.heartbeat()
+            except Exception as exc:  # pragma: no cover - redis outage
+                logger.warning("pipeline-heartbeat-failed", extra={"error": str(exc)})
+                continue
+            if changed and on_change:
+                await on_change()
+
+    async def leave(self) -> None:
+        if self._redis is not None and self.worker_id:
+            await self._redis.zrem(self._key, self.worker_id)
+
+    def stats(self) -> dict:
+        return {"worker": self.worker_id, "members": self.members, "rebalances": self.rebalances}
+
+
+shard_membership = ShardMembership()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator
+
+from sqlalchemy import delete, select
+
+from app.db.models import PercentileSketch
+from app.db.session import async_session
+from app.domain.options.buckets import ETF_INDEX, contract_metadata, option_bucket
+from app.domain.quantiles import KLLSketch
+
+logger = logging.getLogger(__name__)
+
+# baseline metric -> field in Snapshot.options / Snapshot.market_micro
+OPTION_METRICS = {
+    "spread_pct": "spread_pct",
+    "flicker_per_sec": "flicker_per_sec",
+    "iv_rank": "ivr",
+    "vo_vol": "vo_vol",
+}
+INDEX_METRICS = {
+    "minute_thrust": "minuteThrust",
+    "micro_chop": "microChop",
+    "divergence_z": "divergenceZ",
+    "sec_variance": "secVariance",
+}
+# baseline metric -> typed Snapshot column
+METRIC_COLUMNS = {
+    "spread_pct": "spread_pct",
+    "flicker_per_sec": "flicker_per_sec",
+    "iv_rank": "ivr",
+    "vo_vol": "vo_vol",
+    "minute_thrust": "minute_thrust",
+    "micro_chop": "micro_chop",
+    "divergence_z": "divergence_z",
+    "sec_variance": "sec_variance",
+}
+WINDOW_DAYS = 90
+FLUSH_SECONDS = 60.0
+
+SketchKey = tuple[date, str, str]  # (day, metric, bucket)
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _number(value: Any) -> float | None:
+    return None if value is None else float(value)
+
+
+def snapshot_columns(
+    ticker: str, options: dict[str, Any] | None, market_micro: dict[str, Any] | None
+) -> dict[str, Any]:
+    """Typed ``Snapshot`` columns (option bucket + baseline metrics) pulled out of the JSON."""
+
+    columns: dict[str, Any] = {"bucket_key": None}
+    options, market_micro = options or {}, market_micro or {}
+    if options:
+        primary = (options.get("contracts") or {}).get("primary")
+        metadata = contract_metadata(primary)
+        columns["bucket_key"] = option_bucket(
+            ticker, options.get("delta_target"), metadata.get("dte"), metadata.get("side")
+        )
+    for metric, field in OPTION_METRICS.items():
+        columns[METRIC_COLUMNS[metric]] = _number(options.get(field))
+    for metric, field in INDEX_METRICS.items():
+        columns[METRIC_COLUMNS[metric]] = _number(market_micro.get(field))
+    return columns
+
+
+def snapshot_observations(ticker: str, columns: dict[str, Any]) -> Iterator[tuple[str, str, float]]:
+    """(metric, bucket, value) triples one snapshot's typed columns contribute to the baselines."""
+
+    if columns.get("bucket_key"):
+        for metric in OPTION_METRICS:
+            value = columns.get(METRIC_COLUMNS[metric])
+            if value is not None:
+                yield metric, columns["bucket_key"], value
+    index_bucket = f"IDX:{ETF_INDEX.get(ticker, ticker)}"
+    for metric in INDEX_METRICS:
+        value = columns.get(METRIC_COLUMNS[metric])
+        if value is not None:
+            yield metric, index_bucket, value
+
+
+class SketchStore:
+    """Per-day KLL sketches fed as snapshots are written, flushed to ``percentile_sketches``.
+
+    Every process writes its own rows (``source``), so sharded pipeline workers never
+    overwrite each other; readers merge all sources over the window.
+    """
+
+    def __init__(self, session_factory=None, source: str | None = None) -> None:
+        self._session = session_factory or async_session
+        self.source = source or f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._sketches: Dict[SketchKey, KLLSketch] = {}
+        self._dirty: set[SketchKey] = set()
+        self._lock = asyncio.Lock()
+
+    def observe(self, ticker: str, columns: dict[str, Any], day: date | None = None) -> None:
+        """Add a snapshot, given as its ``snapshot_columns``."""
+
+        day = day or _today()
+        for metric, bucket, value in snapshot_observations(ticker, columns):
+            key = (day, metric, bucket)
+            sketch = self._sketches.get(key)
+            if sketch is None:
+                sketch = self._sketches[key] = KLLSketch()
+            sketch.update(value)
+            self._dirty.add(key)
+
+    async def flush(self) -> int:
+        async with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            if not dirty:
+                return 0
+            now = datetime.now(timezone.utc)
+            try:
+                async with self._session() as session:
+                    for day, metric, bucket in dirty:
+                        sketch = self._sketches[(day, metric, bucket)]
+                        await session.merge(
+                            PercentileSketch(
+                                metric=metric,
+                                bucket_key=bucket,
+                                day=day,
+                                source=self.source,
+                                n=sketch.n,
+                                sketch=sketch.to_bytes(),
+                                updated_at=now,
+                            )
+                        )
+                    await session.commit()
+            except Exception as exc:  # pragma: no cover - optional DB path
+                self._dirty |= dirty
+                logger.warning("sketch-flush-failed", extra={"error": str(exc)})
+                return 0
+            # earlier days are final once written
+            today = _today()
+            for key in [key for key in self._sketches if key[0] < today and key not in self._dirty]:
+                del self._sketches[key]
+            return len(dirty)
+
+    async def run(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(FLUSH_SECONDS)
+                await self.flush()
+        finally:
+            await self.flush()
+
+    async def window(
+        self, metrics: Iterable[str], days: int = WINDOW_DAYS
+    ) -> Dict[tuple[str, str], KLLSketch]:
+        """Merge every source's daily sketches of the last ``days`` days per (metric, bucket)."""
+
+        start = _today() - timedelta(days=days - 1)
+        stmt = select(
+            PercentileSketch.metric, PercentileSketch.bucket_key, PercentileSketch.sketch
+        ).where(PercentileSketch.day >= start, PercentileSketch.metric.in_(list(metrics)))
+        merged: Dict[tuple[str, str], KLLSketch] = {}
+        async with self._session() as session:
+            for metric, bucket, blob in await session.execute(stmt):
+                sketch = KLLSketch.from_bytes(blob)
+                if (metric, bucket) in merged:
+                    merged[(metric, bucket)].merge(sketch)
+                else:
+                    merged[(metric, bucket)] = sketch
+        return merged
+
+    async def prune(self, days: int = WINDOW_DAYS) -> None:
+        start = _today() - timedelta(days=days - 1)
+        async with self._session() as session:
+            await session.execute(delete(PercentileSketch).where(PercentileSketch.day < start))
+            await session.commit()
+
+
+sketch_store = SketchStore()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, Sequence, TypeVar
+
+import numpy as np
+
+from app.core.settings import settings
+
+Row = TypeVar("Row")
+
+
+@dataclass(frozen=True)
+class _Written:
+    ts: datetime
+    probability: float
+    band: str
+    penalties: frozenset[str]
+    contract: str | None
+
+
+def _primary_contract(tile: Any) -> str | None:
+    return ((tile.options or {}).get("contracts") or {}).get("primary")
+
+
+class SnapshotGate:
+    """Decides which pipeline cycles become ``snapshots`` rows.
+
+    A row is written on a material change against the last row written for the symbol (band,
+    probability by at least ``probability_step``, penalty set, primary contract), and otherwise
+    as a keyframe once ``keyframe_seconds`` have passed, so stored rows are never further apart
+    than that while the pipeline runs. ``forward_fill`` rebuilds the per-cycle series.
+    """
+
+    def __init__(
+        self, keyframe_seconds: int | None = None, probability_step: float | None = None
+    ) -> None:
+        self.keyframe = timedelta(seconds=keyframe_seconds or settings.snapshot_keyframe_seconds)
+        self.probability_step = (
+            settings.snapshot_probability_step if probability_step is None else probability_step
+        )
+        self._last: Dict[str, _Written] = {}
+
+    def reason(self, symbol: str, tile: Any, now: datetime) -> str | None:
+        """Why this cycle should be written, or ``None`` when it repeats the last row."""
+
+        last = self._last.get(symbol)
+        if last is None:
+            return "first"
+        if now - last.ts >= self.keyframe:
+            return "keyframe"
+        if tile.band.label != last.band:
+            return "band"
+        if abs(tile.probability_to_action - last.probability) >= self.probability_step:
+            return "probability"
+        if frozenset(tile.penalties or {}) != last.penalties:
+            return "penalties"
+        if _primary_contract(tile) != last.contract:
+            return "contract"
+        return None
+
+    def mark(self, symbol: str, tile: Any, now: datetime) -> None:
+        """Record a committed row; only then do later cycles compare against it."""
+
+        self._last[symbol] = _Written(
+            ts=now,
+            probability=tile.probability_to_action,
+            band=tile.band.label,
+            penalties=frozenset(tile.penalties or {}),
+            contract=_primary_contract(tile),
+        )
+
+    def reset(self) -> None:  # pragma: no cover - testing helper
+        self._last = {}
+
+
+def forward_fill(
+    rows: Sequence[Row],
+    times: Sequence[datetime],
+    start: datetime,
+    end: datetime,
+    step: timedelta,
+    max_gap: timedelta,
+) -> Iterator[tuple[datetime, Row]]:
+    """``(grid ts, row)`` for every ``step`` in [start, end), each row being the last one stored
+    at or before that point.
+
+    ``rows`` are ordered by ``times``; include the last row before ``start`` to fill the head.
+    Points more than ``max_gap`` past their row are skipped, since keyframes bound the distance
+    between rows and a longer silence means the pipeline was not running.
+    """
+
+    if not rows:
+        return
+    origin = start.timestamp()
+    stamps = np.fromiter((ts.timestamp() for ts in times), dtype=np.float64, count=len(times))
+    grid = np.arange(origin, end.timestamp(), step.total_seconds())
+    index = np.searchsorted(stamps, grid, side="right") - 1
+    live = (index >= 0) & (grid - stamps[np.maximum(index, 0)] <= max_gap.total_seconds())
+    for offset, i in zip(np.flatnonzero(live).tolist(), index[live].tolist()):
+        yield start + offset * step, rows[i]
+
+
+snapshot_gate = SnapshotGate()
@@ -4,13 +4,13 @@ import uuid
 from datetime import datetime, timezone
 from typing import Any
 
-from app.domain.types import TileState
+from app.domain.tile import Tile
 
 _snapshots: list[dict[str, Any]] = []
 
 
-def persist_snapshot(tile: TileState) -> uuid.UUID:
-    record = tile.model_dump()
+def persist_snapshot(tile: Tile) -> uuid.UUID:
+    record = dict(tile.to_public())
     record["id"] = str(uuid.uuid4())
     record["ts"] = datetime.now(timezone.utc).isoformat()
     _snapshots.append(record)
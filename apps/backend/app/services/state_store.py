@@ -1,28 +1,139 @@
 from __future__ import annotations
 
-import asyncio
-from typing import Dict
+import logging
+from typing import Callable, Dict, List
 
+import orjson
+
+from app.core.redis import get_redis
+from app.core.settings import settings
+from app.domain.tile import Tile, as_tile
 from app.domain.types import TileState
+from app.services.locks import KeyedLocks
+
+logger = logging.getLogger(__name__)
+
+StateListener = Callable[[str, Tile | None], None]
+
+TILES_KEY = "kcu:tiles"
+VERSIONS_KEY = "kcu:tiles:version"
+
+# Bump the version and store it in front of the tile JSON ("<version>|<json>") in one step, so a
+# reader always gets a tile together with the version it was written under.
+_SET_SCRIPT = """
+local version = redis.call('HINCRBY', KEYS[2], ARGV[1], 1)
+redis.call('HSET', KEYS[1], ARGV[1], version .. '|' .. ARGV[2])
+return version
+"""
+
+_REMOVE_SCRIPT = """
+local removed = redis.call('HDEL', KEYS[1], ARGV[1])
+if removed == 1 then redis.call('HINCRBY', KEYS[2], ARGV[1], 1) end
+return removed
+"""
 
 
 class StateStore:
+    """Tiles keyed by symbol.
+
+    Writers replace whole ``Tile`` objects and never mutate a stored one, so readers take no
+    lock: whatever they get back is an immutable snapshot. Read-modify-write callers serialize per
+    symbol through ``lock(symbol)``.
+    """
+
     def __init__(self) -> None:
-        self._states: Dict[str, TileState] = {}
-        self._lock = asyncio.Lock()
+        self._states: Dict[str, Tile] = {}
+        self._versions: Dict[str, int] = {}
+        self._listeners: List[StateListener] = []
+        self.lock = KeyedLocks()
+
+    def add_listener(self, listener: StateListener) -> None:
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def _notify(self, symbol: str, state: Tile | None) -> None:
+        for listener in self._listeners:
+            try:
+                listener(symbol, state)
+            except Exception as exc:  # pragma: no cover - listeners must not break writes
+                logger.warning("state-listener-failed", extra={"symbol": symbol, "error": str(exc)})
+
+    async def set_state(self, symbol: str, state: Tile | TileState) -> Tile:
+        state = as_tile(state)
+        self._versions[symbol] = self._versions.get(symbol, 0) + 1
+        state.version = self._versions[symbol]
+        self._states[symbol] = state
+        self._notify(symbol, state)
+        return state
+
+    async def remove_state(self, symbol: str) -> None:
+        removed = self._states.pop(symbol, None)
+        if removed is not None:
+            self._versions[symbol] = self._versions.get(symbol, 0) + 1
+            self.lock.discard(symbol)
+            self._notify(symbol, None)
 
-    async def set_state(self, symbol: str, state: TileState) -> TileState:
-        async with self._lock:
-            self._states[symbol] = state
+    async def get_state(self, symbol: str) -> Tile | None:
+        return self._states.get(symbol)
+
+    async def all_states(self) -> list[Tile]:
+        return list(self._states.values())
+
+    async def version(self, symbol: str) -> int:
+        return self._versions.get(symbol, 0)
+
+
+class RedisStateStore(StateStore):
+    """Tiles shared across processes: one Redis hash of tile JSON plus a per-symbol version hash.
+
+    Listeners still fire only in the process that wrote the tile (the pipeline owner).
+    """
+
+    def __init__(self, redis, tiles_key: str = TILES_KEY, versions_key: str = VERSIONS_KEY) -> None:
+        super().__init__()
+        self._redis = redis
+        self._keys = [tiles_key, versions_key]
+        self._set_script = redis.register_script(_SET_SCRIPT)
+        self._remove_script = redis.register_script(_REMOVE_SCRIPT)
+
+    async def set_state(self, symbol: str, state: Tile | TileState) -> Tile:
+        state = as_tile(state)
+        state.version = int(
+            await self._set_script(keys=self._keys, args=[symbol, orjson.dumps(state.to_public())])
+        )
+        self._notify(symbol, state)
         return state
 
-    async def get_state(self, symbol: str) -> TileState | None:
-        async with self._lock:
-            return self._states.get(symbol)
+    async def remove_state(self, symbol: str) -> None:
+        removed = await self._remove_script(keys=self._keys, args=[symbol])
+        if removed:
+            self.lock.discard(symbol)
+            self._notify(symbol, None)
+
+    async def get_state(self, symbol: str) -> Tile | None:
+        raw = await self._redis.hget(self._keys[0], symbol)
+        return _decode(raw) if raw else None
+
+    async def all_states(self) -> list[Tile]:
+        rows = await self._redis.hgetall(self._keys[0])
+        return [_decode(raw) for raw in rows.values()]
+
+    async def version(self, symbol: str) -> int:
+        raw = await self._redis.hget(self._keys[1], symbol)
+        return int(raw) if raw else 0
+
+
+def _decode(raw: bytes) -> Tile:
+    version, _, body = raw.partition(b"|")
+    tile = Tile.from_public(orjson.loads(body))
+    tile.version = int(version)
+    return tile
+
 
-    async def all_states(self) -> list[TileState]:
-        async with self._lock:
-            return list(self._states.values())
+def build_state_store() -> StateStore:
+    if settings.state_backend == "redis":
+        return RedisStateStore(get_redis())
+    return StateStore()
 
 
-state_store = StateStore()
+state_store = build_state_store()
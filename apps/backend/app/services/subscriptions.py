@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Set
+
+from app.services.hashring import HashRing
+from app.services.rings import drop_opt_quotes
+
+logger = logging.getLogger(__name__)
+
+SubscriptionMessage = tuple[str, str]
+
+
+def tile_contracts(tile: Any) -> Set[str]:
+    if tile is None:
+        return set()
+    opts = getattr(tile, "options", None) or {}
+    bundle = opts.get("contracts") or {}
+    primary = bundle.get("primary")
+    backups: List[str] = bundle.get("backups") or []
+    return {contract for contract in [primary, *backups] if contract and contract.startswith("O:")}
+
+
+def batch_params(channels: Iterable[str], batch_size: int) -> list[str]:
+    ordered = sorted(channels)
+    size = max(batch_size, 1)
+    return [",".join(ordered[idx : idx + size]) for idx in range(0, len(ordered), size)]
+
+
+class OptionSubscriptionManager:
+    """Keeps the live ``Q.<contract>`` set equal to the contracts currently shown on tiles.
+
+    Contracts are spread over ``shards`` option sockets with a consistent hash ring, each shard
+    owning its own outbound queue and live set.
+    """
+
+    def __init__(self, batch_size: int = 50, prefix: str = "Q.", shards: int = 1) -> None:
+        self._batch_size = batch_size
+        self._prefix = prefix
+        self._by_symbol: Dict[str, Set[str]] = {}
+        self._contract_symbols: Dict[str, Set[str]] = {}
+        self._dirty = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._queues: Dict[int, asyncio.Queue[SubscriptionMessage]] = {}
+        self._live: Dict[int, Set[str]] = {}
+        self._ring: HashRing[int] = HashRing(range(max(shards, 1)))
+        for shard in self._ring.nodes:
+            self._queues[shard] = asyncio.Queue()
+            self._live[shard] = set()
+        self.subscribe_messages = 0
+        self.unsubscribe_messages = 0
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._ring.nodes)
+
+    @property
+    def queue(self) -> asyncio.Queue[SubscriptionMessage]:
+        return self.queue_for(0)
+
+    def queue_for(self, shard: int) -> asyncio.Queue[SubscriptionMessage]:
+        return self._queues[shard]
+
+    def shard_for(self, contract: str) -> int:
+        return self._ring.node_for(contract)
+
+    def observe(self, symbol: str, tile: Any) -> None:
+        contracts = tile_contracts(tile)
+        if self._by_symbol.get(symbol, set()) == contracts:
+            return
+        if contracts:
+            self._by_symbol[symbol] = contracts
+        else:
+            self._by_symbol.pop(symbol, None)
+        self._rebuild_contract_map()
+        self._dirty.set()
+
+    def replace_all(self, tiles: Iterable[Any]) -> None:
+        mapping = {tile.symbol: tile_contracts(tile) for tile in tiles}
+        mapping = {symbol: contracts for symbol, contracts in mapping.items() if contracts}
+        if mapping == self._by_symbol:
+            return
+        self._by_symbol = mapping
+        self._rebuild_contract_map()
+        self._dirty.set()
+
+    def _rebuild_contract_map(self) -> None:
+        contract_symbols: Dict[str, Set[str]] = {}
+        for symbol, contracts in self._by_symbol.items():
+            for contract in contracts:
+                contract_symbols.setdefault(contract, set()).add(symbol)
+        self._contract_symbols = contract_symbols
+
+    def desired(self) -> Set[str]:
+        return set(self._contract_symbols)
+
+    def live(self, shard: int | None = None) -> Set[str]:
+        if shard is not None:
+            return set(self._live.get(shard, set()))
+        return set().union(*self._live.values()) if self._live else set()
+
+    def is_live(self, contract: str | None) -> bool:
+        return bool(contract) and any(contract in live for live in self._live.values())
+
+    def symbols_for(self, contract: str) -> Set[str]:
+        return self._contract_symbols.get(contract, set())
+
+    def snapshot_params(self, shard: int | None = None) -> list[str]:
+        return batch_params((f"{self._prefix}{c}" for c in self.live(shard)), self._batch_size)
+
+    async def _send(self, shard: int, action: str, contracts: Set[str]) -> None:
+        for params in batch_params((f"{self._prefix}{c}" for c in contracts), self._batch_size):
+            await self._queues[shard].put((action, params))
+            if action == "subscribe":
+                self.subscribe_messages += 1
+            else:
+                self.unsubscribe_messages += 1
+
+    async def sync(self) -> tuple[Set[str], Set[str]]:
+        async with self._lock:
+            desired = self.desired()
+            previous = self.live()
+            target = self._ring.assign(desired)
+            for shard, live in self._live.items():
+                wanted = target.get(shard, set())
+                await self._send(shard, "unsubscribe", live - wanted)
+                await self._send(shard, "subscribe", wanted - live)
+                self._live[shard] = wanted
+            added = desired - previous
+            removed = previous - desired
+            for contract in removed:
+                drop_opt_quotes(contract)
+        if added or removed:
+            logger.info(
+                "option-subscriptions-synced",
+                extra={"added": len(added), "removed": len(removed), "live": len(desired)},
+            )
+        return added, removed
+
+    async def run(self, load_tiles, resync_seconds: float = 30.0) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=resync_seconds)
+            except asyncio.TimeoutError:
+                self.replace_all(await load_tiles())
+            self._dirty.clear()
+            await self.sync()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "live": len(self.live()),
+            "desired": len(self._contract_symbols),
+            "subscribe_messages": self.subscribe_messages,
+            "unsubscribe_messages": self.unsubscribe_messages,
+            "shards": {shard: len(live) for shard, live in sorted(self._live.items())},
+        }
@@ -7,6 +7,7 @@ from datetime import datetime, timedelta, timezone
 from statistics import mean, pstdev
 from typing import Any, Dict, List
 
+import numpy as np
 from sqlalchemy import select
 
 from app.adapters.massive import MassiveClient
@@ -24,10 +25,14 @@ from app.domain.features import (
 from app.domain.options.buckets import ETF_INDEX, contract_metadata, option_bucket
 from app.domain.options_health import diagnostics
 from app.domain.scoring import aggregate_probability, confidence_interval
-from app.domain.types import BarPoint, KeyLevel, LevelDelta, OptionTopContract, TileState
-from app.services.baselines import baseline_service, percentile_rank, percentile_to_label
+from app.domain.tile import Tile, top_contract
+from app.services.baselines import baseline_service, percentile_to_label
 from app.services.data_cache import quote_cache
 from app.services.ingest import poll_quotes, warm_candles
+from app.services.score_series import score_series
+from app.services.sharding import shard_membership
+from app.services.sketches import sketch_store, snapshot_columns
+from app.services.snapshot_keyframes import snapshot_gate
 from app.services.state_machine import StateMachine
 from app.services.state_store import state_store
 from app.services.timing import get_timing_context
@@ -158,7 +163,7 @@ def _confidence_score(confidence: dict[str, float]) -> int:
 
 def _level_delta(
     levels: list[dict[str, Any]] | None, last_price: float | None, atr_value: float | None
-) -> tuple[LevelDelta | None, str | None]:
+) -> tuple[dict[str, Any] | None, str | None]:
     if not levels or last_price is None:
         return None, None
     closest = None
@@ -177,12 +182,12 @@ def _level_delta(
     window = max(atr * 0.2, 0.15)
     at_entry = abs(diff) <= window
     direction = "above" if diff > 0 else ("below" if diff < 0 else "at")
-    delta = LevelDelta(
-        dollars=round(diff, 2),
-        percent=round(percent or 0.0, 2) if percent is not None else None,
-        direction=direction,
-        at_entry=at_entry,
-    )
+    delta = {
+        "dollars": float(round(diff, 2)),
+        "percent": float(round(percent or 0.0, 2)) if percent is not None else None,
+        "direction": direction,
+        "at_entry": at_entry,
+    }
     return delta, closest.get("label")
 
 
@@ -202,51 +207,45 @@ def _ema_series(values: list[float], period: int) -> list[float]:
     return ema_values
 
 
-def _vwap_series(bars: list[BarPoint]) -> list[float]:
-    cumulative_price = 0.0
-    cumulative_volume = 0.0
-    values: list[float] = []
-    for bar in bars:
-        high = bar.h or bar.c or bar.o or 0.0
-        low = bar.l or bar.c or bar.o or high
-        close = bar.c or bar.o or 0.0
-        volume = float(bar.v or 1.0)
-        typical = (high + low + close) / 3
-        cumulative_price += typical * volume
-        cumulative_volume += volume
-        if cumulative_volume == 0:
-            values.append(typical)
-        else:
-            values.append(round(cumulative_price / cumulative_volume, 4))
-    return values
+def _vwap_series(bars: np.ndarray) -> np.ndarray:
+    if not len(bars):
+        return np.empty(0, dtype=np.float64)
+    # missing (NaN) and zero fields both fall through to the next candidate, as `or` would
+    o, h, l, c, v = np.nan_to_num(bars).T
+    close = np.where(c != 0, c, o)
+    high = np.where(h != 0, h, close)
+    low = np.where(l != 0, l, np.where(close != 0, close, high))
+    volume = np.where(v != 0, v, 1.0)
+    typical = (high + low + close) / 3
+    cumulative_volume = np.cumsum(volume)
+    vwap = np.cumsum(typical * volume) / np.where(cumulative_volume == 0, 1.0, cumulative_volume)
+    values = [
+        typ if cum == 0 else round(val, 4)
+        for val, typ, cum in zip(vwap.tolist(), typical.tolist(), cumulative_volume.tolist())
+    ]
+    return np.asarray(values, dtype=np.float64)
 
 
-def _bars_snapshot(raw_candles: list[dict[str, Any]] | None, depth: int = 40) -> list[BarPoint]:
+def _bars_snapshot(
+    raw_candles: list[dict[str, Any]] | None, depth: int = 40
+) -> tuple[np.ndarray, list[str | None]]:
     if not raw_candles:
-        baseline = BarPoint(o=0.0, h=0.0, l=0.0, c=0.0, v=0.0, t=datetime.now().isoformat())
-        return [baseline]
+        return np.zeros((1, 5), dtype=np.float64), [datetime.now().isoformat()]
     trimmed = raw_candles[-depth:]
-    bars: list[BarPoint] = []
-    for candle in trimmed:
-        bars.append(
-            BarPoint(
-                o=_row_to_float(candle.get("o")),
-                h=_row_to_float(candle.get("h")),
-                l=_row_to_float(candle.get("l")),
-                c=_row_to_float(candle.get("c")),
-                v=_row_to_float(candle.get("v")),
-                t=candle.get("t"),
-            )
-        )
-    return bars
+    rows = [
+        [_row_to_float(candle.get(column)) for column in ("o", "h", "l", "c", "v")]
+        for candle in trimmed
+    ]
+    bars = np.array(rows, dtype=np.float64)  # None -> NaN
+    return bars, [candle.get("t") for candle in trimmed]
 
 
 def _options_top3(
     symbol: str, options_chain: list[dict[str, Any]] | None, last_price: float | None
-) -> list[OptionTopContract]:
+) -> list[dict[str, Any]]:
     if not settings.options_data_enabled or not options_chain:
         return []
-    ranked: list[tuple[float, OptionTopContract]] = []
+    ranked: list[tuple[float, dict[str, Any]]] = []
     for doc in options_chain:
         contract = doc.get("contract")
         if not contract:
@@ -282,7 +281,7 @@ def _options_top3(
         ranked.append(
             (
                 score,
-                OptionTopContract(
+                top_contract(
                     contract=contract,
                     ticker=ticker,
                     expiry=expiry,
@@ -302,23 +301,28 @@ def _options_top3(
 
 
 def _decorate_tile_state(
-    tile: TileState,
+    tile: Tile,
     contributions: dict[str, float],
     meta: dict[str, Any],
     payload: dict[str, Any] | None,
-) -> TileState:
+) -> Tile:
     last_price = meta.get("last_price") or tile.admin.get("lastPrice")
     levels = meta.get("levels") or tile.admin.get("levels") or []
     delta, label = _level_delta(levels, last_price, meta.get("atr"))
     tile.delta_to_entry = delta
     tile.key_level_label = label
-    bars = _bars_snapshot(payload.get("candles") if payload else None)
+    bars, bar_times = _bars_snapshot(payload.get("candles") if payload else None)
     tile.bars = bars
-    closes = [bar.c for bar in bars]
-    tile.ema8 = _ema_series(closes, 8)
-    tile.ema21 = _ema_series(closes, 21)
+    tile.bar_times = bar_times
+    closes = [None if close != close else close for close in bars[:, 3].tolist()]
+    tile.ema8 = np.asarray(_ema_series(closes, 8), dtype=np.float64)
+    tile.ema21 = np.asarray(_ema_series(closes, 21), dtype=np.float64)
     tile.vwap = _vwap_series(bars)
-    tile.key_levels = [KeyLevel(label=level["label"], price=level["price"]) for level in levels if level.get("label") and level.get("price") is not None]
+    tile.key_levels = [
+        {"label": level["label"], "price": float(level["price"])}
+        for level in levels
+        if level.get("label") and level.get("price") is not None
+    ]
     tile.patience_candle = contributions.get("Patience", 0.0) >= 0.62
     tile.grade = _grade_from_probability(tile.probability_to_action)
     tile.confidence_score = _confidence_score(tile.confidence)
@@ -490,6 +494,15 @@ def _options_snapshot(symbol: str, payload: dict[str, Any]) -> dict[str, Any]:
     return summary
 
 
+# (baseline metric, options field, rank field)
+OPTION_BASELINE_METRICS = (
+    ("spread_pct", "spread_pct", "spread_percentile_rank"),
+    ("flicker_per_sec", "flicker_per_sec", "flicker_percentile_rank"),
+    ("iv_rank", "ivr", "ivr_percentile_rank"),
+    ("vo_vol", "vo_vol", "vo_vol_percentile_rank"),
+)
+
+
 async def _hydrate_options_metrics(symbol: str, options: dict[str, Any]) -> dict[str, Any]:
     if not options.get("bucket_key"):
         metadata = contract_metadata(options.get("contracts", {}).get("primary"))
@@ -499,20 +512,13 @@ async def _hydrate_options_metrics(symbol: str, options: dict[str, Any]) -> dict
             symbol, options.get("delta_target"), options.get("dte_days"), options.get("side")
         )
     bucket = options.get("bucket_key")
-    spread_baseline = (
-        await baseline_service.get_percentiles("spread_pct", bucket) if bucket else None
-    )
-    flicker_baseline = (
-        await baseline_service.get_percentiles("flicker_per_sec", bucket) if bucket else None
+    ranks = await baseline_service.ranks(
+        [metric for metric, _, _ in OPTION_BASELINE_METRICS],
+        [bucket] * len(OPTION_BASELINE_METRICS),
+        [options.get(field) for _, field, _ in OPTION_BASELINE_METRICS],
     )
-    ivr_baseline = await baseline_service.get_percentiles("iv_rank", bucket) if bucket else None
-    vov_baseline = await baseline_service.get_percentiles("vo_vol", bucket) if bucket else None
-    options["spread_percentile_rank"] = percentile_rank(options.get("spread_pct"), spread_baseline)
-    options["flicker_percentile_rank"] = percentile_rank(
-        options.get("flicker_per_sec"), flicker_baseline
-    )
-    options["ivr_percentile_rank"] = percentile_rank(options.get("ivr"), ivr_baseline)
-    options["vo_vol_percentile_rank"] = percentile_rank(options.get("vo_vol"), vov_baseline)
+    for (_, _, rank_field), rank in zip(OPTION_BASELINE_METRICS, ranks):
+        options[rank_field] = rank
     options["spread_percentile_label"] = percentile_to_label(options.get("spread_percentile_rank"))
     options["flicker_label"] = percentile_to_label(options.get("flicker_percentile_rank"))
     options["liquidity_risk"] = _liquidity_risk_score(options)
@@ -750,7 +756,7 @@ async def _adjust_confidence(
     return confidence
 
 
-def _synthetic_tile(symbol: str) -> tuple[TileState, dict[str, Any]]:
+def _synthetic_tile(symbol: str) -> tuple[Tile, dict[str, Any]]:
     now = datetime.now(timezone.utc)
     contributions = {
         "TrendStack": 0.6,
@@ -765,7 +771,7 @@ def _synthetic_tile(symbol: str) -> tuple[TileState, dict[str, Any]]:
     probability, band = aggregate_probability(contributions, penalties, bonuses)
     confidence = confidence_interval(int(probability * 100), 100, "Normal")
     timing = get_timing_context(now)
-    tile = TileState(
+    tile = Tile(
         symbol=symbol,
         regime="Normal",
         probability_to_action=probability,
@@ -823,11 +829,18 @@ def _synthetic_tile(symbol: str) -> tuple[TileState, dict[str, Any]]:
     return decorated, meta
 
 
-async def _persist_snapshot(symbol: str, tile: TileState, meta: dict[str, Any]) -> None:
+async def _persist_snapshot(symbol: str, tile: Tile, meta: dict[str, Any]) -> None:
+    market_micro = tile.admin.get("marketMicro") if tile.admin else None
     try:
+        columns = snapshot_columns(symbol, tile.options, market_micro)
+        now = datetime.now(timezone.utc)
+        # baselines still see every cycle; only the stored rows are deduplicated
+        if snapshot_gate.reason(symbol, tile, now) is None:
+            sketch_store.observe(symbol, columns)
+            return
         async with async_session() as session:
             snapshot = Snapshot(
-                ts=datetime.now(timezone.utc),
+                ts=now,
                 ticker=symbol,
                 regime=tile.regime,
                 score=tile.probability_to_action * 100,
@@ -841,19 +854,29 @@ async def _persist_snapshot(symbol: str, tile: TileState, meta: dict[str, Any])
                 bonuses=tile.bonuses,
                 state=tile.band.label,
                 rationale=tile.rationale,
-                market_micro=tile.admin.get("marketMicro") if tile.admin else None,
+                market_micro=market_micro,
+                **columns,
             )
             session.add(snapshot)
             await session.commit()
+        snapshot_gate.mark(symbol, tile, now)
+        sketch_store.observe(symbol, columns)
     except Exception as exc:  # pragma: no cover - optional DB path
         logger.warning("snapshot-persist-failed", extra={"symbol": symbol, "error": str(exc)})
 
 
-async def merge_realtime_into_tile(symbol: str, deltas: dict[str, Any]) -> TileState:
-    tile = await state_store.get_state(symbol)
-    if not tile:
-        tile, _ = await build_tile(symbol)
-        await state_store.set_state(symbol, tile)
+async def merge_realtime_into_tile(symbol: str, deltas: dict[str, Any]) -> Tile:
+    async with state_store.lock(symbol):
+        return await _merge_realtime(symbol, deltas)
+
+
+async def _merge_realtime(symbol: str, deltas: dict[str, Any]) -> Tile:
+    stored = await state_store.get_state(symbol)
+    if not stored:
+        stored, _ = await build_tile(symbol)
+        await state_store.set_state(symbol, stored)
+    # copy-on-write: readers keep seeing the stored tile until the merged copy is set
+    tile = stored.copy()
     if deltas.get("options"):
         updated_options = dict(tile.options or {})
         updated_options.update(deltas["options"])
@@ -915,6 +938,8 @@ async def merge_realtime_into_tile(symbol: str, deltas: dict[str, Any]) -> TileS
     tile.probability_to_action = probability
     tile.band = band
     tile.confidence = confidence
+    score_series.record(symbol, probability, band.label)
+    tile.history = score_series.history(symbol)
     market_admin = (
         tile.admin.get("marketMicro", _default_market_micro())
         if tile.admin
@@ -923,8 +948,8 @@ async def merge_realtime_into_tile(symbol: str, deltas: dict[str, Any]) -> TileS
     merged_market = {**market_admin, **market_micro}
     admin = dict(tile.admin or {})
     admin["marketMicro"] = merged_market
-    if "timing" not in admin:
-        admin["timing"] = get_timing_context(datetime.now(timezone.utc))
+    # minutes_left drives the TP odds, so it is not left at the last refresh's value
+    admin["timing"] = get_timing_context(datetime.now(timezone.utc))
     tile.admin = admin
     plan = await tp_manager.on_tick(
         symbol,
@@ -939,9 +964,9 @@ async def merge_realtime_into_tile(symbol: str, deltas: dict[str, Any]) -> TileS
         options = dict(tile.options or {})
         options["tp_plan"] = plan
         tile.options = options
-    tile.timestamps["updated"] = datetime.now(timezone.utc).isoformat()
+    tile.timestamps = {**tile.timestamps, "updated": datetime.now(timezone.utc).isoformat()}
     if tile.key_levels:
-        levels_data = [{"label": lvl.label, "price": lvl.price} for lvl in tile.key_levels]
+        levels_data = tile.key_levels
     else:
         levels_data = admin.get("levels", [])
     delta, label = _level_delta(levels_data, admin.get("lastPrice"), admin.get("atr"))
@@ -955,7 +980,7 @@ async def merge_realtime_into_tile(symbol: str, deltas: dict[str, Any]) -> TileS
     return tile
 
 
-async def build_tile(symbol: str) -> tuple[TileState, dict[str, Any]]:
+async def build_tile(symbol: str) -> tuple[Tile, dict[str, Any]]:
     if not settings.massive_api_key:
         return _synthetic_tile(symbol)
     try:
@@ -966,8 +991,8 @@ async def build_tile(symbol: str) -> tuple[TileState, dict[str, Any]]:
         probability, band = aggregate_probability(contributions, penalties, bonuses)
         confidence = confidence_interval(int(probability * 100), 150, "Normal")
         history_tile = await state_store.get_state(symbol)
-        history = history_tile.history[-2:] if history_tile else []
-        history.append({"ts": datetime.now(timezone.utc).isoformat(), "score": probability * 100})
+        score_series.record(symbol, probability, band.label)
+        history = score_series.history(symbol)
         options_snapshot = _options_snapshot(symbol, payload)
         options_snapshot = await _hydrate_options_metrics(symbol, options_snapshot)
         _apply_percentile_penalties(options_snapshot, penalties)
@@ -998,6 +1023,7 @@ async def build_tile(symbol: str) -> tuple[TileState, dict[str, Any]]:
                 "regime": "Fast" if probability > 0.8 else "Normal",
                 "timing": timing,
                 "last_price": last_price,
+                "closes": admin["last_1m_closes"],
             },
         )
         confidence = await _adjust_confidence(
@@ -1014,7 +1040,7 @@ async def build_tile(symbol: str) -> tuple[TileState, dict[str, Any]]:
         if plan:
             admin["managing"] = plan
             options_snapshot["tp_plan"] = plan
-        tile = TileState(
+        tile = Tile(
             symbol=symbol,
             regime="Fast" if probability > 0.8 else "Normal",
             probability_to_action=probability,
@@ -1039,12 +1065,18 @@ async def build_tile(symbol: str) -> tuple[TileState, dict[str, Any]]:
         return _synthetic_tile(symbol)
 
 
-async def refresh_symbol(symbol: str, manager: ConnectionManager | None = None) -> TileState:
+async def refresh_symbol(symbol: str, manager: ConnectionManager | None = None) -> Tile:
     tile, meta = await build_tile(symbol)
-    await state_store.set_state(symbol, tile)
+    async with state_store.lock(symbol):
+        # build_tile awaits I/O unlocked; keep the marketMicro a realtime merge stored meanwhile
+        stored = await state_store.get_state(symbol)
+        micro = (stored.admin or {}).get("marketMicro") if stored else None
+        if micro is not None and tile.admin is not None:
+            tile.admin["marketMicro"] = micro
+        await state_store.set_state(symbol, tile)
     await _persist_snapshot(symbol, tile, meta)
     if manager:
-        await manager.broadcast({"type": "tile", "data": tile.model_dump()})
+        await manager.broadcast_tile(tile)
     return tile
 
 
@@ -1052,7 +1084,7 @@ async def run_tile_pipeline(manager: ConnectionManager | None = None) -> None:
     await watchlist_service.seed_if_empty()
     await asyncio.sleep(2)
     while True:
-        symbols = await watchlist_service.list()
+        symbols = shard_membership.owned(await watchlist_service.list())
         if not symbols:
             await asyncio.sleep(5)
             continue
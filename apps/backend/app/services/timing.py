@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 from zoneinfo import ZoneInfo
 
 WINDOWS = [
@@ -67,6 +67,20 @@ WINDOWS = [
 ]
 
 
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 0)
+
+
+def session_minutes_left(now_utc: datetime) -> float:
+    """Regular-session minutes left until the close; a full session before the open."""
+
+    eastern = now_utc.astimezone(ZoneInfo("US/Eastern"))
+    day = eastern.date()
+    start = max(eastern, datetime.combine(day, SESSION_OPEN, tzinfo=eastern.tzinfo))
+    close = datetime.combine(day, SESSION_CLOSE, tzinfo=eastern.tzinfo)
+    return max(0.0, (close - start) / timedelta(minutes=1))
+
+
 def get_timing_context(now_utc: datetime) -> dict:
     eastern = now_utc.astimezone(ZoneInfo("US/Eastern"))
     current_time = eastern.time()
@@ -83,4 +97,5 @@ def get_timing_context(now_utc: datetime) -> dict:
         "tf_backup": window["tf_backup"],
         "kcu_mode": window["kcu_mode"],
         "considerations": window["considerations"],
+        "minutes_left": round(session_minutes_left(now_utc), 1),
     }
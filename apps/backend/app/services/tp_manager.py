@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-from app.services.timing import get_timing_context
+from app.domain.target_hits import simulate_target_hits
+from app.services.locks import KeyedLocks
+from app.services.timing import get_timing_context, session_minutes_left
+
+# realtime merges tick a plan many times a second; its odds are re-simulated at most this often
+# unless a target is hit or the runner extends
+SIMULATION_SECONDS = 5.0
 
 
 @dataclass
@@ -15,6 +22,8 @@ class TPLevel:
     label: str
     distance_pct: float
     hit: bool = False
+    hit_probability: Optional[float] = None
+    expected_minutes: Optional[float] = None
 
     def to_dict(self) -> dict:
         return asdict(self)
@@ -27,6 +36,8 @@ class RunnerState:
     extended_to: Optional[float] = None
     continuation_prob: float = 0.0
     reasons: List[str] = field(default_factory=list)
+    extension_probability: Optional[float] = None
+    extension_expected_minutes: Optional[float] = None
 
     def to_dict(self) -> dict:
         return asdict(self)
@@ -59,30 +70,31 @@ class TPPlan:
 
 
 class TPManager:
+    """Per-symbol plans; each symbol has its own lock and readers get ``to_dict`` snapshots."""
+
     def __init__(self) -> None:
         self._plans: Dict[str, TPPlan] = {}
         self._contexts: Dict[str, dict] = {}
-        self._lock = asyncio.Lock()
+        self._locks = KeyedLocks()
+        self._simulated_at: Dict[str, float] = {}
 
     async def reset(self) -> None:  # pragma: no cover - testing helper
-        async with self._lock:
-            self._plans.clear()
-            self._contexts.clear()
+        self._plans = {}
+        self._contexts = {}
+        self._simulated_at = {}
 
     async def update_context(self, symbol: str, context: dict) -> None:
-        async with self._lock:
-            existing = self._contexts.get(symbol, {})
-            existing.update(context)
-            self._contexts[symbol] = existing
+        async with self._locks(symbol):
+            self._contexts[symbol] = {**self._contexts.get(symbol, {}), **context}
 
     async def get_plan(self, symbol: str) -> Optional[dict]:
-        async with self._lock:
-            plan = self._plans.get(symbol)
-            return plan.to_dict() if plan else None
+        plan = self._plans.get(symbol)
+        return plan.to_dict() if plan else None
 
     async def stop(self, symbol: str) -> None:
-        async with self._lock:
+        async with self._locks(symbol):
             self._plans.pop(symbol, None)
+            self._simulated_at.pop(symbol, None)
 
     async def start(
         self,
@@ -96,7 +108,7 @@ class TPManager:
         divergence: float | None,
         timing: dict | None,
     ) -> dict:
-        async with self._lock:
+        async with self._locks(symbol):
             context = self._contexts.get(symbol)
             if not context:
                 raise ValueError("No context available for symbol")
@@ -111,6 +123,7 @@ class TPManager:
                 timing or get_timing_context(datetime.now(timezone.utc)),
                 context,
             )
+            await self._simulate_hits(plan, entry, context)
             self._plans[symbol] = plan
             return plan.to_dict()
 
@@ -123,7 +136,7 @@ class TPManager:
         market_micro: dict,
         timing: dict,
     ) -> Optional[dict]:
-        async with self._lock:
+        async with self._locks(symbol):
             plan = self._plans.get(symbol)
             if not plan:
                 return None
@@ -132,8 +145,12 @@ class TPManager:
             if price is None:
                 return plan.to_dict()
             self._contexts.setdefault(symbol, {})["last_price"] = price
+            targets = (plan.tp1.hit, plan.tp2.hit, plan.runner.extended_to)
             self._update_plan(plan, price, probability, liquidity_risk or 0, market_micro)
             plan.timing = timing
+            stale = time.monotonic() - self._simulated_at.get(symbol, 0.0) >= SIMULATION_SECONDS
+            if stale or targets != (plan.tp1.hit, plan.tp2.hit, plan.runner.extended_to):
+                await self._simulate_hits(plan, price, self._contexts[symbol])
             return plan.to_dict()
 
     def _build_plan(
@@ -206,7 +223,39 @@ class TPManager:
             and abs(market_micro.get("divergenceZ", 0)) <= 0.7
         )
         if extend_conditions and not plan.runner.extended_to:
-            plan.runner.extended_to = round(plan.tp2.price + self._sign(plan.direction) * 0.5 * (plan.tp2.price - plan.entry), 2)
+            plan.runner.extended_to = self._extension_target(plan)
+
+    def _extension_target(self, plan: TPPlan) -> float:
+        return round(plan.tp2.price + self._sign(plan.direction) * 0.5 * (plan.tp2.price - plan.entry), 2)
+
+    async def _simulate_hits(self, plan: TPPlan, price: float, context: dict) -> None:
+        """Touch odds and expected minutes for TP1/TP2/runner extension before the close.
+
+        The simulation runs in a worker thread so the event loop keeps serving merges.
+        """
+
+        minutes = plan.timing.get("minutes_left")
+        if minutes is None:
+            minutes = session_minutes_left(datetime.now(timezone.utc))
+        extension_price = plan.runner.extended_to or self._extension_target(plan)
+        targets = [plan.tp1.price, plan.tp2.price, extension_price]
+        self._simulated_at[plan.symbol] = time.monotonic()
+        tp1, tp2, extension = await asyncio.to_thread(
+            simulate_target_hits,
+            context.get("closes") or [],
+            price,
+            targets,
+            plan.direction,
+            minutes,
+            atr=context.get("atr"),
+        )
+        for level, odds in ((plan.tp1, tp1), (plan.tp2, tp2)):
+            if level.hit:
+                odds = {"probability": 1.0, "expected_minutes": 0.0}
+            level.hit_probability = odds["probability"]
+            level.expected_minutes = odds["expected_minutes"]
+        plan.runner.extension_probability = extension["probability"]
+        plan.runner.extension_expected_minutes = extension["expected_minutes"]
 
     def _multipliers_for(self, regime: str, window: str | None) -> tuple[float, float]:
         base = {
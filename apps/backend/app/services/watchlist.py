@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
+import uuid
 from typing import List
 
 from sqlalchemy import Select, delete, insert, select
@@ -11,14 +13,33 @@ from app.core.settings import settings
 from app.db.models_watchlist import WatchlistItem
 from app.db.session import async_session, engine
 
+WATCHLIST_CHANNEL = "kcu:watchlist"
+# Safety net for rows changed behind the service's back (manual SQL, missed notifications)
+CACHE_TTL_SECONDS = 60.0
+
 
 class WatchlistService:
-    def __init__(self) -> None:
+    """Watchlist backed by the ``watchlist`` table and served from an in-memory copy.
+
+    The copy is reloaded after local writes, when another process announces a change on
+    ``kcu:watchlist`` (see ``listen``) and at most every ``CACHE_TTL_SECONDS``.
+    """
+
+    def __init__(self, session_factory=None, db_engine=None) -> None:
         self._event = asyncio.Event()
         self._logger = logging.getLogger(__name__)
+        self._session = session_factory or async_session
+        self._engine = db_engine or engine
         self._memory = [ticker.upper() for ticker in settings.watchlist]
         self._db_warning_logged = False
         self._table_ready = False
+        self._cache: List[str] | None = None
+        self._cached_at = 0.0
+        self._generation = 0  # bumped on invalidate so an in-flight load cannot cache stale rows
+        self._members: frozenset[str] = frozenset(self._memory)
+        self._origin = uuid.uuid4().hex.encode()
+        self._redis = None
+        self.loads = 0
 
     def _log_db_warning(self, key: str, error: str) -> None:
         if not self._db_warning_logged:
@@ -32,7 +53,7 @@ class WatchlistService:
     async def _ensure_table(self) -> None:
         if self._table_ready:
             return
-        async with engine.begin() as conn:
+        async with self._engine.begin() as conn:
             await conn.run_sync(WatchlistItem.__table__.create, checkfirst=True)
         self._table_ready = True
 
@@ -47,7 +68,7 @@ class WatchlistService:
 
     async def _recreate_table(self) -> None:
         self._logger.warning("watchlist-recreate-table")
-        async with engine.begin() as conn:
+        async with self._engine.begin() as conn:
             await conn.run_sync(WatchlistItem.__table__.drop, checkfirst=True)
             await conn.run_sync(WatchlistItem.__table__.create, checkfirst=True)
         self._table_ready = True
@@ -56,7 +77,7 @@ class WatchlistService:
         ensured = False
         while True:
             try:
-                async with async_session() as session:
+                async with self._session() as session:
                     existing = (
                         (await session.execute(select(WatchlistItem).limit(1))).scalars().all()
                     )
@@ -70,7 +91,7 @@ class WatchlistService:
                     if rows:
                         await session.execute(insert(WatchlistItem).values(rows))
                         await session.commit()
-                        self._event.set()
+                        await self._changed()
                         self._clear_db_warning()
                 return
             except (ProgrammingError, OperationalError) as exc:  # pragma: no cover - degraded env
@@ -89,20 +110,42 @@ class WatchlistService:
                 return
 
     async def list(self) -> List[str]:
+        if self._cache is not None and time.monotonic() - self._cached_at < CACHE_TTL_SECONDS:
+            return list(self._cache)
+        return await self._load()
+
+    async def contains(self, ticker: str) -> bool:
+        await self.list()
+        return ticker.upper() in self._members
+
+    def invalidate(self) -> None:
+        self._cache = None
+        self._generation += 1
+
+    def _remember(self, symbols: List[str], cache: bool) -> List[str]:
+        self._members = frozenset(symbols)
+        if cache:
+            self._cache, self._cached_at = symbols, time.monotonic()
+        return list(symbols)
+
+    async def _load(self) -> List[str]:
         ensured = False
+        generation = self._generation
         while True:
             try:
-                async with async_session() as session:
+                async with self._session() as session:
                     stmt: Select = select(WatchlistItem).order_by(
                         WatchlistItem.position.asc(), WatchlistItem.ticker.asc()
                     )
                     rows = (await session.execute(stmt)).scalars().all()
+                self.loads += 1
                 symbols = [row.ticker.upper() for row in rows]
                 if symbols:
                     self._memory = symbols
                 self._table_ready = True
                 self._clear_db_warning()
-                return symbols or list(self._memory)
+                current = generation == self._generation
+                return self._remember(symbols or list(self._memory), cache=current)
             except (ProgrammingError, OperationalError) as exc:  # pragma: no cover - degraded env
                 if self._table_missing(exc) and not ensured:
                     ensured = True
@@ -113,17 +156,17 @@ class WatchlistService:
                     await self._recreate_table()
                     continue
                 self._log_db_warning("watchlist-list-failed", str(exc))
-                return list(self._memory)
+                return self._remember(self._memory, cache=False)
             except Exception as exc:  # pragma: no cover
                 self._log_db_warning("watchlist-list-failed", str(exc))
-                return list(self._memory)
+                return self._remember(self._memory, cache=False)
 
     async def add(self, ticker: str) -> List[str]:
         ticker = ticker.upper()
         ensured = False
         while True:
             try:
-                async with async_session() as session:
+                async with self._session() as session:
                     positions = (
                         (await session.execute(select(WatchlistItem.position))).scalars().all()
                     )
@@ -135,7 +178,7 @@ class WatchlistService:
                         await session.commit()
                     except Exception:
                         await session.rollback()
-                self._event.set()
+                await self._changed()
                 self._table_ready = True
                 self._clear_db_warning()
                 return await self.list()
@@ -155,20 +198,21 @@ class WatchlistService:
                 break
         if ticker not in self._memory:
             self._memory.append(ticker)
+        self.invalidate()
         self._event.set()
-        return list(self._memory)
+        return self._remember(self._memory, cache=False)
 
     async def remove(self, ticker: str) -> List[str]:
         ticker = ticker.upper()
         ensured = False
         while True:
             try:
-                async with async_session() as session:
+                async with self._session() as session:
                     await session.execute(
                         delete(WatchlistItem).where(WatchlistItem.ticker == ticker)
                     )
                     await session.commit()
-                self._event.set()
+                await self._changed()
                 self._table_ready = True
                 self._clear_db_warning()
                 return await self.list()
@@ -187,11 +231,44 @@ class WatchlistService:
                 self._log_db_warning("watchlist-remove-failed", str(exc))
                 break
         self._memory = [t for t in self._memory if t != ticker]
+        self.invalidate()
         self._event.set()
-        return list(self._memory)
+        return self._remember(self._memory, cache=False)
 
     def event(self) -> asyncio.Event:
         return self._event
 
+    async def _changed(self) -> None:
+        self.invalidate()
+        self._event.set()
+        if self._redis is None:
+            return
+        try:
+            await self._redis.publish(WATCHLIST_CHANNEL, self._origin)
+        except Exception as exc:
+            self._logger.warning("watchlist-notify-failed", extra={"error": str(exc)})
+
+    async def listen(self, redis) -> None:
+        """Reload on changes published by other processes; also announces our own writes."""
+
+        self._redis = redis
+        while True:
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(WATCHLIST_CHANNEL)
+                # anything published while we were not subscribed is lost
+                self.invalidate()
+                async for message in pubsub.listen():
+                    if message.get("type") == "message" and message["data"] != self._origin:
+                        self.invalidate()
+                        self._event.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._logger.warning("watchlist-listen-reconnect", extra={"error": str(exc)})
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
 
 watchlist_service = WatchlistService()
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import math
+import random
+import string
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from itertools import product
+from typing import Any, Dict
+
+DEFAULT_SYMBOLS = ["SPY", "AAPL", "MSFT", "NVDA", "QQQ", "TSLA", "AMZN", "GOOGL"]
+INDEX_LEVELS = {"SPX": 5000.0, "NDX": 17500.0}
+
+
+def synthetic_watchlist(count: int) -> list[str]:
+    """The default 8 symbols padded with generated alpha-only tickers (AAA, AAB, ...)."""
+
+    symbols = list(DEFAULT_SYMBOLS[:count])
+    for letters in product(string.ascii_uppercase, repeat=3):
+        if len(symbols) >= count:
+            break
+        ticker = "".join(letters)
+        if ticker not in symbols:
+            symbols.append(ticker)
+    return symbols
+
+
+def _ms(dt: datetime) -> int:
+    return int(dt.timestamp() * 1000)
+
+
+def _next_fridays(today: date, count: int) -> list[date]:
+    offset = (4 - today.weekday()) % 7
+    first = today + timedelta(days=offset)
+    return [first + timedelta(days=7 * idx) for idx in range(count)]
+
+
+def contract_ticker(root: str, expiry: date, side: str, strike: float) -> str:
+    return f"O:{root}{expiry.strftime('%y%m%d')}{side[0].upper()}{int(round(strike * 1000)):08d}"
+
+
+@dataclass
+class Instrument:
+    symbol: str
+    price: float
+    vol_per_min: float
+    prior_close: float
+
+
+class SyntheticMarket:
+    """Random-walk prices, candles and option chains for any ticker, created on first use."""
+
+    def __init__(self, seed: int | None = 7, strikes_per_side: int = 6, expiries: int = 3) -> None:
+        self._rng = random.Random(seed)
+        self._instruments: Dict[str, Instrument] = {}
+        self._quotes: Dict[str, tuple[float, float]] = {}
+        self._strikes_per_side = strikes_per_side
+        self._expiries = expiries
+
+    def instrument(self, symbol: str) -> Instrument:
+        symbol = symbol.upper().removeprefix("I:")
+        existing = self._instruments.get(symbol)
+        if existing:
+            return existing
+        base = INDEX_LEVELS.get(symbol) or round(self._rng.uniform(20, 600), 2)
+        inst = Instrument(
+            symbol=symbol,
+            price=base,
+            vol_per_min=base * self._rng.uniform(0.0004, 0.0012),
+            prior_close=round(base * self._rng.uniform(0.99, 1.01), 2),
+        )
+        self._instruments[symbol] = inst
+        return inst
+
+    def step(self, symbol: str, fraction: float = 1.0) -> float:
+        inst = self.instrument(symbol)
+        move = self._rng.gauss(0.0, inst.vol_per_min * math.sqrt(max(fraction, 1e-6)))
+        inst.price = max(round(inst.price + move, 4), 0.01)
+        return inst.price
+
+    def candles(
+        self, symbol: str, start_ms: int, end_ms: int, limit: int = 600
+    ) -> list[dict[str, Any]]:
+        inst = self.instrument(symbol)
+        start_ms = max(start_ms, end_ms - limit * 60_000)
+        first = start_ms - start_ms % 60_000
+        bars: list[dict[str, Any]] = []
+        price = inst.price
+        stamps = list(range(first, end_ms, 60_000))
+        for ts in reversed(stamps):
+            close = price
+            open_ = max(close - self._rng.gauss(0.0, inst.vol_per_min), 0.01)
+            high = max(open_, close) + abs(self._rng.gauss(0.0, inst.vol_per_min / 2))
+            low = max(min(open_, close) - abs(self._rng.gauss(0.0, inst.vol_per_min / 2)), 0.01)
+            volume = int(self._rng.uniform(5_000, 250_000))
+            bars.append(
+                {
+                    "o": round(open_, 4),
+                    "h": round(high, 4),
+                    "l": round(low, 4),
+                    "c": round(close, 4),
+                    "v": volume,
+                    "vw": round((high + low + close) / 3, 4),
+                    "t": ts,
+                    "n": volume // 100,
+                }
+            )
+            price = open_
+        bars.reverse()
+        return bars
+
+    def previous_close(self, symbol: str) -> dict[str, Any]:
+        inst = self.instrument(symbol)
+        yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+        close = inst.prior_close
+        return {
+            "T": inst.symbol,
+            "c": close,
+            "h": round(close * 1.008, 2),
+            "l": round(close * 0.992, 2),
+            "o": round(close * 0.999, 2),
+            "t": _ms(yesterday),
+            "v": int(self._rng.uniform(1e6, 5e7)),
+            "vw": close,
+        }
+
+    def open_close(self, symbol: str, day: str) -> dict[str, Any]:
+        inst = self.instrument(symbol)
+        return {
+            "status": "OK",
+            "from": day,
+            "symbol": inst.symbol,
+            "open": round(inst.prior_close * 1.001, 2),
+            "high": round(inst.price * 1.006, 2),
+            "low": round(inst.price * 0.994, 2),
+            "close": round(inst.price, 2),
+            "volume": int(self._rng.uniform(1e6, 5e7)),
+            "preMarket": round(inst.prior_close * 1.002, 2),
+            "afterHours": None,
+        }
+
+    def stock_snapshot(self, symbol: str) -> dict[str, Any]:
+        inst = self.instrument(symbol)
+        half_spread = max(inst.price * 0.0001, 0.01)
+        now_ns = time.time_ns()
+        return {
+            "ticker": inst.symbol,
+            "lastQuote": {
+                "T": inst.symbol,
+                "p": round(inst.price - half_spread, 2),
+                "P": round(inst.price + half_spread, 2),
+                "s": 3,
+                "S": 4,
+                "t": now_ns,
+            },
+            "day": {
+                "o": inst.prior_close,
+                "h": inst.price,
+                "l": inst.price,
+                "c": inst.price,
+                "v": 1e6,
+            },
+            "prevDay": {"c": inst.prior_close},
+            "updated": now_ns,
+        }
+
+    def _option_quote(
+        self, underlying: float, strike: float, side: str, dte: int
+    ) -> tuple[float, float, float]:
+        moneyness = (underlying - strike) if side == "call" else (strike - underlying)
+        time_value = underlying * 0.004 * math.sqrt(max(dte, 0.5))
+        mid = max(moneyness, 0.0) + time_value * math.exp(
+            -abs(moneyness) / max(time_value * 4, 0.01)
+        )
+        mid = max(round(mid, 2), 0.05)
+        spread = max(round(mid * self._rng.uniform(0.01, 0.09), 2), 0.01)
+        return mid - spread / 2, mid + spread / 2, mid
+
+    def option_chain(self, symbol: str) -> list[dict[str, Any]]:
+        inst = self.instrument(symbol)
+        today = datetime.now(timezone.utc).date()
+        step = 1.0 if inst.price < 200 else 5.0
+        atm = round(inst.price / step) * step
+        results: list[dict[str, Any]] = []
+        for expiry in _next_fridays(today, self._expiries):
+            dte = max((expiry - today).days, 0)
+            for offset in range(-self._strikes_per_side, self._strikes_per_side + 1):
+                strike = atm + offset * step
+                if strike <= 0:
+                    continue
+                for side in ("call", "put"):
+                    bid, ask, mid = self._option_quote(inst.price, strike, side, dte)
+                    distance = (inst.price - strike) / max(inst.price * 0.02, 1e-6)
+                    delta = 0.5 + 0.5 * math.tanh(distance)
+                    delta = round(delta if side == "call" else delta - 1.0, 4)
+                    ticker = contract_ticker(inst.symbol, expiry, side, strike)
+                    self._quotes[ticker] = (bid, ask)
+                    results.append(
+                        {
+                            "details": {
+                                "ticker": ticker,
+                                "contract_type": side,
+                                "exercise_style": "american",
+                                "expiration_date": expiry.isoformat(),
+                                "shares_per_contract": 100,
+                                "strike_price": strike,
+                            },
+                            "last_quote": {
+                                "bid": round(bid, 2),
+                                "ask": round(ask, 2),
+                                "midpoint": round(mid, 2),
+                                "last_updated": time.time_ns(),
+                            },
+                            "greeks": {"delta": delta, "gamma": 0.02, "theta": -0.05, "vega": 0.1},
+                            "implied_volatility": round(self._rng.uniform(0.15, 0.6), 4),
+                            "open_interest": int(self._rng.uniform(100, 60_000)),
+                            "day": {"volume": int(self._rng.uniform(10, 20_000))},
+                        }
+                    )
+        return results
+
+    def option_quote_event(self, contract: str) -> dict[str, Any]:
+        bid, ask = self._quotes.get(contract, (1.0, 1.05))
+        drift = self._rng.gauss(0.0, 0.01)
+        bid = max(round(bid + drift, 2), 0.01)
+        ask = max(round(ask + drift + self._rng.choice([0.0, 0.0, 0.01, -0.01]), 2), bid)
+        self._quotes[contract] = (bid, ask)
+        return {
+            "ev": "Q",
+            "sym": contract,
+            "bp": bid,
+            "ap": ask,
+            "bs": int(self._rng.uniform(1, 200)),
+            "as": int(self._rng.uniform(1, 200)),
+            "t": int(time.time() * 1000),
+        }
+
+    def index_value_event(self, index: str, fraction: float) -> dict[str, Any]:
+        value = self.step(index, fraction)
+        return {"ev": "V", "T": f"I:{index}", "val": round(value, 2), "t": int(time.time() * 1000)}
+
+    def index_second_event(self, index: str) -> dict[str, Any]:
+        inst = self.instrument(index)
+        now_ms = int(time.time() * 1000)
+        return {
+            "ev": "AS",
+            "sym": f"I:{index}",
+            "c": round(inst.price, 2),
+            "s": now_ms - 1000,
+            "e": now_ms,
+        }
+
+    def index_minute_event(self, index: str, minute_ms: int) -> dict[str, Any]:
+        bar = self.candles(index, minute_ms - 60_000, minute_ms, limit=1)[-1]
+        return {
+            "ev": "AM",
+            "sym": f"I:{index}",
+            "o": bar["o"],
+            "h": bar["h"],
+            "l": bar["l"],
+            "c": bar["c"],
+            "s": minute_ms - 60_000,
+            "e": minute_ms,
+        }
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+import uvicorn
+import websockets
+from fastapi import FastAPI
+from websockets.exceptions import ConnectionClosed
+
+from app.sim.market import SyntheticMarket, synthetic_watchlist
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SimConfig:
+    host: str = "127.0.0.1"
+    ws_port: int = 8765
+    rest_port: int = 8766
+    quote_rate: float = 2.0  # Q events per second per subscribed contract
+    index_rate: float = 1.0  # V events per second per subscribed index
+    minute_seconds: float = 60.0  # wall seconds per emitted AM bar; lower to compress time
+    tick_seconds: float = 0.1
+    seed: int | None = 7
+
+
+def _parse_bound(value: str) -> int:
+    """Massive accepts either YYYY-MM-DD or ms since epoch for aggregate windows."""
+
+    if value.isdigit():
+        return int(value)
+    parsed = datetime.combine(date.fromisoformat(value), datetime.min.time(), tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def create_rest_app(market: SyntheticMarket) -> FastAPI:
+    app = FastAPI(title="Massive simulator")
+
+    @app.get("/v2/aggs/ticker/{ticker}/range/{multiplier}/{timespan}/{start}/{end}")
+    async def aggregates(ticker: str, multiplier: int, timespan: str, start: str, end: str) -> dict:
+        end_ms = min(_parse_bound(end), int(time.time() * 1000))
+        if timespan == "day":
+            end_ms = end_ms - end_ms % 86_400_000 + 86_400_000
+        results = market.candles(ticker, _parse_bound(start), end_ms)
+        return {"status": "OK", "ticker": ticker, "resultsCount": len(results), "results": results}
+
+    @app.get("/v2/aggs/ticker/{ticker}/prev")
+    async def previous_close(ticker: str) -> dict:
+        return {"status": "OK", "ticker": ticker, "results": [market.previous_close(ticker)]}
+
+    @app.get("/v1/open-close/{ticker}/{day}")
+    async def open_close(ticker: str, day: str) -> dict:
+        return market.open_close(ticker, day)
+
+    @app.get("/v2/snapshot/locale/us/markets/stocks/tickers/{ticker}")
+    async def stock_snapshot(ticker: str) -> dict:
+        return {"status": "OK", "ticker": market.stock_snapshot(ticker)}
+
+    @app.get("/v3/snapshot/options/{underlying}")
+    async def options_chain(underlying: str) -> dict:
+        return {"status": "OK", "results": market.option_chain(underlying)}
+
+    return app
+
+
+class MassiveWSSimulator:
+    """Speaks the Massive auth/subscribe handshake and streams synthetic events per socket."""
+
+    def __init__(self, market: SyntheticMarket, config: SimConfig) -> None:
+        self.market = market
+        self.config = config
+        self.connections = 0
+        self.frames_sent = 0
+        self.events_sent = 0
+
+    async def handler(self, ws) -> None:
+        self.connections += 1
+        channels: set[str] = set()
+        await ws.send(
+            json.dumps(
+                [{"ev": "status", "status": "connected", "message": "Connected Successfully"}]
+            )
+        )
+        emitter: asyncio.Task | None = None
+        try:
+            async for raw in ws:
+                try:
+                    msg = json.loads(raw)
+                except json.JSONDecodeError:
+                    continue
+                action = msg.get("action")
+                params = [p for p in str(msg.get("params", "")).split(",") if p]
+                if action == "auth":
+                    await ws.send(
+                        json.dumps(
+                            [{"ev": "status", "status": "auth_success", "message": "authenticated"}]
+                        )
+                    )
+                    emitter = emitter or asyncio.create_task(self._emit(ws, channels))
+                elif action == "subscribe":
+                    channels.update(params)
+                    await ws.send(
+                        json.dumps(
+                            [
+                                {
+                                    "ev": "status",
+                                    "status": "success",
+                                    "message": f"subscribed to: {p}",
+                                }
+                                for p in params
+                            ]
+                        )
+                    )
+                elif action == "unsubscribe":
+                    channels.difference_update(params)
+                    await ws.send(
+                        json.dumps(
+                            [
+                                {
+                                    "ev": "status",
+                                    "status": "success",
+                                    "message": f"unsubscribed to: {p}",
+                                }
+                                for p in params
+                            ]
+                        )
+                    )
+        except ConnectionClosed:
+            pass
+        finally:
+            self.connections -= 1
+            if emitter:
+                emitter.cancel()
+
+    async def _emit(self, ws, channels: set[str]) -> None:
+        cfg = self.config
+        owed: dict[str, float] = {}
+        last_second = time.monotonic()
+        last_minute = time.monotonic()
+        while True:
+            await asyncio.sleep(cfg.tick_seconds)
+            now = time.monotonic()
+            events: list[dict] = []
+            second_due = now - last_second >= 1.0
+            minute_due = now - last_minute >= cfg.minute_seconds
+            for channel in list(channels):
+                prefix, _, symbol = channel.partition(".")
+                rate = cfg.quote_rate if prefix == "Q" else cfg.index_rate if prefix == "V" else 0.0
+                if rate:
+                    owed[channel] = owed.get(channel, 0.0) + rate * cfg.tick_seconds
+                    while owed[channel] >= 1.0:
+                        owed[channel] -= 1.0
+                        if prefix == "Q" and symbol.startswith("O:"):
+                            events.append(self.market.option_quote_event(symbol))
+                        elif prefix == "V" and symbol.startswith("I:"):
+                            fraction = 1.0 / max(rate * cfg.minute_seconds, 1.0)
+                            events.append(self.market.index_value_event(symbol[2:], fraction))
+                elif prefix == "AS" and second_due and symbol.startswith("I:"):
+                    events.append(self.market.index_second_event(symbol[2:]))
+                elif prefix == "AM" and minute_due and symbol.startswith("I:"):
+                    minute_ms = int(time.time() * 1000) // 60_000 * 60_000
+                    events.append(self.market.index_minute_event(symbol[2:], minute_ms))
+            if second_due:
+                last_second = now
+            if minute_due:
+                last_minute = now
+            if not events:
+                continue
+            await ws.send(json.dumps(events))
+            self.frames_sent += 1
+            self.events_sent += len(events)
+
+
+async def serve(config: SimConfig, symbols: list[str] | None = None) -> None:
+    market = SyntheticMarket(seed=config.seed)
+    for symbol in symbols or []:
+        market.instrument(symbol)
+    simulator = MassiveWSSimulator(market, config)
+    rest = uvicorn.Server(
+        uvicorn.Config(
+            create_rest_app(market), host=config.host, port=config.rest_port, log_level="warning"
+        )
+    )
+    async with websockets.serve(simulator.handler, config.host, config.ws_port, ping_interval=None):
+        logger.info(
+            "massive-sim-started",
+            extra={
+                "ws_port": config.ws_port,
+                "rest_port": config.rest_port,
+                "symbols": len(symbols or []),
+            },
+        )
+        await rest.serve()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Local Massive WS + REST simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--ws-port", type=int, default=8765)
+    parser.add_argument("--rest-port", type=int, default=8766)
+    parser.add_argument("--quote-rate", type=float, default=2.0, help="Q events/sec per contract")
+    parser.add_argument("--index-rate", type=float, default=1.0, help="V events/sec per index")
+    parser.add_argument(
+        "--minute-seconds", type=float, default=60.0, help="wall seconds per AM bar"
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--print-watchlist",
+        type=int,
+        metavar="N",
+        help="print a comma-separated N-symbol watchlist (8 defaults + synthetic tickers) and exit",
+    )
+    args = parser.parse_args(argv)
+    if args.print_watchlist:
+        print(",".join(synthetic_watchlist(args.print_watchlist)))
+        return
+    logging.basicConfig(level=logging.INFO)
+    config = SimConfig(
+        host=args.host,
+        ws_port=args.ws_port,
+        rest_port=args.rest_port,
+        quote_rate=args.quote_rate,
+        index_rate=args.index_rate,
+        minute_seconds=args.minute_seconds,
+        seed=args.seed,
+    )
+    asyncio.run(serve(config))
+
+
+if __name__ == "__main__":
+    main()
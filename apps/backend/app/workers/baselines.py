@@ -1,28 +1,85 @@
 from __future__ import annotations
 
 import asyncio
-from collections import defaultdict
-from datetime import datetime, timedelta, timezone
-from typing import Dict, List
+from datetime import datetime, time, timedelta, timezone
+from typing import Iterable, List
 
-from sqlalchemy import select
+from sqlalchemy import select, text
 from sqlalchemy.dialects.postgresql import insert
 
+from app.core.settings import settings
 from app.db.models import PercentileBaseline, Snapshot
 from app.db.session import async_session
-from app.domain.options.buckets import ETF_INDEX, contract_metadata, option_bucket
-from app.services.baselines import baseline_service
+from app.domain.options.buckets import ETF_INDEX
+from app.services.baselines import PERCENTILES, baseline_service
+from app.services.parquet_export import load_parquet
+from app.services.sketches import (
+    INDEX_METRICS,
+    METRIC_COLUMNS,
+    OPTION_METRICS,
+    WINDOW_DAYS,
+    SketchStore,
+    sketch_store,
+)
+from app.services.tile_engine import REFRESH_SECONDS
 from app.workers.celery_app import app
 
+_UNDERLYING_SQL = (
+    "CASE ticker "
+    + " ".join(f"WHEN '{etf}' THEN '{index}'" for etf, index in ETF_INDEX.items())
+    + " ELSE ticker END"
+)
+_PERCENTILES_SQL = "percentile_cont(ARRAY[{}]) WITHIN GROUP (ORDER BY m.value)".format(
+    ", ".join(str(q) for q in PERCENTILES)
+)
 
-def _compute_percentiles(values: List[float]) -> Dict[str, float]:
-    ordered = sorted(values)
-    if not ordered:
-        return {"p50": 0.0, "p75": 0.0, "p90": 0.0, "p95": 0.0}
-    def pct(q: float) -> float:
-        idx = int(round((len(ordered) - 1) * q))
-        return float(ordered[idx])
-    return {"p50": pct(0.5), "p75": pct(0.75), "p90": pct(0.9), "p95": pct(0.95)}
+
+def _metric_values_sql(metrics: Iterable[str]) -> str:
+    rows = ", ".join(f"('{metric}', s.{METRIC_COLUMNS[metric]})" for metric in metrics)
+    return f"CROSS JOIN LATERAL (VALUES {rows}) AS m(metric, value)"
+
+
+# Snapshots are written on material changes and keyframes (SnapshotGate), so each row stands
+# for every pipeline cycle until the symbol's next row: it is counted once per cycle it stayed
+# current, capped like ``/snapshots/series`` fills gaps (a keyframe interval plus a refresh).
+_HELD_SQL = """
+WITH held AS (
+    SELECT s.*, LEAST(
+        GREATEST(COALESCE(round(EXTRACT(EPOCH FROM
+            lead(s.ts) OVER (PARTITION BY s.ticker ORDER BY s.ts) - s.ts) / :refresh), 1), 1),
+        :max_cycles
+    )::int AS cycles
+    FROM snapshots s
+    WHERE s.ts >= :cutoff
+)"""
+_CYCLES_SQL = "CROSS JOIN LATERAL generate_series(1, s.cycles) AS c"
+
+# aggregated in Postgres over the typed columns; (bucket_key, ts) / (ticker, ts) are indexed
+OPTION_PERCENTILES_SQL = text(
+    f"""{_HELD_SQL}
+SELECT m.metric, s.bucket_key, {_PERCENTILES_SQL} AS pcts
+FROM held s {_metric_values_sql(OPTION_METRICS)} {_CYCLES_SQL}
+WHERE s.bucket_key IS NOT NULL AND m.value IS NOT NULL
+GROUP BY m.metric, s.bucket_key
+"""
+)
+INDEX_PERCENTILES_SQL = text(
+    f"""{_HELD_SQL}
+SELECT m.metric, 'IDX:' || ({_UNDERLYING_SQL}) AS bucket_key, {_PERCENTILES_SQL} AS pcts
+FROM held s {_metric_values_sql(INDEX_METRICS)} {_CYCLES_SQL}
+WHERE m.value IS NOT NULL
+GROUP BY m.metric, 2
+"""
+)
+
+
+def _sql_params(now: datetime) -> dict:
+    max_gap = settings.snapshot_keyframe_seconds + REFRESH_SECONDS
+    return {
+        "cutoff": now - timedelta(days=WINDOW_DAYS),
+        "refresh": REFRESH_SECONDS,
+        "max_cycles": max_gap // REFRESH_SECONDS,
+    }
 
 
 async def _upsert_percentile_rows(rows: List[dict]) -> None:
@@ -45,68 +102,96 @@ async def _upsert_percentile_rows(rows: List[dict]) -> None:
     await baseline_service.refresh()
 
 
-async def _build_option_baselines() -> None:
-    cutoff = datetime.now(timezone.utc) - timedelta(days=90)
-    metric_values: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
-    async with async_session() as session:
-        stmt = select(Snapshot.ticker, Snapshot.options).where(Snapshot.ts >= cutoff)
-        result = await session.execute(stmt)
-        for ticker, options in result:
-            if not options:
-                continue
-            contracts = options.get("contracts") or {}
-            primary = contracts.get("primary")
-            metadata = contract_metadata(primary)
-            bucket = option_bucket(ticker, options.get("delta_target"), metadata.get("dte"), metadata.get("side"))
-            spread = options.get("spread_pct")
-            flicker = options.get("flicker_per_sec")
-            ivr = options.get("ivr")
-            vo_vol = options.get("vo_vol")
-            if spread is not None:
-                metric_values["spread_pct"][bucket].append(float(spread))
-            if flicker is not None:
-                metric_values["flicker_per_sec"][bucket].append(float(flicker))
-            if ivr is not None:
-                metric_values["iv_rank"][bucket].append(float(ivr))
-            if vo_vol is not None:
-                metric_values["vo_vol"][bucket].append(float(vo_vol))
-    rows = []
+async def _percentile_rows(metrics: Iterable[str]) -> List[dict]:
+    """p50/p75/p90/p95 per (metric, bucket) from the merged 90-day sketch window."""
+
     asof = datetime.now(timezone.utc).date()
-    for metric, buckets in metric_values.items():
-        for bucket_key, values in buckets.items():
-            percentiles = _compute_percentiles(values)
-            rows.append({"metric": metric, "bucket_key": bucket_key, **percentiles, "asof": asof})
+    rows = []
+    for (metric, bucket_key), sketch in (await sketch_store.window(metrics)).items():
+        p50, p75, p90, p95 = sketch.quantiles(PERCENTILES)
+        rows.append(
+            {
+                "metric": metric,
+                "bucket_key": bucket_key,
+                "p50": p50,
+                "p75": p75,
+                "p90": p90,
+                "p95": p95,
+                "asof": asof,
+            }
+        )
+    return rows
+
+
+async def _sql_percentile_rows(stmt) -> List[dict]:
+    """Same rows computed by Postgres from the stored snapshots, each weighted by the cycles it
+    stood for; only the aggregates come back."""
+
+    now = datetime.now(timezone.utc)
+    async with async_session() as session:
+        result = await session.execute(stmt, _sql_params(now))
+        return [
+            {
+                "metric": metric,
+                "bucket_key": bucket_key,
+                **dict(zip(("p50", "p75", "p90", "p95"), pcts)),
+                "asof": now.date(),
+            }
+            for metric, bucket_key, pcts in result
+        ]
+
+
+async def _build_option_baselines() -> None:
+    if settings.baseline_builder == "postgres":
+        rows = await _sql_percentile_rows(OPTION_PERCENTILES_SQL)
+    else:
+        rows = await _percentile_rows(OPTION_METRICS)
     await _upsert_percentile_rows(rows)
 
 
 async def _build_index_baselines() -> None:
-    cutoff = datetime.now(timezone.utc) - timedelta(days=90)
-    metric_values: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
-    async with async_session() as session:
-        stmt = select(Snapshot.ticker, Snapshot.market_micro).where(Snapshot.ts >= cutoff)
-        result = await session.execute(stmt)
-        for ticker, micro in result:
-            if not micro:
-                continue
-            idx_symbol = ETF_INDEX.get(ticker, ticker)
-            bucket = f"IDX:{idx_symbol}"
-            for metric in ("minute_thrust", "micro_chop", "divergence_z", "sec_variance"):
-                key = {
-                    "minute_thrust": "minuteThrust",
-                    "micro_chop": "microChop",
-                    "divergence_z": "divergenceZ",
-                    "sec_variance": "secVariance",
-                }[metric]
-                value = micro.get(key)
-                if value is not None:
-                    metric_values[metric][bucket].append(float(value))
-    rows = []
-    asof = datetime.now(timezone.utc).date()
-    for metric, buckets in metric_values.items():
-        for bucket_key, values in buckets.items():
-            percentiles = _compute_percentiles(values)
-            rows.append({"metric": metric, "bucket_key": bucket_key, **percentiles, "asof": asof})
+    if settings.baseline_builder == "postgres":
+        rows = await _sql_percentile_rows(INDEX_PERCENTILES_SQL)
+    else:
+        rows = await _percentile_rows(INDEX_METRICS)
     await _upsert_percentile_rows(rows)
+    await sketch_store.prune()
+
+
+_SKETCH_COLUMNS = ["bucket_key", *METRIC_COLUMNS.values()]
+
+
+async def _snapshot_day_rows(start: datetime, parquet_root: str | None) -> List[tuple]:
+    """(ticker, bucket_key, *metrics) rows of one day, from the DB or a Parquet export."""
+
+    end = start + timedelta(days=1)
+    if parquet_root:
+        table = load_parquet(
+            parquet_root, "snapshots", start=start, end=end, columns=["ticker", *_SKETCH_COLUMNS]
+        )
+        return list(zip(*(table.column(name).to_pylist() for name in table.column_names)))
+    columns = [getattr(Snapshot, name) for name in _SKETCH_COLUMNS]
+    stmt = select(Snapshot.ticker, *columns).where(Snapshot.ts >= start, Snapshot.ts < end)
+    async with async_session() as session:
+        return [tuple(row) for row in await session.execute(stmt)]
+
+
+async def _backfill_sketches(days: int = WINDOW_DAYS, parquet_root: str | None = None) -> int:
+    """Seed ``percentile_sketches`` from stored snapshots before today, one day at a time.
+
+    Run once after upgrading so the window starts full; from then on the sketches are fed as
+    snapshots are written. Rerunning overwrites the same ``backfill`` rows. With
+    ``parquet_root`` the days are read from a ``parquet_export`` tree instead of the DB."""
+
+    store = SketchStore(source="backfill")
+    today = datetime.now(timezone.utc).date()
+    total = 0
+    for offset in range(days - 1, 0, -1):
+        start = datetime.combine(today - timedelta(days=offset), time.min, tzinfo=timezone.utc)
+        for ticker, *values in await _snapshot_day_rows(start, parquet_root):
+            store.observe(ticker, dict(zip(_SKETCH_COLUMNS, values)), day=start.date())
+        total += await store.flush()
+    return total
 
 
 @app.task(name="app.workers.baselines.build_option_percentiles")
@@ -119,3 +204,8 @@ def build_option_percentiles() -> str:
 def build_index_percentiles() -> str:
     asyncio.run(_build_index_baselines())
     return datetime.now(timezone.utc).isoformat()
+
+
+@app.task(name="app.workers.baselines.backfill_sketches")
+def backfill_sketches(days: int = WINDOW_DAYS, parquet_root: str | None = None) -> int:
+    return asyncio.run(_backfill_sketches(days, parquet_root))
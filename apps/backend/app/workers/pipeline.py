@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import socket
+import time
+
+from app.core.logging import configure_logging
+from app.core.redis import get_redis
+from app.core.settings import settings
+from app.services.baselines import baseline_service
+from app.services.realtime_engine import rebalance_subscriptions, start_realtime
+from app.services.score_series import score_series
+from app.services.sharding import HEARTBEAT_SECONDS, shard_membership
+from app.services.sketches import sketch_store
+from app.services.tile_engine import run_tile_pipeline
+from app.services.watchlist import watchlist_service
+from app.ws.manager import RedisConnectionManager
+
+logger = logging.getLogger(__name__)
+
+
+async def _on_rebalance() -> None:
+    await rebalance_subscriptions()
+    # wake the tile loop so newly owned symbols are built right away
+    watchlist_service.event().set()
+
+
+async def run_pipeline_owner(worker_id: str | None = None) -> None:
+    """Ingest, score and merge realtime data, publishing tiles for stateless API workers.
+
+    With ``worker_id`` set the process joins the shard ring and only handles the symbols it owns.
+    """
+
+    if settings.state_backend != "redis":
+        raise RuntimeError("STATE_BACKEND=redis required for a standalone pipeline owner")
+    redis = get_redis()
+    manager = RedisConnectionManager(redis)
+    await watchlist_service.seed_if_empty()
+    tasks = [
+        watchlist_service.listen(redis),
+        baseline_service.run(),
+        sketch_store.run(),
+        score_series.run(),
+    ]
+    if worker_id:
+        await shard_membership.join(redis, worker_id)
+        # let sibling workers register before claiming symbols
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        await shard_membership.heartbeat()
+        tasks.append(shard_membership.run(_on_rebalance))
+    logger.info("pipeline-owner-started", extra={"worker": worker_id, **shard_membership.stats()})
+    try:
+        await asyncio.gather(run_tile_pipeline(manager), start_realtime(manager), *tasks)
+    finally:
+        await shard_membership.leave()
+
+
+def _worker_main(worker_id: str | None) -> None:
+    configure_logging()
+    asyncio.run(run_pipeline_owner(worker_id))
+
+
+def supervise(shards: int, prefix: str) -> None:
+    """Run one pipeline process per shard and restart any that exit."""
+
+    ctx = multiprocessing.get_context("spawn")
+    workers: dict[str, multiprocessing.Process] = {}
+    try:
+        while True:
+            for idx in range(shards):
+                worker_id = f"{prefix}-{idx}"
+                proc = workers.get(worker_id)
+                if proc is not None and proc.is_alive():
+                    continue
+                if proc is not None:
+                    logger.warning(
+                        "pipeline-worker-exited", extra={"worker": worker_id, "code": proc.exitcode}
+                    )
+                proc = ctx.Process(target=_worker_main, args=(worker_id,), name=worker_id)
+                proc.start()
+                workers[worker_id] = proc
+            time.sleep(1)
+    finally:
+        for proc in workers.values():
+            proc.terminate()
+        for proc in workers.values():
+            proc.join(timeout=5)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Tile pipeline owner")
+    parser.add_argument(
+        "--shards", type=int, default=1, help="worker processes sharing the watchlist"
+    )
+    parser.add_argument("--worker-id", default=None, help="join the shard ring as this worker")
+    parser.add_argument(
+        "--prefix", default=socket.gethostname(), help="worker id prefix for --shards"
+    )
+    args = parser.parse_args(argv)
+    configure_logging()
+    if args.shards > 1:
+        supervise(args.shards, args.prefix)
+    else:
+        _worker_main(args.worker_id)
+
+
+if __name__ == "__main__":
+    main()
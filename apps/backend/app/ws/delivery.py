@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict
+
+from app.domain.tile import Tile
+
+
+@dataclass(frozen=True)
+class Tier:
+    name: str
+    interval: float  # minimum seconds between flushes
+    band_only: bool = False  # only deliver a symbol when its probability band changed
+
+
+# Most to least expensive; "auto" clients start at the top and move along this list.
+TIERS = (Tier("5hz", 0.2), Tier("1hz", 1.0), Tier("band", 1.0, band_only=True))
+TIER_NAMES = tuple(tier.name for tier in TIERS)
+AUTO = "auto"
+
+# A flush that spends more than this share of the tier interval blocked on sends is "slow".
+SLOW_RATIO = 0.5
+FAST_RATIO = 0.05
+DOWNGRADE_AFTER = 2  # consecutive slow flushes
+UPGRADE_AFTER = 30  # consecutive fast flushes
+
+SendTile = Callable[[str, int, Any], Awaitable[None]]
+Sleep = Callable[[float], Awaitable[None]]
+
+
+def _band(data: Tile | dict[str, Any]) -> str | None:
+    if isinstance(data, Tile):
+        return data.band.label
+    return (data.get("band") or {}).get("label")
+
+
+class DeliveryQueue:
+    """Newest tile per symbol for one client, flushed no faster than the client's tier.
+
+    Updates that arrive while a flush is pending replace the older tile for that symbol
+    (conflation). With ``auto`` the tier follows how long sends take to drain: sustained slow
+    flushes step down a tier, a long run of fast ones steps back up. ``clock`` and ``sleep``
+    time the flushes and wait out the tier interval.
+    """
+
+    def __init__(
+        self,
+        tier: str = AUTO,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Sleep = asyncio.sleep,
+    ) -> None:
+        self._clock = clock
+        self._sleep = sleep
+        self._pending: Dict[str, tuple[int, Any]] = {}
+        self._delivered: Dict[str, int] = {}
+        self._bands: Dict[str, str | None] = {}
+        self._ready = asyncio.Event()
+        self._slow = 0
+        self._fast = 0
+        self.requested = AUTO
+        self.tier = TIERS[0]
+        self.sent = 0
+        self.conflated = 0
+        self.skipped = 0
+        self.set_tier(tier)
+
+    def set_tier(self, name: str) -> None:
+        if name != AUTO and name not in TIER_NAMES:
+            raise ValueError(f"unknown tier {name!r}")
+        self.requested = name
+        self._slow = self._fast = 0
+        if name != AUTO:
+            self.tier = TIERS[TIER_NAMES.index(name)]
+
+    def offer(self, symbol: str, version: int, data: Tile | dict[str, Any]) -> None:
+        if symbol in self._pending:
+            self.conflated += 1
+        self._pending[symbol] = (version, data)
+        self._ready.set()
+
+    def mark_delivered(self, symbol: str, version: int, data: Tile | dict[str, Any]) -> None:
+        """Record a tile sent outside the queue (e.g. in a snapshot) so older pending ones drop."""
+
+        if version:
+            self._delivered[symbol] = max(version, self._delivered.get(symbol, 0))
+        self._bands[symbol] = _band(data)
+
+    def discard(self, symbol: str) -> None:
+        self._pending.pop(symbol, None)
+
+    async def run(self, send: SendTile) -> None:
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            batch, self._pending = self._pending, {}
+            started = self._clock()
+            for symbol, (version, data) in batch.items():
+                if version and version <= self._delivered.get(symbol, 0):
+                    self.skipped += 1
+                    continue
+                if self.tier.band_only and self._bands.get(symbol, "") == _band(data):
+                    self.skipped += 1
+                    continue
+                await send(symbol, version, data)
+                self.mark_delivered(symbol, version, data)
+                self.sent += 1
+            self._adapt(self._clock() - started)
+            await self._sleep(self.tier.interval)
+
+    def _adapt(self, elapsed: float) -> None:
+        if self.requested != AUTO:
+            return
+        index = TIERS.index(self.tier)
+        if elapsed > self.tier.interval * SLOW_RATIO:
+            self._slow, self._fast = self._slow + 1, 0
+            if self._slow >= DOWNGRADE_AFTER and index + 1 < len(TIERS):
+                self.tier, self._slow = TIERS[index + 1], 0
+        elif elapsed < self.tier.interval * FAST_RATIO:
+            self._fast, self._slow = self._fast + 1, 0
+            if self._fast >= UPGRADE_AFTER and index > 0:
+                self.tier, self._fast = TIERS[index - 1], 0
+        else:
+            self._slow = self._fast = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "tier": self.tier.name,
+            "requested": self.requested,
+            "pending": len(self._pending),
+            "sent": self.sent,
+            "conflated": self.conflated,
+            "skipped": self.skipped,
+        }
@@ -1,32 +1,273 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Set
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable
 
 from fastapi import WebSocket
 
+from app.services.watchlist import watchlist_service
+from app.ws.delivery import AUTO, DeliveryQueue
+from app.ws.projection import (
+    DEFAULT_FIELD_SET,
+    FIELD_SETS,
+    JSON,
+    SUBPROTOCOLS,
+    Frame,
+    ProjectionCache,
+    encode,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from app.domain.tile import Tile
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_CHANNEL = "kcu:broadcast"
+ALL_SYMBOLS = "*"
+
+
+@dataclass
+class ClientSession:
+    """What one socket wants: symbol -> field set, ``*`` meaning every symbol.
+
+    New sockets get every symbol in full; the first explicit subscribe replaces that default,
+    and the first unsubscribe turns it into the current watchlist minus the dropped symbols.
+    """
+
+    subscriptions: Dict[str, str] = field(default_factory=lambda: {ALL_SYMBOLS: DEFAULT_FIELD_SET})
+    explicit: bool = False
+    encoding: str = JSON
+    delivery: DeliveryQueue = field(default_factory=DeliveryQueue)
+    sender: asyncio.Task | None = None
+
+    def fields_for(self, symbol: str) -> str | None:
+        return self.subscriptions.get(symbol) or self.subscriptions.get(ALL_SYMBOLS)
+
+
+def _negotiate(websocket: WebSocket) -> str | None:
+    for offered in websocket.scope.get("subprotocols") or []:
+        if offered in SUBPROTOCOLS:
+            return offered
+    return None
+
+
+async def _send(websocket: WebSocket, frame: Frame) -> None:
+    if isinstance(frame, bytes):
+        await websocket.send_bytes(frame)
+    else:
+        await websocket.send_text(frame)
+
+
+def _parse_symbols(value: Any) -> list[str]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not value:
+        raise ValueError("symbols must be a non-empty list")
+    return [str(symbol).upper() for symbol in value]
+
 
 class ConnectionManager:
-    def __init__(self) -> None:
-        self._connections: Set[WebSocket] = set()
+    def __init__(self, projections: ProjectionCache | None = None) -> None:
+        self._sessions: Dict[WebSocket, ClientSession] = {}
         self._lock = asyncio.Lock()
+        self.projections = projections or ProjectionCache()
 
     async def connect(self, websocket: WebSocket) -> None:
-        await websocket.accept()
+        subprotocol = _negotiate(websocket)
+        await websocket.accept(subprotocol=subprotocol)
+        session = ClientSession(encoding=SUBPROTOCOLS[subprotocol] if subprotocol else JSON)
+        try:
+            session.delivery.set_tier(websocket.query_params.get("tier", AUTO))
+        except ValueError:
+            pass
+        session.sender = asyncio.create_task(self._deliver(websocket, session))
         async with self._lock:
-            self._connections.add(websocket)
+            self._sessions[websocket] = session
 
     async def disconnect(self, websocket: WebSocket) -> None:
         async with self._lock:
-            self._connections.discard(websocket)
+            session = self._sessions.pop(websocket, None)
+        if session and session.sender:
+            session.sender.cancel()
+
+    async def _deliver(self, websocket: WebSocket, session: ClientSession) -> None:
+        async def send(symbol: str, version: int, data: "Tile | dict") -> None:
+            field_set = session.fields_for(symbol)
+            if field_set is not None:
+                frame = self.projections.frame(symbol, version, data, field_set, session.encoding)
+                await _send(websocket, frame)
+
+        try:
+            await session.delivery.run(send)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.info("ws-delivery-stopped", extra={"error": str(exc)})
+            async with self._lock:
+                self._sessions.pop(websocket, None)
+
+    async def close(self) -> None:
+        async with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            if session.sender:
+                session.sender.cancel()
+
+    def session(self, websocket: WebSocket) -> ClientSession | None:
+        return self._sessions.get(websocket)
+
+    async def send_local(self, payload: dict) -> None:
+        async with self._lock:
+            recipients = list(self._sessions.items())
+        frames: Dict[str, Frame] = {}
+        for connection, session in recipients:
+            if session.encoding not in frames:
+                frames[session.encoding] = encode(payload, session.encoding)
+            await _send(connection, frames[session.encoding])
 
     async def broadcast(self, payload: dict) -> None:
+        await self.send_local(payload)
+
+    async def broadcast_tile(self, tile: "Tile") -> None:
+        await self.send_tile_local(tile.symbol, tile.version, tile)
+
+    async def send_tile_local(self, symbol: str, version: int, data: "Tile | dict") -> None:
         async with self._lock:
-            recipients = list(self._connections)
-        for connection in recipients:
-            await connection.send_json(payload)
+            recipients = list(self._sessions.items())
+        for _, session in recipients:
+            if session.fields_for(symbol) is not None:
+                session.delivery.offer(symbol, version, data)
+
+    async def send_snapshot(self, websocket: WebSocket, tiles: Iterable["Tile"]) -> None:
+        """One bulk ``snapshot`` frame per field set the socket uses for these tiles."""
+
+        session = self._sessions.get(websocket) or ClientSession()
+        groups: Dict[str, list["Tile"]] = {}
+        for tile in tiles:
+            field_set = session.fields_for(tile.symbol)
+            if field_set is not None:
+                groups.setdefault(field_set, []).append(tile)
+                session.delivery.mark_delivered(tile.symbol, tile.version, tile)
+        for field_set, group in groups.items():
+            await _send(websocket, self.projections.snapshot(group, field_set, session.encoding))
+
+    async def handle_message(self, websocket: WebSocket, text: str) -> list[str]:
+        """Apply a client subscribe/unsubscribe message (always JSON text, whatever the stream
+        encoding); returns symbols that need a snapshot."""
+
+        session = self._sessions.get(websocket)
+        if session is None:
+            return []
+        try:
+            message = json.loads(text)
+            if not isinstance(message, dict):
+                raise ValueError("message must be an object")
+            action = message.get("action")
+            if action == "subscribe":
+                field_set = message.get("fields", DEFAULT_FIELD_SET)
+                if field_set not in FIELD_SETS:
+                    raise ValueError(f"unknown field set {field_set!r}")
+                symbols = _parse_symbols(message.get("symbols"))
+                if not session.explicit:
+                    session.subscriptions.clear()
+                    session.explicit = True
+                for symbol in symbols:
+                    session.subscriptions[symbol] = field_set
+                reply = {"type": "subscribed", "symbols": symbols, "fields": field_set}
+                snapshot = symbols
+            elif action == "tier":
+                session.delivery.set_tier(str(message.get("tier", AUTO)))
+                reply = {"type": "tier", "tier": session.delivery.requested}
+                snapshot = []
+            elif action == "unsubscribe":
+                symbols = _parse_symbols(message.get("symbols"))
+                if not session.explicit:
+                    field_set = session.subscriptions.pop(ALL_SYMBOLS, DEFAULT_FIELD_SET)
+                    for symbol in await watchlist_service.list():
+                        session.subscriptions.setdefault(symbol, field_set)
+                    session.explicit = True
+                for symbol in symbols:
+                    session.subscriptions.pop(symbol, None)
+                    session.delivery.discard(symbol)
+                reply = {"type": "unsubscribed", "symbols": symbols}
+                snapshot = []
+            else:
+                raise ValueError(f"unknown action {action!r}")
+        except ValueError as exc:  # includes JSONDecodeError
+            await _send(websocket, encode({"type": "error", "message": str(exc)}, session.encoding))
+            return []
+        await _send(websocket, encode(reply, session.encoding))
+        return snapshot
 
     async def heartbeat(self) -> None:
         while True:
             await asyncio.sleep(20)
-            await self.broadcast({"type": "heartbeat"})
+            await self.send_local({"type": "heartbeat"})
+
+    def stats(self) -> dict[str, Any]:
+        field_sets: Dict[str, int] = {}
+        encodings: Dict[str, int] = {}
+        tiers: Dict[str, int] = {}
+        delivery = {"sent": 0, "conflated": 0, "skipped": 0}
+        for session in self._sessions.values():
+            for name in set(session.subscriptions.values()):
+                field_sets[name] = field_sets.get(name, 0) + 1
+            encodings[session.encoding] = encodings.get(session.encoding, 0) + 1
+            queue = session.delivery
+            tiers[queue.tier.name] = tiers.get(queue.tier.name, 0) + 1
+            delivery["sent"] += queue.sent
+            delivery["conflated"] += queue.conflated
+            delivery["skipped"] += queue.skipped
+        return {
+            "clients": len(self._sessions),
+            "field_sets": field_sets,
+            "encodings": encodings,
+            "tiers": tiers,
+            "delivery": delivery,
+            "projections": self.projections.stats(),
+        }
+
+
+class RedisConnectionManager(ConnectionManager):
+    """Broadcasts go through Redis pub/sub so every API worker's sockets get them via relay()."""
+
+    def __init__(
+        self, redis, channel: str = BROADCAST_CHANNEL, projections: ProjectionCache | None = None
+    ) -> None:
+        super().__init__(projections)
+        self._redis = redis
+        self._channel = channel
+
+    async def broadcast(self, payload: dict) -> None:
+        await self._redis.publish(self._channel, json.dumps(payload))
+
+    async def broadcast_tile(self, tile: "Tile") -> None:
+        data = self.projections.fragment(tile.symbol, tile.version, tile)
+        await self._redis.publish(
+            self._channel, f'{{"type":"tile","version":{tile.version},"data":{data}}}'
+        )
+
+    async def relay(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self._channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    if payload.get("type") == "tile" and "version" in payload:
+                        data = payload["data"]
+                        await self.send_tile_local(data["symbol"], payload["version"], data)
+                    else:
+                        await self.send_local(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("ws-relay-reconnect", extra={"error": str(exc)})
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
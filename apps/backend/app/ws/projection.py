@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Any, Dict, Tuple
+
+import msgpack
+import numpy as np
+
+from app.core.settings import settings
+from app.domain.tile import Tile
+
+SUMMARY_FIELDS = (
+    "symbol",
+    "regime",
+    "probability_to_action",
+    "band",
+    "confidence",
+    "confidence_score",
+    "grade",
+    "eta_seconds",
+    "delta_to_entry",
+    "key_level_label",
+    "patience_candle",
+    "options_top3",
+    "timestamps",
+)
+CHART_FIELDS = SUMMARY_FIELDS + ("bars", "ema8", "ema21", "vwap", "key_levels")
+
+# None = every field of the public tile
+FIELD_SETS: Dict[str, Tuple[str, ...] | None] = {
+    "summary": SUMMARY_FIELDS,
+    "chart": CHART_FIELDS,
+    "full": None,
+}
+DEFAULT_FIELD_SET = "full"
+
+JSON = "json"
+MSGPACK = "msgpack"
+# Offered via Sec-WebSocket-Protocol; clients that offer none of these get JSON text frames.
+SUBPROTOCOLS = {"kcu.msgpack.v1": MSGPACK}
+
+# msgpack ext type for a little-endian float64 array (a Float64Array on the client); NaN = null
+FLOAT64_EXT = 1
+SERIES_FIELDS = ("ema8", "ema21", "vwap")
+BAR_FIELDS = ("o", "h", "l", "c", "v")
+# First byte of every binary frame
+FRAME_RAW = 0
+FRAME_DEFLATE = 1
+
+Frame = str | bytes
+# Distinct (field set, encoding, symbol set) snapshots kept; per-client subsets can be many
+MAX_SNAPSHOTS = 64
+
+
+def encode(message: Any, encoding: str = JSON) -> Frame:
+    """JSON: the text ``WebSocket.send_json`` would produce, so pre-encoded frames stay
+    byte-identical. msgpack: a binary frame, deflated past ``WS_COMPRESS_MIN_BYTES``."""
+
+    if encoding == MSGPACK:
+        return _binary_frame(msgpack.packb(message, use_bin_type=True))
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def decode(frame: Frame) -> Any:
+    if isinstance(frame, str):
+        return json.loads(frame)
+    body = frame[1:]
+    if frame[0] == FRAME_DEFLATE:
+        body = zlib.decompress(body)
+    return msgpack.unpackb(body, ext_hook=_ext_hook)
+
+
+def _binary_frame(body: bytes) -> bytes:
+    if len(body) >= settings.ws_compress_min_bytes:
+        deflated = zlib.compress(body, settings.ws_compress_level)
+        if len(deflated) < len(body):
+            return bytes((FRAME_DEFLATE,)) + deflated
+    return bytes((FRAME_RAW,)) + body
+
+
+def _float64(values: list[Any]) -> msgpack.ExtType:
+    array = np.array([np.nan if value is None else value for value in values], dtype="<f8")
+    return msgpack.ExtType(FLOAT64_EXT, array.tobytes())
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == FLOAT64_EXT:
+        return [None if value != value else value for value in np.frombuffer(data, "<f8").tolist()]
+    return msgpack.ExtType(code, data)
+
+
+def pack_arrays(data: dict[str, Any]) -> dict[str, Any]:
+    """Binary tile shape: indicator series as float64 blobs and bars as columns
+    (``{"t": [...], "o": <f64>, ...}``) instead of one object per bar."""
+
+    packed = dict(data)
+    for name in SERIES_FIELDS:
+        if name in packed:
+            packed[name] = _float64(packed[name])
+    if "bars" in packed:
+        bars = packed["bars"]
+        columns: dict[str, Any] = {"t": [bar.get("t") for bar in bars]}
+        for name in BAR_FIELDS:
+            columns[name] = _float64([bar.get(name) for bar in bars])
+        packed["bars"] = columns
+    return packed
+
+
+def project(data: dict[str, Any], field_set: str) -> dict[str, Any]:
+    fields = FIELD_SETS[field_set]
+    if fields is None:
+        return data
+    return {name: data[name] for name in fields if name in data}
+
+
+def tile_message(data: dict[str, Any], field_set: str, encoding: str = JSON) -> dict[str, Any]:
+    projected = project(data, field_set)
+    if encoding == MSGPACK:
+        projected = pack_arrays(projected)
+    message: dict[str, Any] = {"type": "tile", "data": projected}
+    if field_set != DEFAULT_FIELD_SET:
+        message["fields"] = field_set
+    return message
+
+
+def _assemble(
+    kind: str, key: str, fragments: list[Frame], many: bool, field_set: str, encoding: str
+) -> Frame:
+    """``{"type": kind, key: <fragment or [fragments]>[, "fields": field_set]}`` from fragments that
+    are already encoded, without decoding them again; same bytes as encoding the whole message."""
+
+    fields = field_set != DEFAULT_FIELD_SET
+    if encoding == MSGPACK:
+        packer = msgpack.Packer(use_bin_type=True)
+        body = packer.pack_map_header(3 if fields else 2) + packer.pack("type") + packer.pack(kind)
+        body += packer.pack(key)
+        if many:
+            body += packer.pack_array_header(len(fragments))
+        body += b"".join(fragments)  # type: ignore[arg-type]
+        if fields:
+            body += packer.pack("fields") + packer.pack(field_set)
+        return _binary_frame(body)
+    value = "[" + ",".join(fragments) + "]" if many else fragments[0]  # type: ignore[arg-type]
+    tail = f',"fields":{encode(field_set)}' if fields else ""
+    return f'{{"type":{encode(kind)},"{key}":{value}{tail}}}'
+
+
+class ProjectionCache:
+    """Serialized tile payloads, built once per (symbol, tile version).
+
+    Keeps the public dict, the encoded data for each (field set, encoding) and the finished
+    ``tile`` frames; only the latest version per symbol is kept. Tiles that were never stored
+    (version 0) are encoded on every call.
+    """
+
+    def __init__(self) -> None:
+        self._public: Dict[str, tuple[int, dict[str, Any]]] = {}
+        self._fragments: Dict[tuple[str, str, str], tuple[int, Frame]] = {}
+        self._frames: Dict[tuple[str, str, str], tuple[int, Frame]] = {}
+        self._snapshots: Dict[tuple[str, str, tuple], tuple[tuple, Frame]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def public(self, symbol: str, version: int, data: Tile | dict[str, Any]) -> dict[str, Any]:
+        if not isinstance(data, Tile):
+            return data
+        cached = self._public.get(symbol)
+        if version and cached and cached[0] == version:
+            return cached[1]
+        public = data.to_public()
+        if version:
+            self._public[symbol] = (version, public)
+        return public
+
+    def fragment(
+        self,
+        symbol: str,
+        version: int,
+        data: Tile | dict[str, Any],
+        field_set: str = DEFAULT_FIELD_SET,
+        encoding: str = JSON,
+    ) -> Frame:
+        """The encoded ``data`` object of a tile message (JSON text or msgpack bytes)."""
+
+        key = (symbol, field_set, encoding)
+        cached = self._fragments.get(key)
+        if version and cached and cached[0] == version:
+            return cached[1]
+        projected = project(self.public(symbol, version, data), field_set)
+        if encoding == MSGPACK:
+            fragment: Frame = msgpack.packb(pack_arrays(projected), use_bin_type=True)
+        else:
+            fragment = encode(projected)
+        if version:
+            self._fragments[key] = (version, fragment)
+        return fragment
+
+    def frame(
+        self,
+        symbol: str,
+        version: int,
+        data: Tile | dict[str, Any],
+        field_set: str = DEFAULT_FIELD_SET,
+        encoding: str = JSON,
+    ) -> Frame:
+        key = (symbol, field_set, encoding)
+        cached = self._frames.get(key)
+        if version and cached and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        fragment = self.fragment(symbol, version, data, field_set, encoding)
+        frame = _assemble("tile", "data", [fragment], False, field_set, encoding)
+        if version:
+            self._frames[key] = (version, frame)
+        return frame
+
+    def snapshot(
+        self, tiles: list[Tile], field_set: str = DEFAULT_FIELD_SET, encoding: str = JSON
+    ) -> Frame:
+        """One ``{"type": "snapshot", "tiles": [...]}`` frame, in symbol order; rebuilt only when
+        one of its tiles changed, so a reconnect storm costs one build per tile set."""
+
+        tiles = sorted(tiles, key=lambda tile: tile.symbol)
+        key = (field_set, encoding, tuple(tile.symbol for tile in tiles))
+        versions = tuple(tile.version for tile in tiles)
+        cached = self._snapshots.get(key)
+        if cached and cached[0] == versions and all(versions):
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        fragments = [
+            self.fragment(tile.symbol, tile.version, tile, field_set, encoding) for tile in tiles
+        ]
+        frame = _assemble("snapshot", "tiles", fragments, True, field_set, encoding)
+        if len(self._snapshots) >= MAX_SNAPSHOTS and key not in self._snapshots:
+            self._snapshots.clear()
+        self._snapshots[key] = (versions, frame)
+        return frame
+
+    def discard(self, symbol: str) -> None:
+        self._public.pop(symbol, None)
+        for cache in (self._fragments, self._frames):
+            for key in [key for key in cache if key[0] == symbol]:
+                del cache[key]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._frames),
+            "fragments": len(self._fragments),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Shared by the WS hub and the HTTP tile routes
+tile_payloads = ProjectionCache()
@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(element, compiler, **kw):
+    # lets the Postgres models be created on the sqlite databases tests use
+    return "JSON"
+
+
+@pytest.fixture
+async def sqlite_sessions(tmp_path):
+    """``await sqlite_sessions(*models)``: a session factory on a fresh sqlite file holding those
+    models' tables (its engine is ``factory.kw["bind"]``), disposed after the test."""
+
+    engines = []
+
+    async def create(*models) -> async_sessionmaker[AsyncSession]:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / f'db{len(engines)}.sqlite'}")
+        engines.append(engine)
+        async with engine.begin() as conn:
+            for model in models:
+                await conn.run_sync(model.__table__.create)
+        return async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    yield create
+    for engine in engines:
+        await engine.dispose()
@@ -0,0 +1,100 @@
+import math
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.db.models import Candle, Levels, OptionSnapshot
+from app.services.backtest import load_day_db, load_day_parquet, run_backtest, score_day
+from app.services.parquet_export import export_range
+
+pytest.importorskip("pyarrow")
+
+DAYS = (date(2026, 3, 2), date(2026, 3, 3))
+OPEN = timedelta(hours=14, minutes=30)
+
+
+def _close(day: int, minute: int) -> float:
+    return 100 + day + 0.05 * minute + math.sin(minute / 7)
+
+
+@pytest.fixture
+async def sessions(sqlite_sessions):
+    factory = await sqlite_sessions(Candle, OptionSnapshot, Levels)
+    async with factory() as session:
+        for offset, day in enumerate(DAYS):
+            session.add(Levels(day=day, ticker="SPY", prior_close=99.5, premarket_high=101))
+            start = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc) + OPEN
+            for minute in range(90):
+                close = _close(offset, minute)
+                ts = start + timedelta(minutes=minute)
+                session.add(
+                    Candle(
+                        ticker="SPY",
+                        timeframe="1m",
+                        ts=ts,
+                        open=close - 0.02,
+                        high=close + 0.1,
+                        low=close - 0.1,
+                        close=close,
+                        volume=1000 + 10 * minute,
+                    )
+                )
+                if minute % 5 == 0:
+                    session.add(
+                        OptionSnapshot(
+                            ticker="SPY",
+                            ts=ts,
+                            contract="O:SPY260306C00100000",
+                            bid=1.0 + minute / 100,
+                            ask=1.05 + minute / 100,
+                            mid=1.025 + minute / 100,
+                            iv=0.2,
+                            delta=0.45,
+                            oi=500,
+                            vol=50 + minute,
+                        )
+                    )
+        await session.commit()
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_score_day_forward_returns_and_transitions(sessions):
+    result = score_day(await load_day_db(sessions, "SPY", DAYS[1]))
+    assert len(result.minutes) == 90 and result.days == 1
+    first = result.minutes[0]
+    assert first["ret_5m"] == round(_close(1, 5) / _close(1, 0) - 1, 6)
+    assert result.minutes[-30]["ret_30m"] is None and result.minutes[-31]["ret_30m"] is not None
+    changes = [
+        (row["ts"], previous["band"], row["band"])
+        for previous, row in zip(result.minutes, result.minutes[1:])
+        if row["band"] != previous["band"]
+    ]
+    assert [(row["ts"], row["from"], row["to"]) for row in result.transitions] == changes
+
+
+@pytest.mark.asyncio
+async def test_parallel_parquet_backtest_matches_database(sessions, tmp_path):
+    root = tmp_path / "lake"
+    start = datetime(2026, 2, 26, tzinfo=timezone.utc)
+    await export_range(
+        start,
+        start + timedelta(days=6),
+        root,
+        tables=["candles", "option_snapshots", "levels"],
+        session_factory=sessions,
+    )
+
+    data = load_day_parquet(str(root), "SPY", DAYS[1])
+    assert data.level.prior_close == 99.5 and len(data.candles) == 180
+    direct = [score_day(await load_day_db(sessions, "SPY", day)).minutes for day in DAYS]
+    serial = run_backtest(["spy"], DAYS[0], DAYS[1], parquet_root=str(root), workers=1)
+    parallel = run_backtest(["SPY"], DAYS[0], DAYS[1], parquet_root=str(root), workers=2)
+    assert serial.days == parallel.days == 2
+    assert serial.minutes == parallel.minutes
+    assert [row["probability"] for row in serial.minutes] == [
+        row["probability"] for minutes in direct for row in minutes
+    ]
+    summary = parallel.summary()
+    assert summary["minutes"] == 180
+    assert sum(band["minutes"] for band in summary["bands"].values()) == 180
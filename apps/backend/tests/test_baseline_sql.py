@@ -0,0 +1,150 @@
+import importlib.util
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.settings import settings
+from app.services.baselines import PERCENTILES
+from app.services.sketches import METRIC_COLUMNS, snapshot_columns
+from app.services.tile_engine import REFRESH_SECONDS
+from app.workers.baselines import INDEX_PERCENTILES_SQL, OPTION_PERCENTILES_SQL, _sql_params
+
+_spec = importlib.util.spec_from_file_location(
+    "migration_0005",
+    Path(__file__).parents[1] / "alembic/versions/0005_add_snapshot_metric_columns.py",
+)
+migration = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(migration)
+
+NOW = datetime.now(timezone.utc)
+
+
+def _contract(root: str, days: int, side: str) -> str:
+    expiry = (NOW + timedelta(days=days)).strftime("%y%m%d")
+    return f"O:{root}{expiry}{side}00450000"
+
+
+CASES = [
+    ("SPY", {"delta_target": 0.3, "contracts": {"primary": _contract("SPY", 2, "C")}}),
+    ("QQQ", {"delta_target": 0.5, "ivr": 41, "contracts": {"primary": _contract("QQQ", 10, "P")}}),
+    ("AAPL", {"delta_target": 0.02, "contracts": {"primary": _contract("AAPL", 40, "C")}}),
+    ("TSLA", {"delta_target": 0.99, "contracts": {"primary": _contract("TSLA", -3, "P")}}),
+    ("NVDA", {"vo_vol": 0.002, "contracts": {"primary": "O:NVDA-WEIRD-C"}}),
+    ("MSFT", {"delta_target": 0.45, "spread_pct": 4.5, "flicker_per_sec": 1.5}),
+]
+MICRO = {"microChop": 0.4, "minuteThrust": -0.2, "divergenceZ": 1.1, "secVariance": 0.00002}
+
+
+@pytest.fixture
+async def pg_snapshots():
+    """A temporary ``snapshots`` table shadowing the real one for the test's transaction."""
+
+    engine = create_async_engine(settings.database_url_async)
+    try:
+        conn = await engine.connect()
+    except OSError:
+        await engine.dispose()
+        pytest.skip("postgres not reachable")
+    try:
+        if conn.dialect.name != "postgresql":
+            pytest.skip("postgres only")
+        await conn.begin()
+        metrics = ", ".join(f"{column} double precision" for column in METRIC_COLUMNS.values())
+        await conn.execute(
+            text(
+                "CREATE TEMP TABLE snapshots (id uuid PRIMARY KEY DEFAULT gen_random_uuid(), "
+                "ticker text, ts timestamptz, options jsonb, market_micro jsonb, "
+                f"bucket_key varchar(128), {metrics}) ON COMMIT DROP"
+            )
+        )
+        yield conn
+        await conn.rollback()
+    finally:
+        await conn.close()
+        await engine.dispose()
+
+
+async def test_migration_backfill_matches_snapshot_columns(pg_snapshots):
+    await pg_snapshots.execute(
+        text(
+            "INSERT INTO snapshots (ticker, ts, options, market_micro) "
+            "VALUES (:ticker, :ts, CAST(:options AS jsonb), CAST(:micro AS jsonb))"
+        ),
+        [
+            {
+                "ticker": ticker,
+                "ts": NOW,
+                "options": json.dumps(options),
+                "micro": json.dumps(MICRO),
+            }
+            for ticker, options in CASES
+        ],
+    )
+    window = {"start": NOW - timedelta(days=1), "end": NOW + timedelta(days=1)}
+    await pg_snapshots.execute(text(migration.METRICS_SQL), window)
+    await pg_snapshots.execute(text(migration.BUCKET_SQL), window)
+
+    columns = ["bucket_key", *METRIC_COLUMNS.values()]
+    result = await pg_snapshots.execute(text(f"SELECT ticker, {', '.join(columns)} FROM snapshots"))
+    stored = {row[0]: dict(zip(columns, row[1:])) for row in result}
+    for ticker, options in CASES:
+        assert stored[ticker] == pytest.approx(snapshot_columns(ticker, options, MICRO)), ticker
+
+
+async def test_percentile_sql_weights_rows_by_the_cycles_they_stood_for(pg_snapshots):
+    rng = np.random.default_rng(11)
+    spread = rng.gamma(2.0, 3.0, 200)
+    chop = rng.uniform(0, 1, 200)
+    # a row every 1-8 cycles, alternating tickers; per-ticker gaps past a keyframe plus a refresh
+    # count as that cap
+    gaps = rng.integers(1, 9, 200)
+    offsets = np.cumsum(gaps) * REFRESH_SECONDS
+    tickers = np.where(np.arange(200) % 2, "SPY", "QQQ")
+    params = _sql_params(NOW)
+    cycles = np.ones(200, dtype=int)
+    for ticker in ("SPY", "QQQ"):
+        (owned,) = np.nonzero(tickers == ticker)
+        held = np.diff(offsets[owned]) // REFRESH_SECONDS
+        cycles[owned[:-1]] = np.minimum(held, params["max_cycles"])
+    start = NOW - timedelta(seconds=int(offsets[-1]) + 60)
+    rows = [
+        {
+            "ticker": str(tickers[i]),
+            "ts": start + timedelta(seconds=int(offsets[i])),
+            "bucket": "SPX:CALL:Delta[0.25-0.35]:DTE[0-3]",
+            "spread": float(spread[i]),
+            "chop": float(chop[i]),
+        }
+        for i in range(200)
+    ]
+    # outside the 90-day window
+    rows.append({**rows[0], "ts": NOW - timedelta(days=120), "spread": 1e6, "chop": 1e6})
+    await pg_snapshots.execute(
+        text(
+            "INSERT INTO snapshots (ticker, ts, bucket_key, spread_pct, micro_chop) "
+            "VALUES (:ticker, :ts, :bucket, :spread, :chop)"
+        ),
+        rows,
+    )
+    option_rows = {
+        (metric, bucket): pcts
+        for metric, bucket, pcts in await pg_snapshots.execute(OPTION_PERCENTILES_SQL, params)
+    }
+    index_rows = {
+        (metric, bucket): pcts
+        for metric, bucket, pcts in await pg_snapshots.execute(INDEX_PERCENTILES_SQL, params)
+    }
+
+    def per_cycle(values, mask=slice(None)):
+        return np.quantile(np.repeat(values[mask], cycles[mask]), PERCENTILES)
+
+    assert set(option_rows) == {("spread_pct", "SPX:CALL:Delta[0.25-0.35]:DTE[0-3]")}
+    assert list(option_rows.values())[0] == pytest.approx(per_cycle(spread))
+    assert set(index_rows) == {("micro_chop", "IDX:SPX"), ("micro_chop", "IDX:NDX")}
+    assert index_rows[("micro_chop", "IDX:SPX")] == pytest.approx(per_cycle(chop, tickers == "SPY"))
+    assert index_rows[("micro_chop", "IDX:NDX")] == pytest.approx(per_cycle(chop, tickers == "QQQ"))
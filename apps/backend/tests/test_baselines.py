@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import update
+
+from app.core.settings import Settings
+from app.db.models import PercentileBaseline
+from app.services.baselines import (
+    BaselineService,
+    PercentileSnapshot,
+    percentile_rank,
+    percentile_ranks,
+)
+
+
+def test_vectorized_ranks_match_scalar():
+    rng = np.random.default_rng(3)
+    rows = np.sort(rng.uniform(0, 20, (400, 4)), axis=1)
+    rows[::7, 1] = rows[::7, 0]  # flat segments
+    rows[::11] = rows[::11, ::-1]  # non-monotone baselines
+    values = rng.uniform(-2, 25, 400).tolist()
+    values[::13] = [None] * len(values[::13])
+    table = rows.copy()
+    table[::17] = np.nan
+    expected = [
+        (
+            None
+            if np.isnan(row).any()
+            else percentile_rank(value, PercentileSnapshot(*row.tolist(), asof=date.today()))
+        )
+        for value, row in zip(values, table)
+    ]
+    assert percentile_ranks(values, table) == expected
+    assert percentile_ranks(values[:20], table[:20]) == expected[:20]
+    assert percentile_ranks([], np.empty((0, 4))) == []
+
+
+@pytest.mark.asyncio
+async def test_service_refreshes_incrementally_by_asof(sqlite_sessions):
+    sessions = await sqlite_sessions(PercentileBaseline)
+    yesterday, today = date.today() - timedelta(days=1), date.today()
+    async with sessions() as session:
+        session.add_all(
+            [
+                PercentileBaseline(
+                    metric=metric, bucket_key=f"B{i}", p50=1, p75=2, p90=3, p95=4, asof=yesterday
+                )
+                for metric in ("spread_pct", "vo_vol")
+                for i in range(50)
+            ]
+        )
+        await session.commit()
+
+    service = BaselineService(session_factory=sessions)
+    metrics = ["spread_pct", "vo_vol", "iv_rank"]
+    ranks = await service.ranks(metrics, ["B1", "B2", "B1"], [2.5, 9, 1])
+    assert ranks == [0.825, 0.99, None] and service.rows_loaded == 100
+
+    async with sessions() as session:
+        await session.execute(
+            update(PercentileBaseline)
+            .where(PercentileBaseline.bucket_key == "B1")
+            .values(p50=10, p75=20, p90=30, p95=40, asof=today)
+        )
+        session.add(
+            PercentileBaseline(
+                metric="iv_rank", bucket_key="B1", p50=0, p75=1, p90=2, p95=3, asof=today
+            )
+        )
+        await session.commit()
+    await service.refresh()
+    assert service.rows_loaded == 100 + 101  # asof >= yesterday: still everything this time
+    await service.refresh()
+    assert service.rows_loaded == 201 + 3  # only today's rows from now on
+    ranks = await service.ranks(metrics, ["B1", "B2", "B1"], [2.5, 9, 1])
+    assert ranks == [0.5, 0.99, 0.75]
+    snapshot = await service.get_percentiles("iv_rank", "B1")
+    assert snapshot == PercentileSnapshot(p50=0, p75=1, p90=2, p95=3, asof=today)
+
+
+def test_unknown_baseline_builder_is_rejected():
+    assert Settings(BASELINE_BUILDER="postgres").baseline_builder == "postgres"
+    with pytest.raises(ValidationError):
+        Settings(BASELINE_BUILDER="postgress")
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+import websockets
+from httpx import AsyncClient
+
+from app.adapters.massive_ws import _normalize_event
+from app.sim.market import SyntheticMarket, synthetic_watchlist
+from app.sim.massive_sim import MassiveWSSimulator, SimConfig, create_rest_app
+
+
+def test_synthetic_watchlist_keeps_defaults_first():
+    symbols = synthetic_watchlist(500)
+    assert len(symbols) == len(set(symbols)) == 500
+    assert symbols[:2] == ["SPY", "AAPL"]
+    assert all(symbol.isalpha() for symbol in symbols)
+
+
+@pytest.mark.asyncio
+async def test_rest_endpoints_match_massive_shapes():
+    app = create_rest_app(SyntheticMarket(seed=1))
+    async with AsyncClient(app=app, base_url="http://sim") as client:
+        aggs = (await client.get("/v2/aggs/ticker/SPY/range/1/minute/2024-01-02/2024-01-03")).json()
+        chain = (await client.get("/v3/snapshot/options/SPY")).json()
+        snap = (await client.get("/v2/snapshot/locale/us/markets/stocks/tickers/SPY")).json()
+    bars = aggs["results"]
+    assert bars and all(bar["l"] <= min(bar["o"], bar["c"]) for bar in bars)
+    assert [bar["t"] for bar in bars] == sorted(bar["t"] for bar in bars)
+    contract = chain["results"][0]
+    assert contract["details"]["ticker"].startswith("O:SPY")
+    assert contract["last_quote"]["bid"] <= contract["last_quote"]["ask"]
+    assert snap["ticker"]["lastQuote"]["p"] < snap["ticker"]["lastQuote"]["P"]
+
+
+@pytest.mark.asyncio
+async def test_ws_handshake_and_quote_stream():
+    config = SimConfig(quote_rate=200.0, tick_seconds=0.01)
+    simulator = MassiveWSSimulator(SyntheticMarket(seed=2), config)
+    async with websockets.serve(simulator.handler, "127.0.0.1", 0) as server:
+        port = next(iter(server.sockets)).getsockname()[1]
+        async with websockets.connect(f"ws://127.0.0.1:{port}/options") as ws:
+            assert json.loads(await ws.recv())[0]["status"] == "connected"
+            await ws.send(json.dumps({"action": "auth", "params": "sim"}))
+            assert json.loads(await ws.recv())[0]["status"] == "auth_success"
+            await ws.send(json.dumps({"action": "subscribe", "params": "Q.O:SPY991231C00450000"}))
+            assert json.loads(await ws.recv())[0]["status"] == "success"
+            events = json.loads(await ws.recv())
+    normalized = _normalize_event(events[0])
+    assert normalized["kind"] == "opt_quote"
+    assert normalized["contract"] == "O:SPY991231C00450000"
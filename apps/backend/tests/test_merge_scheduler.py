@@ -0,0 +1,37 @@
+import pytest
+
+from app.services.merge_scheduler import MergeScheduler, coalesce_deltas
+
+
+def test_coalesce_deltas_merges_nested_sections():
+    merged = coalesce_deltas({}, {"marketMicro": {"microChop": 0.2, "divergenceZ": 0.1}})
+    merged = coalesce_deltas(
+        merged, {"marketMicro": {"microChop": 0.7}, "options": {"spread_pct": 4}}
+    )
+    assert merged["marketMicro"] == {"microChop": 0.7, "divergenceZ": 0.1}
+    assert merged["options"] == {"spread_pct": 4}
+
+
+@pytest.mark.asyncio
+async def test_scheduler_merges_once_per_symbol_per_tick():
+    flushed: list[tuple[str, dict]] = []
+
+    async def flush(symbol: str, deltas: dict) -> None:
+        flushed.append((symbol, deltas))
+
+    scheduler = MergeScheduler(flush, interval=0.0)
+    for idx in range(25):
+        scheduler.submit("SPY", {"marketMicro": {"minuteThrust": idx / 100}})
+    scheduler.submit("QQQ", {"options": {"spread_pct": 3.5}})
+    scheduler.submit("QQQ", {"options": {"flicker_per_sec": 1.1}})
+
+    assert await scheduler.flush_pending() == 2
+    assert await scheduler.flush_pending() == 0
+    by_symbol = dict(flushed)
+    assert by_symbol["SPY"]["marketMicro"]["minuteThrust"] == 0.24
+    assert by_symbol["QQQ"]["options"] == {"spread_pct": 3.5, "flicker_per_sec": 1.1}
+
+    stats = scheduler.stats()
+    assert stats["SPY"]["events_in"] == 25
+    assert stats["SPY"]["merges_out"] == 1
+    assert stats["QQQ"]["coalesce_ratio"] == 2.0
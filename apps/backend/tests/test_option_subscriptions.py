@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import pytest
+
+import app.services.rings as rings
+from app.services.hashring import HashRing
+from app.services.subscriptions import OptionSubscriptionManager, batch_params
+
+
+def _tile(symbol: str, primary: str | None, backups: list[str] | None = None):
+    return SimpleNamespace(
+        symbol=symbol, options={"contracts": {"primary": primary, "backups": backups or []}}
+    )
+
+
+def _drain(manager: OptionSubscriptionManager) -> list[tuple[str, str]]:
+    messages = []
+    while not manager.queue.empty():
+        messages.append(manager.queue.get_nowait())
+    return messages
+
+
+def test_batch_params_joins_and_chunks():
+    assert batch_params(["Q.B", "Q.A", "Q.C"], 2) == ["Q.A,Q.B", "Q.C"]
+
+
+@pytest.mark.asyncio
+async def test_diff_sends_batched_subscribe_and_unsubscribe():
+    manager = OptionSubscriptionManager(batch_size=10)
+    manager.observe("SPY", _tile("SPY", "O:SPY1", ["O:SPY2", "O:SPY3"]))
+    manager.observe("QQQ", _tile("QQQ", "O:QQQ1"))
+    await manager.sync()
+    assert _drain(manager) == [("subscribe", "Q.O:QQQ1,Q.O:SPY1,Q.O:SPY2,Q.O:SPY3")]
+
+    rings.push_opt_quote("O:SPY3", 1, {"nbbo": "stable"})
+    manager.observe("SPY", _tile("SPY", "O:SPY1", ["O:SPY4"]))
+    manager.observe("QQQ", None)
+    added, removed = await manager.sync()
+    assert added == {"O:SPY4"}
+    assert removed == {"O:SPY2", "O:SPY3", "O:QQQ1"}
+    assert _drain(manager) == [
+        ("unsubscribe", "Q.O:QQQ1,Q.O:SPY2,Q.O:SPY3"),
+        ("subscribe", "Q.O:SPY4"),
+    ]
+    assert rings.last_opt_quotes("O:SPY3") == []
+    assert manager.is_live("O:SPY4") and not manager.is_live("O:SPY2")
+    assert manager.symbols_for("O:SPY1") == {"SPY"}
+
+
+@pytest.mark.asyncio
+async def test_unchanged_contracts_do_not_resend():
+    manager = OptionSubscriptionManager()
+    manager.observe("SPY", _tile("SPY", "O:SPY1"))
+    await manager.sync()
+    _drain(manager)
+    manager.replace_all([_tile("SPY", "O:SPY1")])
+    await manager.sync()
+    assert _drain(manager) == []
+
+
+def test_hash_ring_moves_few_keys_when_growing():
+    keys = [f"O:SPY99123{idx:02d}C00450000" for idx in range(200)]
+    before = HashRing(range(3))
+    after = HashRing(range(4))
+    moved = [key for key in keys if before.node_for(key) != after.node_for(key)]
+    assert set(before.assign(keys)) == {0, 1, 2}
+    assert all(after.node_for(key) == 3 for key in moved)
+    assert len(moved) < len(keys) / 2
+
+
+@pytest.mark.asyncio
+async def test_sharded_manager_splits_contracts_across_shards():
+    manager = OptionSubscriptionManager(batch_size=100, shards=2)
+    contracts = [f"O:QQQ99123{idx:02d}C00400000" for idx in range(30)]
+    manager.observe("QQQ", _tile("QQQ", contracts[0], contracts[1:]))
+    await manager.sync()
+    assert manager.live(0) | manager.live(1) == set(contracts)
+    assert not manager.live(0) & manager.live(1)
+
+    dropped = contracts[-1]
+    shard = manager.shard_for(dropped)
+    for idx in range(2):
+        while not manager.queue_for(idx).empty():
+            manager.queue_for(idx).get_nowait()
+    manager.observe("QQQ", _tile("QQQ", contracts[0], contracts[1:-1]))
+    await manager.sync()
+    assert manager.queue_for(shard).get_nowait() == ("unsubscribe", f"Q.{dropped}")
+    assert manager.queue_for(0).empty() and manager.queue_for(1).empty()
+    assert sum(manager.stats()["shards"].values()) == len(contracts) - 1
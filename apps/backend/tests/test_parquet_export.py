@@ -0,0 +1,142 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.settings import settings
+from app.db.models import Candle, Levels, OptionSnapshot, Snapshot
+from app.main import app
+from app.services.parquet_export import export_range, iter_parquet_batches, load_parquet
+from app.workers.baselines import _snapshot_day_rows
+
+pa = pytest.importorskip("pyarrow")
+
+DAY = datetime(2026, 3, 2, 14, 30, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def sessions(sqlite_sessions, monkeypatch):
+    factory = await sqlite_sessions(Snapshot, Candle, OptionSnapshot, Levels)
+    async with factory() as session:
+        for day in range(2):
+            for ticker in ("SPY", "QQQ"):
+                session.add(
+                    Levels(day=(DAY + timedelta(days=day)).date(), ticker=ticker, prior_close=1.2)
+                )
+                for minute in range(30):
+                    ts = DAY + timedelta(days=day, minutes=minute)
+                    session.add(
+                        Candle(
+                            ticker=ticker,
+                            timeframe="1m",
+                            ts=ts,
+                            open=1.5,
+                            high=2,
+                            low=1,
+                            close=1.25,
+                            volume=100 + minute,
+                        )
+                    )
+                    session.add(
+                        OptionSnapshot(
+                            ticker=ticker,
+                            ts=ts,
+                            contract=f"O:{ticker}C",
+                            bid=1,
+                            ask=1.1,
+                            mid=1.05,
+                            iv=0.2,
+                        )
+                    )
+                    session.add(
+                        Snapshot(
+                            ts=ts,
+                            ticker=ticker,
+                            regime="Trend",
+                            score=55.5,
+                            prob={"probability": 0.55},
+                            bands={},
+                            breakdown={},
+                            options={"spread_pct": 0.3},
+                            orb={},
+                            patience={},
+                            penalties={},
+                            bonuses={},
+                            state="Watch",
+                            rationale={},
+                            bucket_key="SPX:CALL",
+                            spread_pct=0.3,
+                        )
+                    )
+        await session.commit()
+    monkeypatch.setattr("app.services.parquet_export.async_session", factory)
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_export_partitions_by_ticker_and_day(sessions, tmp_path):
+    root = tmp_path / "lake"
+    stats = await export_range(DAY, DAY + timedelta(days=2), root, session_factory=sessions)
+    assert stats["candles"] == {"files": 4, "rows": 120}
+    assert (root / "snapshots" / "ticker=SPY" / "day=2026-03-03" / "part-0.parquet").exists()
+    again = await export_range(
+        DAY,
+        DAY + timedelta(days=1),
+        root,
+        tables=["candles"],
+        tickers=["spy"],
+        session_factory=sessions,
+    )
+    assert again["candles"] == {"files": 1, "rows": 30}
+
+    candles = load_parquet(root, "candles", tickers=["SPY"])
+    assert candles.num_rows == 60 and set(candles.column("ticker").to_pylist()) == {"SPY"}
+    assert candles.column("close").to_pylist()[0] == 1.25
+    window = load_parquet(
+        root,
+        "snapshots",
+        start=DAY + timedelta(days=1, minutes=10),
+        end=DAY + timedelta(days=1, minutes=20),
+        columns=["ticker", "ts", "options"],
+    )
+    assert window.num_rows == 20 and window.column("options")[0].as_py() == '{"spread_pct": 0.3}'
+    batches = list(iter_parquet_batches(root, "option_snapshots", batch_size=16))
+    assert sum(batch.num_rows for batch in batches) == 120
+    assert max(batch.num_rows for batch in batches) <= 16
+    levels = load_parquet(root, "levels", tickers=["QQQ"], start=DAY + timedelta(days=1))
+    assert levels.to_pylist() == [
+        {
+            "premarket_high": None,
+            "premarket_low": None,
+            "prior_high": None,
+            "prior_low": None,
+            "prior_close": 1.2,
+            "open_print": None,
+            "ticker": "QQQ",
+            "day": (DAY + timedelta(days=1)).date(),
+        }
+    ]
+
+    rows = await _snapshot_day_rows(DAY.replace(hour=0, minute=0), str(root))
+    assert len(rows) == 60 and rows[0][:3] == ("QQQ", "SPX:CALL", 0.3)
+
+
+@pytest.mark.asyncio
+async def test_export_job_endpoint(sessions, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "export_root", str(tmp_path / "jobs"))
+    body = {"from": DAY.isoformat(), "to": (DAY + timedelta(days=1)).isoformat()}
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        bad = await client.post("/api/admin/export", json={**body, "tables": ["users"]})
+        assert bad.status_code == 400
+        resp = await client.post("/api/admin/export", json={**body, "tickers": ["QQQ"]})
+        assert resp.status_code == 202
+        job_id = resp.json()["id"]
+        for _ in range(100):
+            job = (await client.get(f"/api/admin/export/{job_id}")).json()
+            if job["status"] != "running":
+                break
+            await asyncio.sleep(0.02)
+        assert (await client.get("/api/admin/export/nope")).status_code == 404
+    assert job["status"] == "done"
+    assert job["tables"]["snapshots"] == {"files": 1, "rows": 30}
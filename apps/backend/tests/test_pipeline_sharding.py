@@ -0,0 +1,29 @@
+from app.sim.market import synthetic_watchlist
+from app.services.sharding import ShardMembership
+
+
+def _worker(worker_id: str, members: list[str]) -> ShardMembership:
+    membership = ShardMembership()
+    membership.worker_id = worker_id
+    membership._set_members(members)
+    return membership
+
+
+def test_unjoined_process_owns_everything():
+    assert ShardMembership().owned(["SPY", "QQQ"]) == ["SPY", "QQQ"]
+
+
+def test_workers_partition_watchlist_and_rebalance_minimally():
+    symbols = synthetic_watchlist(300)
+    members = ["w-0", "w-1", "w-2"]
+    workers = [_worker(worker_id, members) for worker_id in members]
+    owned = [set(worker.owned(symbols)) for worker in workers]
+    assert set().union(*owned) == set(symbols)
+    assert sum(len(part) for part in owned) == len(symbols)
+    assert all(owned)
+
+    # w-2 stops heartbeating: only its symbols move, and the survivors pick all of them up
+    survivors = [_worker(worker_id, members[:2]) for worker_id in members[:2]]
+    for before, after in zip(owned[:2], survivors):
+        assert before <= set(after.owned(symbols))
+    assert set().union(*(set(w.owned(symbols)) for w in survivors)) == set(symbols)
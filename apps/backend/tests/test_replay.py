@@ -0,0 +1,62 @@
+import json
+import time
+
+import pytest
+
+from app.services.recorder import EventRecorder, read_recording
+from app.services.replay import replay
+
+
+def test_recorder_round_trip(tmp_path):
+    path = tmp_path / "session.ndjson.gz"
+    recorder = EventRecorder(path)
+    recorder.record_event({"kind": "index_value", "symbol": "SPX", "c": 5000.0, "t": 1})
+    recorder.record_raw('[{"ev":"V","T":"I:SPX","val":5001.0,"t":2}]')
+    recorder.close()
+    records = list(read_recording(path))
+    assert [kind for _, kind, _ in records] == ["e", "r"]
+    assert records[0][2]["symbol"] == "SPX"
+
+
+def _write_session(path, contract, base_ms):
+    with open(path, "w") as fh:
+        for idx in range(40):
+            quote = {
+                "kind": "opt_quote",
+                "contract": contract,
+                "t": base_ms + idx * 10,
+                "bp": 1.0,
+                "ap": 1.1 + (idx % 3) * 0.01,
+                "mid": 1.05,
+                "spread_pct": 9.5,
+                "nbbo": "stable",
+            }
+            fh.write(json.dumps([idx * 10, "e", quote]) + "\n")
+        frame = json.dumps([{"ev": "V", "T": "I:SPX", "val": 5000.5, "t": base_ms}])
+        fh.write(json.dumps([400, "r", frame]) + "\n")
+
+
+@pytest.mark.asyncio
+async def test_replay_reports_merges_and_broadcasts(tmp_path):
+    path = tmp_path / "session.ndjson"
+    _write_session(path, "O:SPY991231C00450000", int(time.time() * 1000))
+
+    report = await replay(path, speed=0, interval=0.1)
+    assert report.frames == 41
+    assert report.events == 41
+    assert report.per_symbol["SPY"]["events_in"] == 41
+    assert 1 <= report.merges <= 5
+    assert report.merge_latency_ms["p50"] is not None
+    assert report.broadcasts.get("tile", 0) >= 1
+
+
+@pytest.mark.asyncio
+async def test_replay_of_an_old_recording_matches_a_fresh_one(tmp_path):
+    path = tmp_path / "old.ndjson"
+    # 2026-03-02 14:30 UTC, long past by the time this runs
+    _write_session(path, "O:QQQ991231C00400000", 1_772_461_800_000)
+
+    report = await replay(path, speed=0, interval=0.1)
+    assert report.per_symbol["QQQ"]["events_in"] == 40
+    assert 1 <= report.merges <= 5
+    assert report.broadcasts.get("tile", 0) >= 1
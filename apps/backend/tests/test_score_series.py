@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from app.db.models import ScoreRollup
+from app.main import app
+from app.services.score_series import INTERVALS, ScoreSeries, ScoreSeriesStore
+
+START = datetime(2026, 3, 2, 14, 30, tzinfo=timezone.utc)
+
+
+def test_ring_keeps_the_newest_points_in_order():
+    series = ScoreSeries(capacity=5)
+    for i in range(8):
+        series.append(1000.0 + i, 50 + i, i % 3)
+    series.append(1007.5, 42, 0)  # under a second after the last point: replaces it
+    ts, score, band = series.arrays()
+    assert len(series) == 5
+    assert ts.tolist() == [1003.0, 1004.0, 1005.0, 1006.0, 1007.5]
+    assert score.tolist() == [53, 54, 55, 56, 42] and band.tolist() == [0, 1, 2, 0, 0]
+    assert series.arrays(2)[0].tolist() == [1006.0, 1007.5]
+
+
+@pytest.fixture
+async def store(sqlite_sessions, monkeypatch):
+    store = ScoreSeriesStore(session_factory=await sqlite_sessions(ScoreRollup))
+    monkeypatch.setattr("app.api.snapshots.score_series", store)
+    return store
+
+
+@pytest.mark.asyncio
+async def test_rollups_match_the_raw_series(store):
+    rng = np.random.default_rng(3)
+    offsets = np.sort(rng.choice(7 * 60, size=200, replace=False))
+    probabilities = np.round(rng.uniform(0.4, 0.95, size=200), 2)
+    scores = np.round(probabilities * 100, 2)
+    for offset, probability in zip(offsets, probabilities):
+        band = "EntryReady" if probability >= 0.8 else "Armed" if probability >= 0.7 else "Loading"
+        store.record("SPY", float(probability), band, at=START + timedelta(seconds=int(offset)))
+    store.record("QQQ", 0.5, "Loading", at=START)
+    assert await store.flush() == 7 + 2 + 1 + 1
+
+    rollups = await store.rollups(["SPY", "QQQ"], "1m", START, START + timedelta(hours=1))
+    assert [row["ts"] for row in rollups["SPY"]] == [
+        (START + timedelta(minutes=m)).isoformat() for m in range(7)
+    ]
+    for minute, row in enumerate(rollups["SPY"]):
+        inside = scores[offsets // 60 == minute]
+        assert (row["min"], row["max"], row["n"]) == (inside.min(), inside.max(), len(inside))
+        assert row["last"] == inside[-1]
+    five = (await store.rollups(["SPY"], "5m", START, START + timedelta(hours=1)))["SPY"]
+    assert [row["n"] for row in five] == [int((offsets < 300).sum()), int((offsets >= 300).sum())]
+    assert five[1]["last"] == scores[-1]
+
+    history = store.history("SPY", points=3)
+    assert [point["score"] for point in history] == [row["last"] for row in rollups["SPY"][-3:]]
+    assert len(store.series("SPY")) == 200
+    store.record("SPY", 0.6, "Loading", at=START + timedelta(days=1))
+    assert store.series("SPY") == [
+        {"ts": (START + timedelta(days=1)).isoformat(), "score": 60.0, "band": "Loading"}
+    ]
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.get(
+            "/api/snapshots/rollups",
+            params={"symbols": "spy,aapl", "from": START.isoformat(), "interval": "5m"},
+        )
+        bad = await client.get(
+            "/api/snapshots/rollups",
+            params={"symbols": "spy", "from": START.isoformat(), "interval": "2m"},
+        )
+    assert resp.status_code == 200 and bad.status_code == 422
+    assert resp.json()["series"] == {"SPY": five, "AAPL": []}
+
+
+@pytest.mark.asyncio
+async def test_flushes_fold_into_rows_from_earlier_owners(sqlite_sessions):
+    sessions = await sqlite_sessions(ScoreRollup)
+    old, new = ScoreSeriesStore(session_factory=sessions), ScoreSeriesStore(
+        session_factory=sessions
+    )
+    old.record("SPY", 0.9, "EntryReady", at=START + timedelta(seconds=5))
+    old.record("SPY", 0.5, "Loading", at=START + timedelta(seconds=10))
+    assert await old.flush() == 2
+    old.record("SPY", 0.6, "Loading", at=START + timedelta(seconds=20))
+    assert await old.flush() == 2 and await old.flush() == 0
+    # a restarted or handed-off owner picks the symbol up mid-bucket
+    new.record("SPY", 0.7, "Armed", at=START + timedelta(seconds=40))
+    assert await new.flush() == 2
+
+    for interval in INTERVALS:
+        rows = (await new.rollups(["SPY"], interval, START, START + timedelta(hours=1)))["SPY"]
+        assert rows == [
+            {
+                "ts": START.isoformat(),
+                "min": 50.0,
+                "max": 90.0,
+                "last": 70.0,
+                "band": "Armed",
+                "n": 4,
+            }
+        ]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_only_todays_buckets(sqlite_sessions):
+    def unavailable():
+        raise OSError("database unavailable")
+
+    store = ScoreSeriesStore(session_factory=unavailable)
+    now = datetime.now(timezone.utc).replace(second=30, microsecond=0)
+    store.record("SPY", 0.5, "Loading", at=now - timedelta(days=1))
+    store.record("SPY", 0.6, "Loading", at=now)
+    assert await store.flush() == 0
+    store.record("SPY", 0.7, "Armed", at=now)
+
+    store._session = await sqlite_sessions(ScoreRollup)
+    assert await store.flush() == 2
+    rows = await store.rollups(["SPY"], "1m", now - timedelta(days=2), now + timedelta(days=1))
+    assert [(row["min"], row["max"], row["n"]) for row in rows["SPY"]] == [(60.0, 70.0, 2)]
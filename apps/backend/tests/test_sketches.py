@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import func, select
+
+from app.db.models import PercentileSketch
+from app.domain.quantiles import KLLSketch
+from app.services import sketches
+from app.services.sketches import SketchStore, snapshot_columns
+
+
+def _rank_error(sketch: KLLSketch, values: np.ndarray, qs) -> float:
+    ordered = np.sort(values)
+    estimates = sketch.quantiles(qs)
+    ranks = np.searchsorted(ordered, estimates, side="right") / len(ordered)
+    return float(np.max(np.abs(ranks - np.asarray(qs))))
+
+
+def test_kll_quantiles_merge_and_round_trip():
+    rng = np.random.default_rng(7)
+    qs = (0.5, 0.75, 0.9, 0.95)
+    days = [rng.lognormal(0, 1, 20_000) for _ in range(5)]
+    merged = KLLSketch(seed=1)
+    for values in days:
+        day = KLLSketch(seed=2)
+        day.extend(values.tolist())
+        merged.merge(KLLSketch.from_bytes(day.to_bytes()))
+    everything = np.concatenate(days)
+    assert merged.n == len(everything)
+    assert _rank_error(merged, everything, qs) < 0.02
+    assert len(merged.to_bytes()) < 16_000
+    restored = KLLSketch.from_bytes(merged.to_bytes())
+    assert restored.quantiles(qs) == merged.quantiles(qs)
+    assert np.isnan(KLLSketch().quantile(0.5))
+
+
+def test_snapshot_columns_type_the_baseline_inputs():
+    expiry = (sketches._today() + timedelta(days=5)).strftime("%y%m%d")
+    options = {
+        "delta_target": 0.3,
+        "contracts": {"primary": f"O:SPY{expiry}C00450000"},
+        "spread_pct": "0.4",
+        "ivr": 55,
+    }
+    columns = snapshot_columns("SPY", options, {"microChop": 0.2, "secVariance": None})
+    assert columns == {
+        "bucket_key": "SPX:CALL:Delta[0.25-0.35]:DTE[3-7]",
+        "spread_pct": 0.4,
+        "flicker_per_sec": None,
+        "ivr": 55.0,
+        "vo_vol": None,
+        "minute_thrust": None,
+        "micro_chop": 0.2,
+        "divergence_z": None,
+        "sec_variance": None,
+    }
+    assert snapshot_columns("SPY", {}, None)["bucket_key"] is None
+    observed = list(sketches.snapshot_observations("SPY", columns))
+    assert observed == [
+        ("spread_pct", "SPX:CALL:Delta[0.25-0.35]:DTE[3-7]", 0.4),
+        ("iv_rank", "SPX:CALL:Delta[0.25-0.35]:DTE[3-7]", 55.0),
+        ("micro_chop", "IDX:SPX", 0.2),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_store_flushes_daily_rows_and_merges_the_window(sqlite_sessions):
+    sessions = await sqlite_sessions(PercentileSketch)
+    today = sketches._today()
+    workers = [SketchStore(session_factory=sessions, source=f"w{i}") for i in range(2)]
+    for i in range(1000):
+        columns = snapshot_columns("SPY", {"spread_pct": i, "ivr": None}, {"minuteThrust": 1})
+        workers[i % 2].observe("SPY", columns)
+    old = snapshot_columns("SPY", {"spread_pct": 5000.0}, None)
+    workers[0].observe("SPY", old, day=today - timedelta(days=120))
+    assert await workers[0].flush() == 3 and await workers[0].flush() == 0
+    assert await workers[1].flush() == 2
+
+    async with sessions() as session:
+        assert await session.scalar(select(func.count()).select_from(PercentileSketch)) == 5
+    window = await workers[0].window(["spread_pct", "minute_thrust"])
+    spread = window[("spread_pct", "SPX:UNKNOWN:Delta[unknown]:DTE[unknown]")]
+    assert spread.n == 1000
+    assert abs(spread.quantile(0.5) - 500) < 20
+    assert window[("minute_thrust", "IDX:SPX")].quantile(0.95) == 1.0
+
+    workers[1].observe("SPY", snapshot_columns("SPY", {"spread_pct": 1.0}, None))
+    await workers[1].flush()
+    window = await workers[1].window(["spread_pct"])
+    assert window[("spread_pct", "SPX:UNKNOWN:Delta[unknown]:DTE[unknown]")].n == 1001
+
+    await workers[0].prune()
+    async with sessions() as session:
+        assert await session.scalar(select(func.count()).select_from(PercentileSketch)) == 4
@@ -0,0 +1,113 @@
+import csv
+import json
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from app.db.models import Snapshot
+from app.domain.downsample import lttb
+from app.main import app
+
+START = datetime(2026, 3, 2, 14, 30, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def history_db(sqlite_sessions, monkeypatch):
+    sessions = await sqlite_sessions(Snapshot)
+    async with sessions() as session:
+        for ticker in ("SPY", "QQQ", "AAPL"):
+            for i in range(300):
+                session.add(
+                    Snapshot(
+                        ts=START + timedelta(seconds=15 * i),
+                        ticker=ticker,
+                        regime="Trend",
+                        score=50 + 40 * np.sin(i / 20),
+                        prob={"probability": 0.5},
+                        bands={},
+                        breakdown={},
+                        options={},
+                        orb={},
+                        patience={},
+                        penalties={},
+                        bonuses={},
+                        state="Watch",
+                        rationale={},
+                        spread_pct=0.1 * i,
+                    )
+                )
+        await session.commit()
+    monkeypatch.setattr("app.api.snapshots.async_session", sessions)
+
+
+def _utc(ts: str) -> datetime:
+    return datetime.fromisoformat(ts).replace(tzinfo=timezone.utc)
+
+
+def _params(**extra):
+    end = START + timedelta(hours=2)
+    return {"symbols": "spy,qqq", "from": START.isoformat(), "to": end.isoformat(), **extra}
+
+
+@pytest.mark.asyncio
+async def test_history_pages_with_keyset_cursor(history_db):
+    seen, cursor = [], None
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        while True:
+            extra = {"limit": 250} | ({"cursor": cursor} if cursor else {})
+            resp = await client.get("/api/snapshots/history", params=_params(**extra))
+            assert resp.status_code == 200
+            body = resp.json()
+            seen.extend(body["snapshots"])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        bad = await client.get("/api/snapshots/history", params=_params(cursor="nope"))
+    assert bad.status_code == 400
+    assert len(seen) == 600 and len({row["id"] for row in seen}) == 600
+    assert {row["ticker"] for row in seen} == {"SPY", "QQQ"}
+    assert [row["ts"] for row in seen] == sorted(row["ts"] for row in seen)
+    assert "options" not in seen[0] and seen[-1]["spread_pct"] == pytest.approx(29.9)
+
+
+@pytest.mark.asyncio
+async def test_history_streams_ndjson_and_csv(history_db):
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        ndjson = await client.get(
+            "/api/snapshots/history", params=_params(format="ndjson", limit=100, fields="full")
+        )
+        lines = [json.loads(line) for line in ndjson.text.splitlines()]
+        assert len(lines) == 101 and "options" in lines[0]
+        last = lines[99]
+        assert lines[-1] == {"next_cursor": f"{last['ts']},{last['id']}"}
+
+        resp = await client.get("/api/snapshots/history", params=_params(format="csv"))
+    assert resp.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(StringIO(resp.text)))
+    assert len(rows) == 600 and rows[0]["ticker"] in {"SPY", "QQQ"}
+
+
+@pytest.mark.asyncio
+async def test_history_downsamples_score_per_symbol(history_db):
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.get("/api/snapshots/history", params=_params(points=40))
+    rows = resp.json()["snapshots"]
+    assert [row["ts"] for row in rows] == sorted(row["ts"] for row in rows)
+    for ticker in ("SPY", "QQQ"):
+        stamps = [_utc(row["ts"]) for row in rows if row["ticker"] == ticker]
+        assert len(stamps) == 40
+        assert stamps[0] == START and stamps[-1] == START + timedelta(seconds=15 * 299)
+
+
+def test_lttb_keeps_ends_and_extremes():
+    x = np.arange(500.0)
+    y = np.zeros(500)
+    y[123], y[377] = 10, -10
+    picked = lttb(x, y, 20)
+    assert len(picked) == 20 and picked[0] == 0 and picked[-1] == 499
+    assert {123, 377} <= set(picked.tolist())
+    assert (np.diff(picked) > 0).all()
+    assert lttb(x[:10], y[:10], 50).tolist() == list(range(10))
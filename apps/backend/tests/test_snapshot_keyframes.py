@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+
+from app.db.models import Snapshot
+from app.main import app
+from app.services.snapshot_keyframes import SnapshotGate, forward_fill
+
+START = datetime(2026, 3, 2, 14, 30, tzinfo=timezone.utc)
+
+
+def _tile(probability=0.5, band="Watch", penalties=None, primary="O:SPY260302C00450000"):
+    return SimpleNamespace(
+        probability_to_action=probability,
+        band=SimpleNamespace(label=band),
+        penalties=penalties or {},
+        options={"contracts": {"primary": primary, "backups": []}},
+    )
+
+
+def test_gate_writes_material_changes_and_keyframes():
+    gate = SnapshotGate(keyframe_seconds=300, probability_step=0.02)
+    cycles = [
+        (_tile(), "first"),
+        (_tile(0.51), None),
+        (_tile(0.515), None),
+        (_tile(0.52), "probability"),  # drift is measured from the last row written
+        (_tile(0.52, band="Armed"), "band"),
+        (_tile(0.52, band="Armed", penalties={"wide_spread": 0.1}), "penalties"),
+        (_tile(0.52, band="Armed", penalties={"wide_spread": 0.2}), None),
+        (_tile(0.52, band="Armed", penalties={"wide_spread": 0.2}, primary="O:X"), "contract"),
+    ]
+    for i, (tile, expected) in enumerate(cycles):
+        now = START + timedelta(seconds=30 * i)
+        reason = gate.reason("SPY", tile, now)
+        assert reason == expected, i
+        if reason:
+            gate.mark("SPY", tile, now)
+    quiet = cycles[-1][0]
+    last = START + timedelta(seconds=30 * (len(cycles) - 1))
+    assert gate.reason("SPY", quiet, last + timedelta(seconds=270)) is None
+    assert gate.reason("SPY", quiet, last + timedelta(seconds=300)) == "keyframe"
+    assert gate.reason("QQQ", quiet, last) == "first"
+
+
+def test_forward_fill_repeats_rows_and_skips_outages():
+    times = [
+        START - timedelta(seconds=10),
+        START + timedelta(seconds=65),
+        START + timedelta(minutes=20),
+    ]
+    step, gap = timedelta(seconds=30), timedelta(minutes=5)
+    filled = list(
+        forward_fill(["a", "b", "c"], times, START, START + timedelta(minutes=21), step, gap)
+    )
+    by_ts = dict(filled)
+    assert [by_ts[START + timedelta(seconds=s)] for s in (0, 30, 60, 90)] == ["a", "a", "a", "b"]
+    # "b" covers five minutes, then nothing until "c"
+    assert by_ts[START + timedelta(seconds=360)] == "b"
+    assert START + timedelta(seconds=390) not in by_ts
+    assert by_ts[START + timedelta(minutes=20, seconds=30)] == "c"
+    assert [ts for ts, _ in filled] == sorted(by_ts)
+    assert not list(forward_fill([], [], START, START + timedelta(minutes=1), step, gap))
+
+
+@pytest.fixture
+async def keyframe_db(sqlite_sessions, monkeypatch):
+    sessions = await sqlite_sessions(Snapshot)
+    async with sessions() as session:
+        for seconds, score, state in (
+            (-60, 55, "Watch"),
+            (90, 72, "Armed"),
+            (300, 81, "EntryReady"),
+        ):
+            session.add(
+                Snapshot(
+                    ts=START + timedelta(seconds=seconds),
+                    ticker="SPY",
+                    regime="Trend",
+                    score=score,
+                    prob={"probability": score / 100},
+                    bands={},
+                    breakdown={},
+                    options={},
+                    orb={},
+                    patience={},
+                    penalties={},
+                    bonuses={},
+                    state=state,
+                    rationale={},
+                )
+            )
+        await session.commit()
+    monkeypatch.setattr("app.api.snapshots.async_session", sessions)
+
+
+@pytest.mark.asyncio
+async def test_series_endpoint_rebuilds_the_cycle_grid(keyframe_db):
+    params = {
+        "symbol": "spy",
+        "from": START.isoformat(),
+        "to": (START + timedelta(minutes=6)).isoformat(),
+    }
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.get("/api/snapshots/series", params=params)
+        too_many = await client.get("/api/snapshots/series", params={**params, "step": 0.01})
+        too_dense = await client.get(
+            "/api/snapshots/series",
+            params={**params, "to": (START + timedelta(days=1)).isoformat(), "step": 1},
+        )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["symbol"] == "SPY" and body["step"] == 30
+    points = body["points"]
+    assert len(points) == 12
+    assert [p["state"] for p in points[:3]] == ["Watch", "Watch", "Watch"]
+    assert points[3]["state"] == "Armed" and points[3]["score"] == 72
+    assert points[-2]["state"] == "EntryReady"
+    assert datetime.fromisoformat(points[1]["ts"]) == START + timedelta(seconds=30)
+    assert too_many.status_code == 422
+    assert too_dense.status_code == 400
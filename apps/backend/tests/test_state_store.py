@@ -0,0 +1,125 @@
+import asyncio
+import uuid
+
+import pytest
+from pydantic import ValidationError
+from redis.asyncio import Redis
+
+from app.core.settings import Settings, settings
+from app.domain.types import ProbabilityBand, TileState
+from app.services.locks import KeyedLocks
+from app.services.state_store import RedisStateStore, StateStore, state_store
+import app.services.tile_engine as tile_engine
+from app.services.tile_engine import merge_realtime_into_tile, refresh_symbol
+
+
+def _tile(symbol: str, probability: float = 0.6) -> TileState:
+    return TileState(
+        symbol=symbol,
+        regime="Normal",
+        probability_to_action=probability,
+        band=ProbabilityBand.from_score(int(probability * 100)),
+        confidence={"p50": 0.5},
+        breakdown=[],
+        options={},
+        rationale={"positives": [], "risks": []},
+        admin={"marketMicro": {}},
+        timestamps={"updated": "then"},
+        penalties={},
+        bonuses={},
+        history=[],
+    )
+
+
+@pytest.mark.asyncio
+async def test_memory_store_versions_and_listeners():
+    store = StateStore()
+    seen = []
+    store.add_listener(lambda symbol, state: seen.append((symbol, state is not None)))
+    await store.set_state("SPY", _tile("SPY"))
+    await store.set_state("SPY", _tile("SPY", 0.7))
+    assert await store.version("SPY") == 2
+    await store.remove_state("SPY")
+    assert await store.version("SPY") == 3
+    assert await store.get_state("SPY") is None
+    assert seen == [("SPY", True), ("SPY", True), ("SPY", False)]
+
+
+@pytest.mark.asyncio
+async def test_merge_is_copy_on_write_and_locks_per_symbol():
+    original = _tile("IWM")
+    await state_store.set_state("IWM", original)
+    await state_store.set_state("DIA", _tile("DIA"))
+    async with state_store.lock("DIA"):
+        merged = await asyncio.wait_for(
+            merge_realtime_into_tile("IWM", {"marketMicro": {"microChop": 0.9}}), timeout=2
+        )
+    assert merged is not original
+    assert original.timestamps == {"updated": "then"} and original.penalties == {}
+    assert merged.penalties["chop"] == -8
+    assert await state_store.get_state("IWM") is merged
+
+
+@pytest.mark.asyncio
+async def test_refresh_keeps_micro_merged_while_building(monkeypatch):
+    await state_store.set_state("XLF", _tile("XLF"))
+    build_tile = tile_engine.build_tile
+
+    async def racing_build(symbol):
+        built = await build_tile(symbol)
+        await merge_realtime_into_tile(symbol, {"marketMicro": {"microChop": 0.9}})
+        return built
+
+    async def no_persist(*args):
+        return None
+
+    monkeypatch.setattr(tile_engine, "build_tile", racing_build)
+    monkeypatch.setattr(tile_engine, "_persist_snapshot", no_persist)
+    refreshed = await refresh_symbol("XLF")
+    assert refreshed.admin["marketMicro"]["microChop"] == 0.9
+    assert await state_store.get_state("XLF") is refreshed
+
+
+@pytest.mark.asyncio
+async def test_redis_store_round_trip():
+    redis = Redis.from_url(settings.redis_url)
+    try:
+        await redis.ping()
+    except Exception:
+        await redis.aclose()
+        pytest.skip("redis not reachable")
+    prefix = f"test:{uuid.uuid4().hex}"
+    store = RedisStateStore(redis, f"{prefix}:tiles", f"{prefix}:version")
+    try:
+        await store.set_state("QQQ", _tile("QQQ", 0.8))
+        other = RedisStateStore(redis, f"{prefix}:tiles", f"{prefix}:version")
+        fetched = await other.get_state("QQQ")
+        assert fetched is not None and fetched.probability_to_action == 0.8
+        assert await other.version("QQQ") == 1
+        await store.remove_state("QQQ")
+        assert await other.all_states() == []
+    finally:
+        await redis.delete(f"{prefix}:tiles", f"{prefix}:version")
+        await redis.aclose()
+
+
+def test_unknown_state_backend_is_rejected():
+    assert Settings(STATE_BACKEND="redis").state_backend == "redis"
+    with pytest.raises(ValidationError):
+        Settings(STATE_BACKEND="reddis")
+
+
+@pytest.mark.asyncio
+async def test_discard_keeps_a_lock_a_woken_waiter_is_about_to_take():
+    locks = KeyedLocks()
+    lock = locks("SPY")
+    await lock.acquire()
+    waiter = asyncio.create_task(lock.acquire())
+    await asyncio.sleep(0)
+    lock.release()  # wakes the waiter, which has not run yet
+    locks.discard("SPY")
+    assert locks("SPY") is lock
+    await waiter
+    lock.release()
+    locks.discard("SPY")
+    assert len(locks) == 0
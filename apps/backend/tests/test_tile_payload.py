@@ -1,9 +1,14 @@
+import json
+
 import pytest
 from httpx import AsyncClient
 
 from app.core.settings import settings
+from app.domain.tile import Tile
+from app.domain.types import TileState
 from app.main import app
 from app.services.state_store import state_store
+from app.services.tile_engine import _decorate_tile_state, _synthetic_tile
 
 
 @pytest.mark.asyncio
@@ -34,3 +39,20 @@ async def test_options_flag_controls_top3() -> None:
         assert payload["options_top3"] == []
     finally:
         settings.options_data_enabled = original
+
+
+def test_internal_tile_serializes_like_public_schema() -> None:
+    tile, meta = _synthetic_tile("SPY")
+    candles = [
+        {"o": 10.0 + idx, "h": 11.0 + idx, "l": None, "c": 10.5 + idx, "v": 0, "t": f"T{idx}"}
+        for idx in range(5)
+    ]
+    chain = [{"contract": "O:SPY240119C00012000", "bid": 1, "ask": 1.2, "delta": 0.4, "oi": 500}]
+    meta = {**meta, "last_price": 11.0, "levels": [{"label": "PMH", "price": 12}]}
+    payload = {"candles": candles, "options_chain": chain}
+    tile = _decorate_tile_state(tile, {"Patience": 0.7}, meta, payload)
+    public = tile.to_public()
+    assert json.dumps(public) == json.dumps(TileState.model_validate(public).model_dump())
+    assert public["bars"][0]["l"] is None
+    restored = Tile.from_public(json.loads(json.dumps(public)))
+    assert json.dumps(restored.to_public()) == json.dumps(public)
@@ -1,7 +1,11 @@
+import math
 from datetime import datetime, timezone
 
+import numpy as np
 import pytest
 
+import app.services.tp_manager as tp_module
+from app.domain.target_hits import RANGE_TO_SIGMA, simulate_target_hits
 from app.services.tp_manager import tp_manager
 from app.services.timing import get_timing_context
 
@@ -43,3 +47,100 @@ async def test_tp_manager_snaps_levels_and_updates_hits():
     )
     assert updated["tp1"]["hit"], "TP1 should be marked hit once price moves through"
     await tp_manager.stop("SPY")
+
+
+@pytest.mark.asyncio
+async def test_tp_plan_carries_simulated_hit_odds():
+    await tp_manager.reset()
+    closes = [447 + 0.3 * math.sin(minute / 3) + 0.01 * minute for minute in range(120)]
+    await tp_manager.update_context(
+        "QQQ", {"levels": [], "atr": 0.6, "ema": 447.5, "last_price": 448.0, "closes": closes}
+    )
+    timing = {**get_timing_context(datetime.now(timezone.utc)), "minutes_left": 90}
+    plan = await tp_manager.start(
+        "QQQ",
+        entry=448.0,
+        direction="long",
+        regime="Normal",
+        liquidity_risk=40,
+        minute_thrust=0.8,
+        divergence=0.2,
+        timing=timing,
+    )
+    odds = [
+        plan["tp1"]["hit_probability"],
+        plan["tp2"]["hit_probability"],
+        plan["runner"]["extension_probability"],
+    ]
+    assert 1 > odds[0] > odds[1] > odds[2] > 0
+    assert 0 < plan["tp1"]["expected_minutes"] < plan["tp2"]["expected_minutes"] <= 90
+    updated = await tp_manager.on_tick(
+        "QQQ",
+        price=plan["tp1"]["price"] + 0.01,
+        probability=0.6,
+        liquidity_risk=40,
+        market_micro={},
+        timing={**timing, "minutes_left": 0},
+    )
+    assert updated["tp1"]["hit_probability"] == 1.0
+    assert updated["tp2"]["hit_probability"] is None
+    await tp_manager.stop("QQQ")
+
+
+def test_simulated_hits_match_the_reflection_principle():
+    sigma, minutes = 0.001, 60
+    targets = [100 * math.exp(k * sigma * math.sqrt(minutes)) for k in (0.5, 1, 2)]
+    odds = simulate_target_hits(
+        [],
+        100,
+        targets,
+        "long",
+        minutes,
+        atr=100 * sigma * RANGE_TO_SIGMA,
+        rng=np.random.default_rng(7),
+    )
+    # P(max of Brownian motion over T >= a * sigma * sqrt(T)) = 2 * (1 - Phi(a))
+    for result, k in zip(odds, (0.5, 1, 2)):
+        expected = 1 - math.erf(k / math.sqrt(2))
+        assert abs(result["probability"] - expected) < 0.02
+    assert simulate_target_hits([], 100, [99], "short", minutes, atr=0.1)[0]["expected_minutes"]
+    for price in (0, -5):
+        assert simulate_target_hits([], price, [1], "long", minutes, atr=0.1) == [
+            {"probability": None, "expected_minutes": None}
+        ]
+
+
+@pytest.mark.asyncio
+async def test_ticks_reuse_recent_odds_until_a_target_is_hit(monkeypatch):
+    runs = []
+
+    def counting(*args, **kwargs):
+        runs.append(args[1])
+        return simulate_target_hits(*args, **kwargs)
+
+    monkeypatch.setattr(tp_module, "simulate_target_hits", counting)
+    await tp_manager.reset()
+    await tp_manager.update_context(
+        "DIA", {"levels": [], "atr": 0.5, "ema": 400.0, "last_price": 400.0}
+    )
+    timing = {**get_timing_context(datetime.now(timezone.utc)), "minutes_left": 60}
+    plan = await tp_manager.start(
+        "DIA",
+        entry=400.0,
+        direction="long",
+        regime="Normal",
+        liquidity_risk=40,
+        minute_thrust=0.0,
+        divergence=0.0,
+        timing=timing,
+    )
+    tick = {"probability": 0.5, "liquidity_risk": 40, "market_micro": {}, "timing": timing}
+    for _ in range(20):
+        await tp_manager.on_tick("DIA", price=400.05, **tick)
+    assert runs == [400.0]
+    updated = await tp_manager.on_tick("DIA", price=plan["tp1"]["price"], **tick)
+    assert runs == [400.0, plan["tp1"]["price"]] and updated["tp1"]["hit_probability"] == 1.0
+    monkeypatch.setattr(tp_module, "SIMULATION_SECONDS", 0.0)
+    await tp_manager.on_tick("DIA", price=400.1, **tick)
+    assert len(runs) == 3
+    await tp_manager.stop("DIA")
@@ -0,0 +1,63 @@
+import asyncio
+import uuid
+
+import pytest
+from redis.asyncio import Redis
+
+from app.core.settings import settings
+from app.db.models_watchlist import WatchlistItem
+from app.services import watchlist
+from app.services.watchlist import WatchlistService
+
+
+@pytest.fixture
+async def sessions(sqlite_sessions):
+    return await sqlite_sessions(WatchlistItem)
+
+
+def _service(sessions) -> WatchlistService:
+    return WatchlistService(session_factory=sessions, db_engine=sessions.kw["bind"])
+
+
+@pytest.mark.asyncio
+async def test_reads_come_from_memory_until_a_write(sessions):
+    service = _service(sessions)
+    await service.seed_if_empty()
+    first = await service.list()
+    for _ in range(20):
+        assert await service.list() == first
+        assert await service.contains(first[0].lower())
+    assert service.loads == 1
+
+    assert "AMD" in await service.add("amd")
+    assert await service.contains("AMD") and service.loads == 2
+    assert "AMD" not in await service.remove("AMD")
+    assert not await service.contains("AMD") and service.loads == 3
+
+
+@pytest.mark.asyncio
+async def test_other_processes_invalidate_through_redis(sessions):
+    redis = Redis.from_url(settings.redis_url)
+    try:
+        await redis.ping()
+    except Exception:
+        await redis.aclose()
+        pytest.skip("redis not reachable")
+    channel = watchlist.WATCHLIST_CHANNEL
+    watchlist.WATCHLIST_CHANNEL = f"test:{uuid.uuid4().hex}"
+    api, pipeline = _service(sessions), _service(sessions)
+    tasks = [asyncio.create_task(service.listen(redis)) for service in (api, pipeline)]
+    try:
+        await asyncio.sleep(0.1)
+        await api.seed_if_empty()
+        await asyncio.sleep(0.1)
+        baseline = await pipeline.list()
+        pipeline.event().clear()
+        await api.add("NVDA")
+        await asyncio.wait_for(pipeline.event().wait(), timeout=2)
+        assert await pipeline.list() == baseline + ["NVDA"]
+    finally:
+        watchlist.WATCHLIST_CHANNEL = channel
+        for task in tasks:
+            task.cancel()
+        await redis.aclose()
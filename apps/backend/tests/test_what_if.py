@@ -1,7 +1,83 @@
-from app.domain.what_if import evaluate_what_if
+import itertools
+
+import pytest
+from httpx import AsyncClient
+
+from app.domain.what_if import WhatIfBase, evaluate_what_if, sweep_what_if
+from app.main import app
+from app.services.state_store import state_store
+from app.services.tile_engine import _synthetic_tile, merge_realtime_into_tile
 
 
 def test_what_if_bonus_effect():
     result = evaluate_what_if("SPY", {"orbRetestConfirms": True, "spreadShrinksTo": 5})
     assert result.band.label in {"Armed", "EntryReady"}
     assert 0 <= result.probability <= 0.99
+
+
+def test_sweep_matches_single_scenarios_from_the_live_tile():
+    tile, _ = _synthetic_tile("SPY")
+    base = WhatIfBase.from_tile(tile)
+    assert evaluate_what_if("SPY", {}, base).probability == tile.probability_to_action
+    grid = {
+        "spreadShrinksTo": [2, 6, 12],
+        "orbRetestConfirms": [False, True],
+        "ivChange": [-3, 1],
+        "microChop": [0.1, 0.7],
+        "divergenceZ": [-2, 0.2, 1],
+    }
+    surface = sweep_what_if(base, grid)
+    assert surface["shape"] == [3, 2, 2, 2, 3] and len(surface["probability"]) == 72
+    for index, combination in enumerate(itertools.product(*grid.values())):
+        single = evaluate_what_if("SPY", dict(zip(grid, combination)), base)
+        assert surface["probability"][index] == single.probability
+        assert surface["band"][index] == single.band.label
+    with pytest.raises(ValueError):
+        sweep_what_if(base, {"vix": [1, 2]})
+
+
+@pytest.mark.asyncio
+async def test_micro_scenarios_score_like_the_next_realtime_merge():
+    tile, _ = _synthetic_tile("SPY")
+    tile.admin["marketMicro"] = {**tile.admin["marketMicro"], "minuteThrust": 0.4}
+    await state_store.set_state("SPY", tile)
+    surface = sweep_what_if(
+        WhatIfBase.from_tile(tile), {"microChop": [0.2, 0.8], "divergenceZ": [0.3, 1.8]}
+    )
+    for index, (chop, divergence) in enumerate(itertools.product([0.2, 0.8], [0.3, 1.8])):
+        await state_store.set_state("SPY", tile)
+        merged = await merge_realtime_into_tile(
+            "SPY",
+            {"marketMicro": {"minuteThrust": 0.4, "microChop": chop, "divergenceZ": divergence}},
+        )
+        assert surface["probability"][index] == merged.probability_to_action
+        assert surface["band"][index] == merged.band.label
+
+
+@pytest.mark.asyncio
+async def test_grid_endpoint():
+    await state_store.set_state("SPY", _synthetic_tile("SPY")[0])
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.post(
+            "/api/what-if/grid",
+            json={"ticker": "spy", "grid": {"spreadShrinksTo": [3, 9], "microChop": [0, 0.5, 1]}},
+        )
+        bad = await client.post("/api/what-if/grid", json={"ticker": "SPY", "grid": {"x": [1]}})
+        unknown = await client.post("/api/what-if/grid", json={"ticker": "ZZZZ", "grid": {}})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["dimensions"] == ["spreadShrinksTo", "microChop"] and body["shape"] == [2, 3]
+    assert len(body["probability"]) == len(body["band"]) == 6
+    assert body["base"]["band"] in {"Loading", "Armed", "EntryReady"}
+    assert bad.status_code == 400 and unknown.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_what_if_follows_the_dynamic_watchlist():
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.post("/api/tickers", json={"ticker": "AMD"})
+        added = await client.post("/api/what-if", json={"ticker": "amd", "deltas": {}})
+        await client.delete("/api/tickers/AMD")
+        removed = await client.post("/api/what-if", json={"ticker": "AMD", "deltas": {}})
+    assert added.status_code == 200 and added.json()["symbol"] == "AMD"
+    assert removed.status_code == 404
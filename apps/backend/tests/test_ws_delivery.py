@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from app.domain.types import ProbabilityBand
+from app.services.tile_engine import _synthetic_tile
+from app.ws.delivery import DeliveryQueue
+from app.ws.manager import ConnectionManager
+
+
+def _tile(symbol: str, version: int, score: int = 40):
+    tile, _ = _synthetic_tile(symbol)
+    tile.version = version
+    tile.band = ProbabilityBand.from_score(score)
+    return tile
+
+
+class ManualClock:
+    """Stands in for the queue's clock and tier sleep: after each flush the queue parks until
+    the test releases it, and sends advance time only by what they declare."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.intervals: list[float] = []
+        self._parked: asyncio.Queue[asyncio.Future] = asyncio.Queue()
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.intervals.append(seconds)
+        wake = asyncio.get_running_loop().create_future()
+        await self._parked.put(wake)
+        await wake
+        self.now += seconds
+
+    async def flushed(self) -> asyncio.Future:
+        """Wait for the next flush to finish; resolving the result ends its tier interval."""
+
+        return await asyncio.wait_for(self._parked.get(), timeout=1.0)
+
+
+def _queue(tier: str = "auto") -> tuple[DeliveryQueue, ManualClock]:
+    clock = ManualClock()
+    return DeliveryQueue(tier, clock=clock, sleep=clock.sleep), clock
+
+
+def _run(queue: DeliveryQueue, clock: ManualClock, sent: list, cost: float = 0.0) -> asyncio.Task:
+    async def send(symbol, version, data):
+        clock.now += cost
+        sent.append((symbol, version))
+
+    return asyncio.create_task(queue.run(send))
+
+
+@pytest.mark.asyncio
+async def test_queue_conflates_to_newest_tile_per_symbol():
+    (queue, clock), sent = _queue("5hz"), []
+    for version in range(1, 6):
+        queue.offer("SPY", version, _tile("SPY", version))
+    queue.offer("QQQ", 1, _tile("QQQ", 1))
+    task = _run(queue, clock, sent)
+    interval = await clock.flushed()
+    for version in range(6, 9):
+        queue.offer("SPY", version, _tile("SPY", version))
+    queue.offer("QQQ", 1, _tile("QQQ", 1))  # already delivered
+    assert sent == [("SPY", 5), ("QQQ", 1)]  # still inside the tier interval
+    interval.set_result(None)
+    await clock.flushed()
+    task.cancel()
+    assert sent[2:] == [("SPY", 8)]
+    assert clock.intervals == [0.2, 0.2]
+    assert queue.stats()["conflated"] == 6 and queue.skipped == 1
+
+
+@pytest.mark.asyncio
+async def test_band_tier_only_delivers_band_changes():
+    (queue, clock), sent = _queue("band"), []
+    queue.mark_delivered("SPY", 1, _tile("SPY", 1, score=40))
+    queue.offer("SPY", 2, _tile("SPY", 2, score=45))
+    task = _run(queue, clock, sent)
+    interval = await clock.flushed()
+    assert sent == [] and queue.skipped == 1
+    queue.offer("SPY", 3, _tile("SPY", 3, score=90))
+    interval.set_result(None)
+    await clock.flushed()
+    task.cancel()
+    assert sent == [("SPY", 3)]
+    assert clock.intervals == [1.0, 1.0]
+
+
+@pytest.mark.asyncio
+async def test_auto_tier_steps_down_for_slow_clients_only():
+    (slow, slow_clock), (fast, fast_clock) = _queue(), _queue()
+    slow_sent, fast_sent = [], []
+    tasks = [_run(slow, slow_clock, slow_sent, cost=0.15), _run(fast, fast_clock, fast_sent)]
+    for version in range(1, 4):
+        for queue, clock in ((slow, slow_clock), (fast, fast_clock)):
+            queue.offer("SPY", version, _tile("SPY", version))
+            (await clock.flushed()).set_result(None)
+    for task in tasks:
+        task.cancel()
+    assert len(slow_sent) == len(fast_sent) == 3
+    # two sends over half the 0.2 s interval step down; 0.15 s is fine at 1hz
+    assert slow_clock.intervals == [0.2, 1.0, 1.0] and slow.tier.name == "1hz"
+    assert fast_clock.intervals == [0.2, 0.2, 0.2] and fast.tier.name == "5hz"
+    with pytest.raises(ValueError):
+        fast.set_tier("10hz")
+
+
+@pytest.mark.asyncio
+async def test_clients_declare_tiers_on_connect_or_by_message():
+    class Socket:
+        def __init__(self, **query):
+            self.scope, self.query_params, self.frames = {}, query, []
+
+        async def accept(self, subprotocol=None):
+            pass
+
+        async def send_text(self, text):
+            self.frames.append(text)
+
+    manager = ConnectionManager()
+    phone, desktop = Socket(tier="1hz"), Socket()
+    await manager.connect(phone)
+    await manager.connect(desktop)
+    assert manager.session(phone).delivery.tier.name == "1hz"
+    await manager.handle_message(desktop, '{"action":"tier","tier":"band"}')
+    assert desktop.frames == ['{"type":"tier","tier":"band"}']
+    assert manager.stats()["tiers"] == {"1hz": 1, "band": 1}
+    await manager.close()
@@ -0,0 +1,243 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from app.domain.types import TileState
+from app.main import app
+from app.services.state_store import StateStore, state_store
+from app.services.tile_engine import _synthetic_tile
+from app.ws.manager import ConnectionManager
+from app.ws.projection import (
+    CHART_FIELDS,
+    FRAME_DEFLATE,
+    FRAME_RAW,
+    SUMMARY_FIELDS,
+    decode,
+    encode,
+    tile_message,
+    tile_payloads,
+)
+
+
+class FakeSocket:
+    def __init__(self, subprotocols: list[str] | None = None, **query: str) -> None:
+        self.scope = {"subprotocols": subprotocols or []}
+        self.query_params = query
+        self.subprotocol: str | None = None
+        self.frames: list[str | bytes] = []
+
+    async def accept(self, subprotocol: str | None = None) -> None:
+        self.subprotocol = subprotocol
+
+    async def send_text(self, text: str) -> None:
+        self.frames.append(text)
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.frames.append(data)
+
+    async def send_json(self, payload: dict) -> None:
+        self.frames.append(json.dumps(payload, separators=(",", ":"), ensure_ascii=False))
+
+    def messages(self) -> list[dict]:
+        return [decode(frame) for frame in self.frames]
+
+
+async def _stored(store: StateStore, symbol: str):
+    tile, _ = _synthetic_tile(symbol)
+    return await store.set_state(symbol, tile)
+
+
+async def _drain(seconds: float = 0.01) -> None:
+    """Let the per-client sender tasks flush (the default tier waits 0.2 s between flushes)."""
+
+    await asyncio.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_default_clients_get_full_tiles_byte_identical():
+    manager = ConnectionManager()
+    socket = FakeSocket()
+    await manager.connect(socket)
+    tile = await _stored(StateStore(), "SPY")
+    await manager.broadcast_tile(tile)
+    await _drain()
+    await manager.close()
+    expected = FakeSocket()
+    await expected.send_json({"type": "tile", "data": tile.to_public()})
+    assert socket.frames == expected.frames
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_filter_symbols_and_project_fields():
+    manager = ConnectionManager()
+    store = StateStore()
+    summary, chart, full = FakeSocket(), FakeSocket(), FakeSocket()
+    for socket in (summary, chart, full):
+        await manager.connect(socket)
+    assert await manager.handle_message(
+        summary, '{"action":"subscribe","symbols":["*"],"fields":"summary"}'
+    ) == ["*"]
+    assert await manager.handle_message(
+        chart, '{"action":"subscribe","symbols":["qqq"],"fields":"chart"}'
+    ) == ["QQQ"]
+    for socket in (summary, chart):
+        socket.frames.clear()
+
+    await manager.broadcast_tile(await _stored(store, "SPY"))
+    await manager.broadcast_tile(await _stored(store, "QQQ"))
+    await _drain()
+
+    assert [m["data"]["symbol"] for m in summary.messages()] == ["SPY", "QQQ"]
+    assert all(set(m["data"]) == set(SUMMARY_FIELDS) for m in summary.messages())
+    assert all(m["fields"] == "summary" for m in summary.messages())
+    assert [m["data"]["symbol"] for m in chart.messages()] == ["QQQ"]
+    assert set(chart.messages()[0]["data"]) == set(CHART_FIELDS)
+    assert len(full.frames) == 2 and "fields" not in full.messages()[0]
+
+    await manager.handle_message(chart, '{"action":"unsubscribe","symbols":["QQQ"]}')
+    chart.frames.clear()
+    await manager.broadcast_tile(await _stored(store, "QQQ"))
+    await _drain(0.25)
+    assert chart.frames == [] and len(full.frames) == 3
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe_from_the_default_keeps_the_rest_of_the_watchlist(monkeypatch):
+    async def watchlist():
+        return ["SPY", "QQQ"]
+
+    monkeypatch.setattr("app.ws.manager.watchlist_service.list", watchlist)
+    manager = ConnectionManager()
+    store = StateStore()
+    socket = FakeSocket()
+    await manager.connect(socket)
+    await manager.handle_message(socket, '{"action":"unsubscribe","symbols":["spy"]}')
+    socket.frames.clear()
+
+    await manager.broadcast_tile(await _stored(store, "SPY"))
+    await manager.broadcast_tile(await _stored(store, "QQQ"))
+    await _drain()
+    await manager.close()
+    assert [m["data"]["symbol"] for m in socket.messages()] == ["QQQ"]
+    assert "fields" not in socket.messages()[0]
+
+
+@pytest.mark.asyncio
+async def test_frames_are_encoded_once_per_version():
+    manager = ConnectionManager()
+    sockets = [FakeSocket() for _ in range(5)]
+    for socket in sockets:
+        await manager.connect(socket)
+    tile = await _stored(StateStore(), "IWM")
+    await manager.broadcast_tile(tile)
+    await manager.broadcast_tile(tile)
+    await _drain()
+    await manager.close()
+    stats = manager.projections.stats()
+    assert stats["misses"] == 1 and stats["hits"] == 4
+    assert all(len(socket.frames) == 1 for socket in sockets)
+    assert sockets[0].frames[0] is sockets[4].frames[0]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_one_bulk_frame_shared_until_a_tile_changes():
+    manager = ConnectionManager()
+    store = StateStore()
+    for symbol in ("SPY", "QQQ", "IWM"):
+        await _stored(store, symbol)
+    sockets = [FakeSocket(), FakeSocket(), FakeSocket(["kcu.msgpack.v1"])]
+    for socket in sockets:
+        await manager.connect(socket)
+        await manager.send_snapshot(socket, await store.all_states())
+    tiles = sorted(await store.all_states(), key=lambda tile: tile.symbol)
+    expected = encode({"type": "snapshot", "tiles": [tile.to_public() for tile in tiles]})
+    assert sockets[0].frames == [expected] and sockets[0].frames[0] is sockets[1].frames[0]
+    assert decode(sockets[2].frames[0])["tiles"][0]["symbol"] == "IWM"
+    assert manager.projections.stats()["misses"] == 2
+
+    await _stored(store, "QQQ")
+    await manager.send_snapshot(sockets[0], await store.all_states())
+    assert manager.projections.stats()["misses"] == 3
+    assert sockets[0].frames[1] != expected
+
+    await manager.handle_message(
+        sockets[1], '{"action":"subscribe","symbols":["SPY"],"fields":"summary"}'
+    )
+    await manager.send_snapshot(sockets[1], await store.all_states())
+    summary = sockets[1].messages()[-1]
+    assert summary["fields"] == "summary" and [t["symbol"] for t in summary["tiles"]] == ["SPY"]
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_state_endpoint_serves_the_cached_payload():
+    await state_store.set_state("SPY", _synthetic_tile("SPY")[0])
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.post("/api/tickers", json={"ticker": "SPY"})
+        tile = await state_store.get_state("SPY")
+        resp = await client.get("/api/tickers/SPY/state")
+    assert resp.status_code == 200
+    assert resp.text == tile_payloads.fragment("SPY", tile.version, tile)
+    assert resp.json() == TileState.model_validate(tile.to_public()).model_dump()
+
+
+@pytest.mark.asyncio
+async def test_bad_messages_get_an_error_reply():
+    manager = ConnectionManager()
+    socket = FakeSocket()
+    await manager.connect(socket)
+    assert await manager.handle_message(socket, "not json") == []
+    assert (
+        await manager.handle_message(
+            socket, '{"action":"subscribe","symbols":["SPY"],"fields":"everything"}'
+        )
+        == []
+    )
+    assert [m["type"] for m in socket.messages()] == ["error", "error"]
+    assert manager.session(socket).fields_for("SPY") == "full"
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_msgpack_subprotocol_packs_arrays_and_deflates_large_frames():
+    manager = ConnectionManager()
+    packed, plain = FakeSocket(["kcu.msgpack.v1"]), FakeSocket(["graphql-ws"])
+    await manager.connect(packed)
+    await manager.connect(plain)
+    assert packed.subprotocol == "kcu.msgpack.v1" and plain.subprotocol is None
+    await manager.handle_message(
+        packed, '{"action":"subscribe","symbols":["*"],"fields":"summary"}'
+    )
+
+    tile, _ = _synthetic_tile("SPY")
+    closes = 500 + np.cumsum(np.random.default_rng(7).normal(0, 0.2, 390))
+    tile.bars = np.column_stack([closes, closes + 0.3, closes - 0.3, closes, closes * 100])
+    tile.bar_times = [f"2026-10-19T13:{minute % 60:02d}:00" for minute in range(390)]
+    tile.ema8, tile.vwap = closes * 1.001, closes * 0.999
+    store = StateStore()
+    await manager.broadcast_tile(await store.set_state("SPY", tile))
+    await _drain()
+    await manager.handle_message(packed, '{"action":"subscribe","symbols":["SPY"],"fields":"full"}')
+    tile = await store.set_state("SPY", tile.copy())
+    await manager.broadcast_tile(tile)
+    await _drain(0.25)
+    await manager.send_local({"type": "heartbeat"})
+    assert manager.stats()["encodings"] == {"msgpack": 1, "json": 1}
+    await manager.close()
+
+    ack, summary, _, full, heartbeat = packed.frames
+    assert all(isinstance(frame, bytes) for frame in packed.frames)
+    assert summary[0] == FRAME_RAW and full[0] == FRAME_DEFLATE
+    assert decode(heartbeat) == {"type": "heartbeat"}
+    assert decode(ack)["type"] == "subscribed"
+    public = tile.to_public()
+    data = decode(full)["data"]
+    assert full == encode(tile_message(public, "full", "msgpack"), "msgpack")
+    assert data["ema8"] == public["ema8"] and data["vwap"] == public["vwap"]
+    assert data["bars"]["t"] == [bar["t"] for bar in public["bars"]]
+    assert data["bars"]["c"] == [bar["c"] for bar in public["bars"]]
+    assert len(full) < len(plain.frames[0]) / 2
@@ -1,12 +1,21 @@
 import clsx from "clsx";
 
+type TargetOdds = { hit_probability?: number | null; expected_minutes?: number | null };
+
 type ManagingPlan = {
   symbol: string;
   direction: string;
   entry: number;
-  tp1: { price: number; label: string; distance_pct: number; hit?: boolean };
-  tp2: { price: number; label: string; distance_pct: number; hit?: boolean };
-  runner: { trail: number; extended_to?: number | null; continuation_prob?: number; reasons?: string[] };
+  tp1: { price: number; label: string; distance_pct: number; hit?: boolean } & TargetOdds;
+  tp2: { price: number; label: string; distance_pct: number; hit?: boolean } & TargetOdds;
+  runner: {
+    trail: number;
+    extended_to?: number | null;
+    continuation_prob?: number;
+    extension_probability?: number | null;
+    extension_expected_minutes?: number | null;
+    reasons?: string[];
+  };
   timing?: { label?: string };
   reasons?: string[];
 };
@@ -15,9 +24,16 @@ type Props = {
   plan?: ManagingPlan | null;
 };
 
+function odds(probability?: number | null, minutes?: number | null) {
+  if (probability == null) return null;
+  const eta = minutes ? ` in ~${Math.round(minutes)}m` : "";
+  return `${Math.round(probability * 100)}%${eta}`;
+}
+
 function ManagingPanel({ plan }: Props) {
   if (!plan) return null;
   const levels = [plan.tp1, plan.tp2];
+  const extensionOdds = odds(plan.runner.extension_probability, plan.runner.extension_expected_minutes);
   return (
     <div className="mt-4 rounded-xl border border-slate-800 bg-slate-900/60 p-4">
       <div className="flex items-center justify-between text-xs text-slate-400">
@@ -25,20 +41,26 @@ function ManagingPanel({ plan }: Props) {
         <span>{plan.timing?.label}</span>
       </div>
       <div className="mt-3 space-y-2">
-        {levels.map((lvl) => (
-          <div key={lvl.label} className="flex items-center justify-between text-sm">
-            <div>
-              <p className="text-slate-300">{lvl.label}</p>
-              <p className="text-xs text-slate-500">{lvl.distance_pct}% from entry</p>
+        {levels.map((lvl) => {
+          const hitOdds = odds(lvl.hit_probability, lvl.expected_minutes);
+          return (
+            <div key={lvl.label} className="flex items-center justify-between text-sm">
+              <div>
+                <p className="text-slate-300">{lvl.label}</p>
+                <p className="text-xs text-slate-500">
+                  {lvl.distance_pct}% from entry{hitOdds && ` · hit ${hitOdds}`}
+                </p>
+              </div>
+              <span className={clsx("rounded px-2 py-1 text-xs", lvl.hit ? "bg-emerald-800 text-emerald-100" : "bg-slate-800 text-slate-200")}>${lvl.price.toFixed(2)}</span>
             </div>
-            <span className={clsx("rounded px-2 py-1 text-xs", lvl.hit ? "bg-emerald-800 text-emerald-100" : "bg-slate-800 text-slate-200")}>${lvl.price.toFixed(2)}</span>
-          </div>
-        ))}
+          );
+        })}
       </div>
       <div className="mt-4 rounded-lg bg-slate-950/60 p-3 text-sm">
         <p className="text-slate-300">Runner trail @ ${plan.runner.trail.toFixed(2)}</p>
         {plan.runner.extended_to && <p className="text-xs text-slate-400">Extended to ${plan.runner.extended_to.toFixed(2)}</p>}
         <p className="text-xs text-slate-400">Continuation {Math.round((plan.runner.continuation_prob ?? 0) * 100)}%</p>
+        {extensionOdds && <p className="text-xs text-slate-400">Extension {extensionOdds}</p>}
         <div className="mt-2 flex flex-wrap gap-2 text-[10px] text-slate-300">
           {(plan.runner.reasons || plan.reasons || []).map((reason) => (
             <span key={reason} className="rounded-full bg-slate-800 px-2 py-1">
@@ -106,13 +106,21 @@ export function useLiveTiles(): UseLiveTilesResult {
         heartbeatRef.current = Date.now();
         return;
       }
-      if (payload?.type !== "tile" || typeof payload.data !== "object" || !payload.data) return;
-      const tile = payload.data as Tile;
-      if (!tile.symbol) return;
+      let incoming: Tile[];
+      if (payload?.type === "snapshot" && Array.isArray(payload.tiles)) {
+        incoming = payload.tiles as Tile[];
+      } else if (payload?.type === "tile" && typeof payload.data === "object" && payload.data) {
+        incoming = [payload.data as Tile];
+      } else {
+        return;
+      }
       const map = tilesRef.current;
-      const merged = mergeTile(map.get(tile.symbol), tile);
-      map.set(tile.symbol, merged);
-      tradesStore.getState().syncTile(merged);
+      for (const tile of incoming) {
+        if (!tile?.symbol) continue;
+        const merged = mergeTile(map.get(tile.symbol), tile);
+        map.set(tile.symbol, merged);
+        tradesStore.getState().syncTile(merged);
+      }
       heartbeatRef.current = Date.now();
       setVersion((value) => value + 1);
     }, setStatus);